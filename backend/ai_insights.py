@@ -1,10 +1,14 @@
-from emergentintegrations.llm.chat import LlmChat, UserMessage
 import os
 from dotenv import load_dotenv
 import logging
 import json
 from typing import Dict, Any, List
-from database import get_db_connection
+from database import db_cursor, plant_filter
+from lake import date_window
+from metrics import timed_call, timed_query
+from queries import query, register
+from query_executor import run_query
+from serialization import fetch_records
 
 load_dotenv()
 
@@ -21,66 +25,102 @@ SQL_TEMPLATES = {
             AVG(cost_rs_ton) as avg_cost,
             AVG(margin_pct) as avg_margin
         FROM fact_finance
-        WHERE date >= '{start_date}' AND date <= '{end_date}'
+        WHERE {window} AND {plant}
         GROUP BY month
         ORDER BY month
     """,
     'energy_anomaly': """
         SELECT 
-            plant_name,
-            AVG(power_kwh_ton) as avg_power,
-            AVG(heat_kcal_kg) as avg_heat,
-            AVG(fuel_cost_rs_ton) as avg_fuel_cost,
-            AVG(afr_pct) as avg_afr
-        FROM fact_energy
-        WHERE date >= '{start_date}' AND date <= '{end_date}'
-        GROUP BY plant_name
+            d.plant_name,
+            e.* EXCLUDE (plant_id)
+        FROM (
+            SELECT 
+                plant_id,
+                AVG(power_kwh_ton) as avg_power,
+                AVG(heat_kcal_kg) as avg_heat,
+                AVG(fuel_cost_rs_ton) as avg_fuel_cost,
+                AVG(afr_pct) as avg_afr
+            FROM fact_energy
+            WHERE {window} AND {plant}
+            GROUP BY plant_id
+        ) e
+        LEFT JOIN dim_plant d USING (plant_id)
     """,
     'plant_performance': """
         SELECT 
-            p.plant_name,
-            SUM(p.cement_mt) as total_cement,
-            AVG(p.capacity_util_pct) as avg_capacity,
-            AVG(p.downtime_hrs) as avg_downtime,
-            AVG(f.ebitda_rs_ton) as avg_ebitda
-        FROM fact_production p
-        LEFT JOIN fact_finance f ON p.date = f.date AND p.plant_name = f.plant_name
-        WHERE p.date >= '{start_date}' AND p.date <= '{end_date}'
-        GROUP BY p.plant_name
+            d.plant_name,
+            g.* EXCLUDE (plant_id)
+        FROM (
+            SELECT 
+                p.plant_id,
+                SUM(p.cement_mt) as total_cement,
+                AVG(p.capacity_util_pct) as avg_capacity,
+                AVG(p.downtime_hrs) as avg_downtime,
+                AVG(f.ebitda_rs_ton) as avg_ebitda
+            FROM fact_production p
+            LEFT JOIN fact_finance f ON p.date = f.date AND p.plant_id = f.plant_id AND {window_f}
+            WHERE {window_p} AND {plant_p}
+            GROUP BY p.plant_id
+        ) g
+        LEFT JOIN dim_plant d USING (plant_id)
         ORDER BY avg_ebitda DESC
     """,
     'margin_leak': """
         SELECT 
-            f.plant_name,
-            AVG(f.margin_pct) as avg_margin,
-            AVG(f.cost_rs_ton) as avg_cost,
-            AVG(s.realization_rs_ton) as avg_realization,
-            AVG(s.freight_rs_ton) as avg_freight,
-            AVG(e.fuel_cost_rs_ton) as avg_fuel_cost
-        FROM fact_finance f
-        LEFT JOIN fact_sales s ON f.date = s.date AND f.plant_name = s.plant_name
-        LEFT JOIN fact_energy e ON f.date = e.date AND f.plant_name = e.plant_name
-        WHERE f.date >= '{start_date}' AND f.date <= '{end_date}'
-        GROUP BY f.plant_name
+            d.plant_name,
+            g.* EXCLUDE (plant_id)
+        FROM (
+            SELECT 
+                f.plant_id,
+                AVG(f.margin_pct) as avg_margin,
+                AVG(f.cost_rs_ton) as avg_cost,
+                AVG(s.realization_rs_ton) as avg_realization,
+                AVG(s.freight_rs_ton) as avg_freight,
+                AVG(e.fuel_cost_rs_ton) as avg_fuel_cost
+            FROM fact_finance f
+            LEFT JOIN fact_sales s ON f.date = s.date AND f.plant_id = s.plant_id AND {window_s}
+            LEFT JOIN fact_energy e ON f.date = e.date AND f.plant_id = e.plant_id AND {window_e}
+            WHERE {window_f} AND {plant_f}
+            GROUP BY f.plant_id
+        ) g
+        LEFT JOIN dim_plant d USING (plant_id)
         ORDER BY avg_margin ASC
     """,
     'downtime_root_cause': """
         SELECT 
-            m.plant_name,
-            m.equipment,
-            AVG(m.breakdown_hrs) as avg_breakdown,
-            AVG(m.mtbf_hrs) as avg_mtbf,
-            AVG(m.mttr_hrs) as avg_mttr,
-            COUNT(*) as incident_count
-        FROM fact_maintenance m
-        WHERE m.date >= '{start_date}' AND m.date <= '{end_date}'
-        GROUP BY m.plant_name, m.equipment
-        HAVING avg_breakdown > 0
+            d.plant_name,
+            q.equipment,
+            g.* EXCLUDE (plant_id, equipment_id)
+        FROM (
+            SELECT 
+                m.plant_id,
+                m.equipment_id,
+                AVG(m.breakdown_hrs) as avg_breakdown,
+                AVG(m.mtbf_hrs) as avg_mtbf,
+                AVG(m.mttr_hrs) as avg_mttr,
+                COUNT(*) as incident_count
+            FROM fact_maintenance m
+            WHERE {window_m} AND {plant_m}
+            GROUP BY m.plant_id, m.equipment_id
+            HAVING avg_breakdown > 0
+            ORDER BY avg_breakdown DESC
+            LIMIT 10
+        ) g
+        LEFT JOIN dim_plant d USING (plant_id)
+        LEFT JOIN dim_equipment q USING (equipment_id)
         ORDER BY avg_breakdown DESC
-        LIMIT 10
     """
 }
 
+# {window} / {plant} are the date window and plant filter on the unaliased fact
+# table, {window_<alias>} / {plant_<alias>} on an aliased one
+_ALIASES = ('', 'p', 'f', 's', 'e', 'm')
+_CONDITIONS = {**{f"window_{alias}" if alias else 'window': date_window(alias) for alias in _ALIASES},
+               **{f"plant_{alias}" if alias else 'plant': plant_filter(f"{alias}.plant_id" if alias else 'plant_id') for alias in _ALIASES}}
+
+for query_type, template in SQL_TEMPLATES.items():
+    register(f"insight:{query_type}", template.format(**_CONDITIONS))
+
 def classify_question(question: str) -> str:
     """Classify question type based on keywords"""
     question_lower = question.lower()
@@ -100,39 +140,33 @@ def classify_question(question: str) -> str:
 
 def execute_sql_analysis(query_type: str, context_filters: Dict) -> Dict[str, Any]:
     """Execute SQL queries to get numeric evidence"""
-    conn = get_db_connection()
-    
     start_date = context_filters.get('start', '2024-01-01')
     end_date = context_filters.get('end', '2025-12-31')
     plant = context_filters.get('plant', 'all')
     
-    sql_query = SQL_TEMPLATES.get(query_type, SQL_TEMPLATES['plant_performance'])
-    sql_query = sql_query.format(start_date=start_date, end_date=end_date)
-    
-    if plant != 'all' and 'WHERE' in sql_query:
-        # Add plant filter
-        sql_query = sql_query.replace('WHERE', f"WHERE plant_name = '{plant}' AND")
+    name = f"insight:{query_type if query_type in SQL_TEMPLATES else 'plant_performance'}"
+    sql_query, params = query(name, start=start_date, end=end_date, plant=plant)
     
     try:
-        result = conn.execute(sql_query).fetchdf()
-        evidence = result.to_dict('records')
+        with db_cursor() as conn:
+            evidence = timed_query(name, fetch_records, conn, sql_query, params)
         
         # Compute deltas and key metrics
         computed_metrics = compute_key_metrics(evidence, query_type)
         
-        conn.close()
         return {
             'raw_data': evidence,
             'computed_metrics': computed_metrics,
-            'sql_query': sql_query
+            'sql_query': sql_query,
+            'sql_params': params
         }
     except Exception as e:
         logger.error(f"SQL execution error: {str(e)}")
-        conn.close()
         return {
             'raw_data': [],
             'computed_metrics': {},
             'sql_query': sql_query,
+            'sql_params': params,
             'error': str(e)
         }
 
@@ -176,7 +210,7 @@ async def generate_insight(question: str, context_filters: Dict) -> Dict[str, An
     query_type = classify_question(question)
     
     # Step 2: Execute SQL to get numeric evidence
-    evidence = execute_sql_analysis(query_type, context_filters)
+    evidence = await run_query(execute_sql_analysis, query_type, context_filters)
     
     if 'error' in evidence:
         return {
@@ -221,6 +255,9 @@ Respond in JSON format:
     
     # Step 4: Call LLM
     try:
+        # The LLM client (litellm and its providers) takes seconds to import,
+        # so it is loaded on the first insight rather than at API startup
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
         chat = LlmChat(
             api_key=API_KEY,
             session_id=f"insight-{context_filters.get('start', 'default')}",
@@ -229,7 +266,8 @@ Respond in JSON format:
         chat.with_model("openai", "gpt-4o")
         
         user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        with timed_call('llm', 'gpt-4o'):
+            response = await chat.send_message(user_message)
         
         # Parse JSON response
         try:
@@ -257,6 +295,7 @@ Respond in JSON format:
             'evidence': {
                 'computed_metrics': computed,
                 'sql_query': evidence['sql_query'],
+                'sql_params': evidence['sql_params'],
                 'top_data': raw_data[:3]
             }
         }
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
@@ -30,36 +30,49 @@ class LoginRequest(BaseModel):
     email: str
     password: str
 
-# Demo users - passwords loaded from environment variables
+# Demo users - passwords loaded from environment variables. Each bcrypt hash
+# takes a good fraction of a second, so a password is hashed on its user's
+# first login rather than when the API starts; <variable>_HASH may hold a
+# precomputed hash (pwd_context.hash) to skip even that.
 DEMO_USERS = {
     "demo@starcement.com": {
-        "password": pwd_context.hash(os.getenv("APP_DEMO_ADMIN_PASSWORD", "Demo1234!")),
+        "password_env": ("APP_DEMO_ADMIN_PASSWORD", "Demo1234!"),
         "role": "CXO"
     },
     "plant@starcement.com": {
-        "password": pwd_context.hash(os.getenv("APP_DEMO_PLANT_PASSWORD", "Plant1234!")),
+        "password_env": ("APP_DEMO_PLANT_PASSWORD", "Plant1234!"),
         "role": "Plant Head"
     },
     "energy@starcement.com": {
-        "password": pwd_context.hash(os.getenv("APP_DEMO_ENERGY_PASSWORD", "Energy1234!")),
+        "password_env": ("APP_DEMO_ENERGY_PASSWORD", "Energy1234!"),
         "role": "Energy Manager"
     },
     "sales@starcement.com": {
-        "password": pwd_context.hash(os.getenv("APP_DEMO_SALES_PASSWORD", "Sales1234!")),
+        "password_env": ("APP_DEMO_SALES_PASSWORD", "Sales1234!"),
         "role": "Sales"
     }
 }
 
+_password_hashes: Dict[str, str] = {}
+
+def _password_hash(email: str) -> str:
+    """The demo user's password hash, computed on first use"""
+    hashed = _password_hashes.get(email)
+    if hashed is None:
+        variable, default = DEMO_USERS[email]["password_env"]
+        hashed = os.getenv(f"{variable}_HASH") or pwd_context.hash(os.getenv(variable, default))
+        _password_hashes[email] = hashed
+    return hashed
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def authenticate_user(email: str, password: str):
     if email not in DEMO_USERS:
         return None
-    user_data = DEMO_USERS[email]
-    if not verify_password(password, user_data["password"]):
+    if not verify_password(password, _password_hash(email)):
         return None
-    return User(email=email, role=user_data["role"])
+    return User(email=email, role=DEMO_USERS[email]["role"])
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
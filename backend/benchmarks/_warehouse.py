@@ -0,0 +1,37 @@
+"""Synthetic star-schema data generated directly in DuckDB for the benchmarks."""
+
+def populate(conn, years, plants, lines, equipment):
+    """Fill the dimensions and fact tables: one row per line (production) and per
+    equipment (maintenance) per plant per day, one row per plant per day elsewhere."""
+    days = 365 * years
+    conn.execute(f"INSERT INTO dim_plant SELECT p + 1, 'Plant-' || p, 'Unknown' FROM range({plants}) t(p)")
+    conn.execute(f"INSERT INTO dim_line SELECT l + 1, 'Line-' || l FROM range({lines}) t(l)")
+    conn.execute(f"INSERT INTO dim_equipment SELECT q + 1, 'Equip-' || q FROM range({equipment}) t(q)")
+    conn.execute("INSERT INTO dim_region SELECT k + 1, 'Region-' || k FROM range(4) t(k)")
+    conn.execute(f"""
+        INSERT INTO dim_date
+        SELECT date, year(date), month(date), day(date), monthname(date), quarter(date)
+        FROM (SELECT DATE '2022-01-01' + d::INTEGER AS date FROM range({days}) t(d))
+    """)
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE plant_days AS
+        SELECT DATE '2022-01-01' + d::INTEGER AS date, (p + 1)::INTEGER AS plant_id
+        FROM range({days}) t(d), range({plants}) u(p)
+    """)
+    conn.execute(f"""
+        INSERT INTO fact_production
+        SELECT date, plant_id, l + 1, 3000 + random() * 800, 2200 + random() * 600, 80 + random() * 15, random() * 3
+        FROM plant_days, range({lines}) v(l)
+    """)
+    conn.execute(f"""
+        INSERT INTO fact_maintenance
+        SELECT date, plant_id, q + 1, random() * 4, 100 + random() * 100, 2 + random() * 4
+        FROM plant_days, range({equipment}) v(q)
+    """)
+    for table, cols in [
+        ('fact_energy', "70 + random() * 10, 700 + random() * 80, 1300 + random() * 200, random() * 15"),
+        ('fact_quality', "300 + random() * 50, 45 + random() * 10, 0.7 + random() * 0.1"),
+        ('fact_sales', "plant_id % 4 + 1, 3000 + random() * 500, 5000 + random() * 500, 600 + random() * 200, 85 + random() * 10"),
+        ('fact_finance', "4000 + random() * 500, 900 + random() * 300, 15 + random() * 10"),
+    ]:
+        conn.execute(f"INSERT INTO {table} SELECT date, plant_id, {cols} FROM plant_days")
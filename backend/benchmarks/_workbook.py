@@ -0,0 +1,95 @@
+"""Deterministic synthetic upload workbooks (the sheets and columns of EXPECTED_SHEETS).
+
+One row per plant per day on every sheet, except Production (one per line)
+and Maintenance (one per piece of equipment). Measures are uniform over the
+ranges of _warehouse.populate, drawn from a generator seeded per sheet, and
+the file's dates are fixed, so the same arguments always give the same file.
+
+    cd backend && python benchmarks/_workbook.py workbook.xlsx --plants 10 --days 730
+"""
+import argparse
+import io
+import random
+import sys
+import zipfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+START = date(2024, 1, 1)
+REGIONS = 4
+
+# Sheet column -> (low, high) of its values
+RANGES = {
+    'Cement_MT': (3000, 3800), 'Clinker_MT': (2200, 2800), 'Capacity_Util_%': (80, 95), 'Downtime_Hrs': (0, 3),
+    'Power_kWh_Ton': (70, 80), 'Heat_kcal_kg': (700, 780), 'Fuel_Cost_Rs_Ton': (1300, 1500), 'AFR_%': (0, 15),
+    'Breakdown_Hrs': (0, 4), 'MTBF_Hrs': (100, 200), 'MTTR_Hrs': (2, 6),
+    'Blaine': (300, 350), 'Strength_28D': (45, 55), 'Clinker_Factor': (0.7, 0.8),
+    'Dispatch_MT': (3000, 3500), 'Realization_Rs_Ton': (5000, 5500), 'Freight_Rs_Ton': (600, 800), 'OTIF_%': (85, 95),
+    'Cost_Rs_Ton': (4000, 4500), 'EBITDA_Rs_Ton': (900, 1200), 'Margin_%': (15, 25)
+}
+
+def sheet_rows(sheet_name: str, columns: List[str], plants: int, days: int, lines: int, equipment: int,
+               seed: int) -> Iterator[List]:
+    """The rows of one sheet, day by day"""
+    rng = random.Random(f"{seed}:{sheet_name}")
+    units = lines if 'Line' in columns else equipment if 'Equipment' in columns else 1
+    for d in range(days):
+        day = START + timedelta(days=d)
+        for p in range(plants):
+            for u in range(units):
+                cells = {'Date': day, 'Plant': f"Plant-{p}", 'Line': f"Line-{u}", 'Equipment': f"Equip-{u}",
+                         'Region': f"Region-{p % REGIONS}"}
+                yield [cells[name] if name in cells else round(rng.uniform(*RANGES[name]), 2) for name in columns]
+
+def _save(workbook, path: str):
+    """Save ``workbook`` with fixed document dates and zip entry timestamps"""
+    from openpyxl.xml.functions import tostring
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    # saving stamps the document as modified now
+    workbook.properties.created = workbook.properties.modified = datetime.combine(START, datetime.min.time())
+    stamp = START.timetuple()[:6]
+    with zipfile.ZipFile(buffer) as saved, zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as out:
+        for entry in saved.infolist():
+            data = tostring(workbook.properties.to_tree()) if entry.filename == 'docProps/core.xml' else saved.read(entry.filename)
+            out.writestr(zipfile.ZipInfo(entry.filename, stamp), data, zipfile.ZIP_DEFLATED)
+
+def write_workbook(path: str, plants: int = 5, days: int = 365, lines: int = 2, equipment: int = 3,
+                   seed: int = 7) -> Dict[str, int]:
+    """Write the workbook to ``path``; returns the data rows per sheet"""
+    import openpyxl
+    from excel_processor import EXPECTED_SHEETS
+
+    workbook = openpyxl.Workbook(write_only=True)
+    counts = {}
+    for sheet_name, columns in EXPECTED_SHEETS.items():
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(columns)
+        counts[sheet_name] = 0
+        for row in sheet_rows(sheet_name, columns, plants, days, lines, equipment, seed):
+            sheet.append(row)
+            counts[sheet_name] += 1
+    _save(workbook, path)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--plants', type=int, default=5)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--lines', type=int, default=2, help='production lines per plant')
+    parser.add_argument('--equipment', type=int, default=3, help='maintained equipment per plant')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    counts = write_workbook(args.path, args.plants, args.days, args.lines, args.equipment, args.seed)
+    for sheet_name, rows in counts.items():
+        print(f"{sheet_name:<18}{rows:>10} rows")
+
+if __name__ == '__main__':
+    main()
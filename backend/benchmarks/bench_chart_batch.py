@@ -0,0 +1,141 @@
+"""Time the /api/charts query work: the old ten sequential queries vs the chart-batch planner.
+
+Builds a synthetic warehouse in a temporary database, checks that the planner
+returns the same charts as the old queries, then has ``--clients`` threads
+request the full chart set back to back and reports p50/p95 latency for:
+
+* legacy:     the previous handler's ten queries, one after another on one cursor
+* sequential: the planner's source groups run one after another
+* parallel:   the planner's source groups run on the batch pool (sequential
+              when CHART_BATCH_WORKERS < 2, the default on one core)
+
+    cd backend && python benchmarks/bench_chart_batch.py --plants 20 --years 3 --clients 4
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# whole months (monthly rollup) and an arbitrary window (daily rollup)
+WINDOWS = [('2022-01-01', '2024-06-30', 'all'), ('2022-03-15', '2024-05-20', 'Plant-3')]
+
+def legacy_queries(start, end, plant):
+    """The ten chart queries as the handler ran them before the planner"""
+    from rollups import DAILY_ROLLUP, avg_expr, rollup_source, sum_expr
+
+    plant_filter = "" if plant == "all" else f"AND plant_id = (SELECT plant_id FROM dim_plant WHERE plant_name = '{plant}')"
+    table, date_col = rollup_source(start, end)
+    month = "month" if date_col == "month_start" else "strftime(date, '%Y-%m')"
+    window = f"{date_col} >= '{start}' AND {date_col} <= '{end}'"
+    by_plant = lambda domain, measures, order: (
+        f"SELECT plant_name, {measures} FROM {table} JOIN dim_plant USING (plant_id) WHERE {domain}_rows > 0 AND {window} GROUP BY plant_name ORDER BY {order}")
+    return {
+        'monthly_production': f"SELECT {month} as month, {sum_expr('cement_mt')} as cement, {sum_expr('clinker_mt')} as clinker, {avg_expr('capacity_util_pct')} as capacity FROM {table} WHERE production_rows > 0 AND {window} {plant_filter} GROUP BY {month} ORDER BY month",
+        'plant_production': by_plant('production', f"{sum_expr('cement_mt')} as cement, {avg_expr('capacity_util_pct')} as capacity", 'cement DESC'),
+        'energy_by_plant': by_plant('energy', f"{avg_expr('power_kwh_ton')} as power, {avg_expr('heat_kcal_kg')} as heat, {avg_expr('afr_pct')} as afr", 'power'),
+        'quality_by_plant': by_plant('quality', f"{avg_expr('blaine')} as blaine, {avg_expr('strength_28d')} as strength, {avg_expr('clinker_factor')} as clinker_factor", 'plant_name'),
+        'sales_by_region': f"SELECT region, SUM(dispatch_mt) as dispatch, AVG(realization_rs_ton) as realization, AVG(otif_pct) as otif FROM fact_sales JOIN dim_region USING (region_id) WHERE date >= '{start}' AND date <= '{end}' GROUP BY region ORDER BY dispatch DESC",
+        'monthly_finance': f"SELECT {month} as month, {avg_expr('cost_rs_ton')} as cost, {avg_expr('ebitda_rs_ton')} as ebitda, {avg_expr('margin_pct')} as margin FROM {table} WHERE finance_rows > 0 AND {window} {plant_filter} GROUP BY {month} ORDER BY month",
+        'maintenance_by_plant': by_plant('maintenance', f"{avg_expr('breakdown_hrs')} as breakdown, {avg_expr('mtbf_hrs')} as mtbf, {avg_expr('mttr_hrs')} as mttr", 'plant_name'),
+        'cost_waterfall': f"SELECT {avg_expr('fuel_cost_rs_ton')} as fuel_cost, {avg_expr('power_kwh_ton')} as power, {avg_expr('freight_rs_ton')} as freight_cost, {avg_expr('cost_rs_ton')} as total_cost, {avg_expr('realization_rs_ton')} as realization, {avg_expr('ebitda_rs_ton')} as ebitda FROM {DAILY_ROLLUP} WHERE energy_rows > 0 AND sales_rows > 0 AND finance_rows > 0 AND date >= '{start}' AND date <= '{end}'",
+        'weekly_trend': f"SELECT strftime(date, '%Y-W%W') as week, {sum_expr('cement_mt')} as cement, {avg_expr('capacity_util_pct')} as capacity FROM {DAILY_ROLLUP} WHERE production_rows > 0 AND date >= '{end}'::DATE - INTERVAL '84 days' AND date <= '{end}' {plant_filter} GROUP BY strftime(date, '%Y-W%W') ORDER BY week",
+        'performance_radar': f"SELECT {avg_expr('capacity_util_pct')} as capacity, {avg_expr('power_kwh_ton')} as power, {avg_expr('strength_28d')} as quality, {avg_expr('otif_pct')} as delivery, {avg_expr('margin_pct')} as margin, {avg_expr('afr_pct')} as sustainability FROM {DAILY_ROLLUP} WHERE production_rows > 0 AND energy_rows > 0 AND quality_rows > 0 AND sales_rows > 0 AND finance_rows > 0 AND date >= '{start}' AND date <= '{end}' {plant_filter}",
+    }
+
+def run_legacy(start, end, plant):
+    from database import db_cursor
+
+    charts = {}
+    with db_cursor() as conn:
+        for name, sql in legacy_queries(start, end, plant).items():
+            df = conn.execute(sql).fetchdf()
+            charts[name] = (df.fillna(0) if 'GROUP BY' in sql else df).to_dict('records')
+    return charts
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def same(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9) or (math.isnan(a) and math.isnan(b))
+    return a == b
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--lines', type=int, default=4)
+    parser.add_argument('--equipment', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=4, help='concurrent callers')
+    parser.add_argument('--requests', type=int, default=25, help='requests per caller and mode')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-chart-batch-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    from database import _create_star_schema, db_writer
+    from chart_batch import CHART_SPECS, CHART_BATCH_WORKERS, plan_chart_batch, run_chart_batch
+    from rollups import build_rollups
+    from _warehouse import populate
+
+    with db_writer() as conn:
+        _create_star_schema(conn)
+        populate(conn, args.years, args.plants, args.lines, args.equipment)
+        build_rollups(conn)
+
+    charts = list(CHART_SPECS)
+    modes = {
+        'legacy': run_legacy,
+        'sequential': lambda start, end, plant: run_chart_batch(charts, start, end, plant, parallel=False),
+        'parallel': lambda start, end, plant: run_chart_batch(charts, start, end, plant),
+    }
+
+    for start, end, plant in WINDOWS:
+        reference = run_legacy(start, end, plant)
+        planned = {name: json.loads(value) if isinstance(value, str) else value
+                   for name, value in run_chart_batch(charts, start, end, plant).items()}
+        if not same(planned, reference):
+            print(f"MISMATCH: planner differs from the legacy queries for {start}..{end} {plant}")
+            sys.exit(1)
+        groups = {group['table']: len(group['charts']) for group in plan_chart_batch(charts, start, end, plant)}
+        print(f"{start}..{end} plant={plant}: planner matches legacy; source groups {groups}")
+
+    print(f"{args.plants} plants x {args.years} years, {args.clients} clients x {args.requests} requests, "
+          f"CHART_BATCH_WORKERS={CHART_BATCH_WORKERS}, {os.cpu_count()} CPUs")
+    print(f"{'mode':<12}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+    p95 = {}
+    for mode, fn in modes.items():
+        def client(idx):
+            latencies = []
+            for i in range(args.requests):
+                t0 = time.perf_counter()
+                fn(*WINDOWS[(idx + i) % len(WINDOWS)])
+                latencies.append(time.perf_counter() - t0)
+            return latencies
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            latencies = [lat for lats in pool.map(client, range(args.clients)) for lat in lats]
+        wall = time.perf_counter() - started
+        p95[mode] = percentile(latencies, 95) * 1000
+        print(f"{mode:<12}{statistics.median(latencies) * 1000:>10.1f}{p95[mode]:>10.1f}{len(latencies) / wall:>10.1f}")
+    print(f"p95 legacy / parallel: {p95['legacy'] / p95['parallel']:.1f}x")
+
+if __name__ == '__main__':
+    main()
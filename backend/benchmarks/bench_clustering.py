@@ -0,0 +1,98 @@
+"""Row groups scanned by date-window queries: fact tables in upload order vs clustered.
+
+A synthetic warehouse is written into database files through ConnectionManager
+at each ``--row-group-sizes`` size, once in upload order (a workbook per
+plant, so every row group spans the whole history) and once in the
+CLUSTER_KEYS order ingest now writes. For windows ending at the last loaded
+day, the row groups whose date min/max overlaps the window (the ones DuckDB
+cannot skip) are counted from pragma_storage_info, and the KPI-style
+aggregate over the window is timed.
+
+    cd backend && python benchmarks/bench_clustering.py --years 4 --plants 20 --lines 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import duckdb
+
+from database import CLUSTER_KEYS, ConnectionManager, _create_star_schema
+from _warehouse import populate
+
+TABLES = ['fact_production', 'fact_energy']
+WINDOWS = [('7 days', 7), ('30 days', 30), ('90 days', 90), ('1 year', 365)]
+
+LAYOUTS = {
+    'upload order': lambda table: 'plant_id, date',
+    'clustered': lambda table: CLUSTER_KEYS[table]
+}
+
+def row_groups_hit(conn, table, start, end):
+    """(row groups whose date range overlaps [start, end], all row groups) of ``table``"""
+    return conn.execute(f"""
+        SELECT COUNT(*) FILTER (WHERE lo <= DATE '{end}' AND hi >= DATE '{start}'), COUNT(*)
+        FROM (
+            SELECT row_group_id,
+                   MIN(regexp_extract(stats, 'Min: ([0-9-]+)', 1)::DATE) AS lo,
+                   MAX(regexp_extract(stats, 'Max: ([0-9-]+)', 1)::DATE) AS hi
+            FROM pragma_storage_info('{table}')
+            WHERE column_name = 'date' AND segment_type = 'DATE'
+            GROUP BY row_group_id
+        )
+    """).fetchall()[0]
+
+def timed(conn, sql, repeat):
+    conn.execute(sql).fetchall()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql).fetchall()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=4)
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--lines', type=int, default=8)
+    parser.add_argument('--equipment', type=int, default=8)
+    parser.add_argument('--row-group-sizes', default='16384,122880',
+                        help='comma-separated rows per row group (multiples of 2048; 122880 is the DuckDB default)')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-clustering-')
+    source = os.path.join(workdir, 'source.duckdb')
+    conn = duckdb.connect(source)
+    _create_star_schema(conn)
+    populate(conn, args.years, args.plants, args.lines, args.equipment)
+    last = conn.execute("SELECT MAX(date) FROM fact_production").fetchall()[0][0]
+    conn.close()
+
+    print(f"{args.plants} plants x {args.years} years, {args.lines} lines per plant; windows end {last}")
+    print(f"{'table':<17}{'layout':<14}{'rows/group':>11}{'window':>9}{'groups hit':>12}{'of':>5}{'scanned':>9}{'ms':>8}")
+    for size in [int(s) for s in args.row_group_sizes.split(',')]:
+        for layout, order in LAYOUTS.items():
+            manager = ConnectionManager(os.path.join(workdir, f'{layout.replace(" ", "_")}-{size}.duckdb'), row_group_size=size)
+            with manager.writer() as conn:
+                conn.execute(f"ATTACH '{source}' AS source (READ_ONLY)")
+                for table in TABLES:
+                    conn.execute(f"CREATE TABLE {table} AS SELECT * FROM source.{table} ORDER BY {order(table)}")
+                conn.execute("DETACH source")
+                conn.execute("CHECKPOINT")
+            with manager.cursor() as conn:
+                for table in TABLES:
+                    for window, days in WINDOWS:
+                        start = conn.execute(f"SELECT DATE '{last}' - {days - 1}").fetchall()[0][0]
+                        hit, groups = row_groups_hit(conn, table, start, last)
+                        ms = timed(conn, f"SELECT COUNT(*), AVG(COLUMNS(* EXCLUDE (date, plant_id))) FROM {table} "
+                                         f"WHERE date >= '{start}' AND date <= '{last}'", args.repeat)
+                        print(f"{table:<17}{layout:<14}{size:>11,}{window:>9}{hit:>12}{groups:>5}{hit / groups:>9.0%}{ms:>8.2f}")
+            manager.close()
+
+if __name__ == '__main__':
+    main()
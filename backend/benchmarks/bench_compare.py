@@ -0,0 +1,68 @@
+"""Plant comparison: one /api/kpis + /api/charts pair per plant vs a single /api/compare.
+
+The comparison view used to request the role KPIs and the full chart set once
+per selected plant (2 requests and 13 queries a plant); /api/compare answers
+every plant from one KPI query and one query per chart series, each grouped
+by plant. Both are timed on a synthetic warehouse for growing plant counts,
+calling the endpoints' compute functions directly (no result cache):
+
+* fan-out:  _compute_kpis and _compute_chart_data for each plant in turn
+* compare:  _compute_compare for all the plants
+
+    cd backend && python benchmarks/bench_compare.py --plants 20 --years 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def timed(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-compare-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    from database import db_writer
+    from rollups import build_rollups
+    from _warehouse import populate
+    import server
+
+    with db_writer() as conn:
+        populate(conn, args.years, args.plants, 4, 4)
+        build_rollups(conn)
+        last = conn.execute("SELECT MAX(date) FROM fact_production").fetchall()[0][0]
+
+    start, end = str(last.replace(day=1, month=1)), str(last)
+    print(f"{args.plants} plants x {args.years} years; window {start}..{end}; ms per comparison")
+    print(f"{'plants':>6}{'fan-out':>10}{'compare':>10}{'speedup':>9}")
+    for count in (1, 2, 5, 10):
+        plants = [f"Plant-{p}" for p in range(count)]
+
+        def fan_out():
+            for plant in plants:
+                server._compute_kpis('CXO', start, end, plant)
+                server._compute_chart_data('CXO', start, end, plant)
+
+        fan_out_ms = timed(fan_out, args.repeat)
+        compare_ms = timed(lambda: server._compute_compare('CXO', start, end, plants), args.repeat)
+        print(f"{count:>6}{fan_out_ms:>10.1f}{compare_ms:>10.1f}{fan_out_ms / compare_ms:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
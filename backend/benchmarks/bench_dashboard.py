@@ -0,0 +1,87 @@
+"""DB work per dashboard page load: /api/kpis + /api/charts vs the /api/dashboard bundle.
+
+The dashboard page requested /api/kpis and /api/charts with the same filters;
+/api/dashboard answers both in one request (dashboard.py). On a synthetic
+warehouse, for each role, window and plant filter, this reports the requests
+and statements of a page load and, before and after, the time of
+
+* DB work:   the endpoints' compute functions (_compute_kpis and
+             _compute_chart_data, or _compute_dashboard)
+* page load: the endpoints' requests through the app (in-process), result
+             cache cleared first
+
+    cd backend && python benchmarks/bench_dashboard.py --plants 20 --years 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def timed(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-dashboard-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    from fastapi.testclient import TestClient
+    from chart_batch import CHART_SPECS, plan_chart_batch
+    from dashboard import plan_dashboard
+    from database import db_writer
+    from result_cache import result_cache
+    from rollups import build_rollups
+    from _warehouse import populate
+    import server
+
+    with db_writer() as conn:
+        populate(conn, args.years, args.plants, 4, 4)
+        build_rollups(conn)
+        last = conn.execute("SELECT MAX(date) FROM fact_production").fetchall()[0][0]
+
+    client = TestClient(server.app)
+    windows = {'whole months': (str(last.replace(month=1, day=1)), str(last.replace(day=1) - timedelta(days=1))),
+               'arbitrary': (str(last.replace(month=2, day=10)), str(last))}
+    print(f"{args.plants} plants x {args.years} years; ms per page load")
+    print(f"{'role':<12}{'window':<14}{'plant':<9}{'requests':>9}{'statements':>12}{'DB before':>11}{'after':>7}{'page before':>13}{'after':>7}")
+    for role in ('CXO', 'Plant Head'):
+        for label, (start, end) in windows.items():
+            for plant in ('all', 'Plant-3'):
+                params = {'role': role, 'start': start, 'end': end, 'plant': plant}
+                before_statements = 3 + sum(len(g['statements']) for g in plan_chart_batch(list(CHART_SPECS), start, end, plant))
+                after_statements = sum(len(g['statements']) for g in plan_dashboard(role, start, end, plant))
+
+                def db_before():
+                    server._compute_kpis(role, start, end, plant)
+                    server._compute_chart_data(role, start, end, plant)
+
+                def page(*paths):
+                    result_cache.clear()
+                    for path in paths:
+                        client.get(path, params=params).raise_for_status()
+
+                timings = [timed(db_before, args.repeat),
+                           timed(lambda: server._compute_dashboard(role, start, end, plant), args.repeat),
+                           timed(lambda: page('/api/kpis', '/api/charts'), args.repeat),
+                           timed(lambda: page('/api/dashboard'), args.repeat)]
+                print(f"{role:<12}{label:<14}{plant:<9}{'2 -> 1':>9}{f'{before_statements} -> {after_statements}':>12}"
+                      f"{timings[0]:>11.1f}{timings[1]:>7.1f}{timings[2]:>13.1f}{timings[3]:>7.1f}")
+
+if __name__ == '__main__':
+    main()
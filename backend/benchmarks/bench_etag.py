@@ -0,0 +1,84 @@
+"""Conditional GET: a full response vs a cached one vs a 304 for an unchanged warehouse.
+
+A client revalidating with the ETag it was sent gets 304 Not Modified with
+no body, before the result cache or the query pool is touched
+(http_cache.py). On a synthetic warehouse, for the dashboard endpoints, this
+reports the time of a request (in-process, through the app) that
+
+* full:    computes the response (result cache cleared first)
+* cached:  is served from the result cache
+* 304:     sends If-None-Match with the current ETag
+
+and the bytes of the body sent as identity, gzip and (with the brotli
+package) br.
+
+    cd backend && python benchmarks/bench_etag.py --plants 20 --years 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def timed(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-etag-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    from fastapi.testclient import TestClient
+    from database import db_writer
+    from http_cache import BROTLI_AVAILABLE
+    from result_cache import result_cache
+    from rollups import build_rollups
+    from _warehouse import populate
+    import server
+
+    with db_writer() as conn:
+        populate(conn, args.years, args.plants, 4, 4)
+        build_rollups(conn)
+        last = conn.execute("SELECT MAX(date) FROM fact_production").fetchall()[0][0]
+
+    client = TestClient(server.app)
+    params = {'role': 'CXO', 'start': str(last.replace(month=1, day=1)), 'end': str(last), 'plant': 'all'}
+    encodings = ['identity', 'gzip'] + (['br'] if BROTLI_AVAILABLE else [])
+    print(f"{args.plants} plants x {args.years} years; ms per request, body bytes per encoding")
+    print(f"{'endpoint':<16}{'full':>8}{'cached':>8}{'304':>7}" + ''.join(f"{e:>10}" for e in encodings))
+    for path in ('/api/kpis', '/api/charts', '/api/dashboard', '/api/schema'):
+        tag = client.get(path, params=params).headers['etag']
+
+        def full():
+            result_cache.clear()
+            client.get(path, params=params).raise_for_status()
+
+        def revalidate():
+            assert client.get(path, params=params, headers={'If-None-Match': tag}).status_code == 304
+
+        timings = [timed(full, args.repeat),
+                   timed(lambda: client.get(path, params=params).raise_for_status(), args.repeat),
+                   timed(revalidate, args.repeat)]
+        sizes = []
+        for encoding in encodings:
+            # stream the body undecoded to count the bytes on the wire
+            with client.stream('GET', path, params=params, headers={'Accept-Encoding': encoding}) as response:
+                sizes.append(sum(len(chunk) for chunk in response.iter_raw()))
+        print(f"{path:<16}{timings[0]:>8.1f}{timings[1]:>8.1f}{timings[2]:>7.1f}" + ''.join(f"{s:>10}" for s in sizes))
+
+if __name__ == '__main__':
+    main()
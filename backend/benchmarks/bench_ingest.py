@@ -0,0 +1,102 @@
+"""Upload processing: the old parse-four-times path vs the single streaming pass.
+
+Writes a synthetic workbook with ``--rows`` rows per sheet, then processes it
+in a fresh subprocess per mode and reports wall time and peak RSS:
+
+* legacy:    load_workbook() of the whole file, then pd.read_excel() of every
+             sheet three times (preview, stats, ingest), as /api/upload did
+* streaming: ExcelProcessor + ingest_workbook() into a temporary database,
+             also reporting the rows/s each sheet was read and staged at
+
+    cd backend && python benchmarks/bench_ingest.py --rows 50000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+def write_workbook(path, rows):
+    import openpyxl
+    from excel_processor import EXPECTED_SHEETS, TEXT_COLUMNS
+
+    workbook = openpyxl.Workbook(write_only=True)
+    rng = random.Random(7)
+    start = date(2020, 1, 1)
+    for sheet_name, columns in EXPECTED_SHEETS.items():
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(columns)
+        for i in range(rows):
+            sheet.append([start + timedelta(days=i // 5) if name == 'Date'
+                          else f"{name}-{i % 5}" if name in TEXT_COLUMNS
+                          else round(rng.uniform(0, 5000), 1)
+                          for name in columns])
+    workbook.save(path)
+
+def run_legacy(path):
+    import openpyxl
+    import pandas as pd
+    from excel_processor import EXPECTED_SHEETS
+
+    openpyxl.load_workbook(path, data_only=True)
+    for _ in range(3):
+        sheets = {name: pd.read_excel(path, sheet_name=name) for name in EXPECTED_SHEETS}
+    return sum(len(df) for df in sheets.values())
+
+def run_streaming(path):
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(tempfile.mkdtemp(prefix='bench-ingest-')) / 'star_cement.duckdb')
+    from database import init_star_schema
+    from data_ingestion import ingest_workbook
+    from excel_processor import ExcelProcessor
+
+    init_star_schema()
+    processor = ExcelProcessor(path)
+    loaded = ingest_workbook(processor)
+    processor.close()
+    print(json.dumps({sheet_name: counts['rows_per_sec'] for sheet_name, counts in loaded.items()}))
+    return sum(counts['inserted'] for counts in loaded.values())
+
+def measure(mode, path):
+    """Run one mode in a fresh interpreter so peak RSS is its own; streaming also reports rows/s per sheet"""
+    out = subprocess.run([sys.executable, __file__, '--run', mode, '--path', path],
+                         check=True, capture_output=True, text=True).stdout
+    lines = [json.loads(line) for line in out.strip().splitlines() if line.startswith('{')]
+    return lines[-1], (lines[0] if len(lines) > 1 else {})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='rows per sheet')
+    parser.add_argument('--run', choices=['legacy', 'streaming'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        t0 = time.perf_counter()
+        rows = (run_legacy if args.run == 'legacy' else run_streaming)(args.path)
+        seconds = time.perf_counter() - t0
+        print(json.dumps({'rows': rows, 'seconds': seconds,
+                          'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+        return
+
+    path = str(Path(tempfile.mkdtemp(prefix='bench-ingest-')) / 'workbook.xlsx')
+    write_workbook(path, args.rows)
+    print(f"workbook: {args.rows:,} rows x 6 sheets, {os.path.getsize(path) / 1e6:.1f} MB")
+    print(f"{'mode':<11}{'seconds':>9}{'rows/s':>10}{'peak MB':>9}")
+    for mode in ('legacy', 'streaming'):
+        result, sheets = measure(mode, path)
+        print(f"{mode:<11}{result['seconds']:>9.1f}{6 * args.rows / result['seconds']:>10,.0f}{result['peak_mb']:>9.0f}")
+    print(f"{'sheet':<17}{'rows/s':>10}  (streaming, read and staged)")
+    for sheet_name, rate in sheets.items():
+        print(f"{sheet_name:<17}{rate:>10,}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Time the pre-aggregate-then-join KPI engine against the old fan-out joins.
+
+On synthetic data with several production lines and maintenance equipment per
+plant, the old CXO / Plant Head join queries are timed against kpi_engine and
+their inflated SUM(cement_mt) is shown next to the true total. The engine's
+equivalence with a fact-level reference is checked by tests/test_kpi_engine.py.
+
+    cd backend && python benchmarks/bench_kpi_engine.py --plants 10 --lines 6 --equipment 12
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import duckdb
+
+from database import _create_star_schema
+from kpi_engine import compute_kpi_row
+from rollups import build_rollups
+from _warehouse import populate
+
+START, END = '2022-03-01', '2023-08-15'
+
+LEGACY_QUERIES = {
+    'CXO': f"""
+        SELECT SUM(p.cement_mt) as total_cement_mt, AVG(f.ebitda_rs_ton) as avg_ebitda_ton,
+               AVG(e.power_kwh_ton) as avg_power_kwh_ton, AVG(q.clinker_factor) as avg_clinker_factor,
+               AVG(s.otif_pct) as avg_otif_pct
+        FROM fact_production p
+        LEFT JOIN fact_finance f ON p.date = f.date AND p.plant_id = f.plant_id
+        LEFT JOIN fact_energy e ON p.date = e.date AND p.plant_id = e.plant_id
+        LEFT JOIN fact_quality q ON p.date = q.date AND p.plant_id = q.plant_id
+        LEFT JOIN fact_sales s ON p.date = s.date AND p.plant_id = s.plant_id
+        WHERE p.date >= '{START}' AND p.date <= '{END}'
+    """,
+    'Plant Head': f"""
+        SELECT SUM(p.cement_mt) as total_cement_mt, AVG(p.capacity_util_pct) as avg_capacity_util,
+               AVG(q.blaine) as avg_blaine, AVG(m.breakdown_hrs) as avg_breakdown_hrs
+        FROM fact_production p
+        LEFT JOIN fact_quality q ON p.date = q.date AND p.plant_id = q.plant_id
+        LEFT JOIN fact_maintenance m ON p.date = m.date AND p.plant_id = m.plant_id
+        WHERE p.date >= '{START}' AND p.date <= '{END}'
+    """
+}
+
+def timed(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--plants', type=int, default=10)
+    parser.add_argument('--lines', type=int, default=6)
+    parser.add_argument('--equipment', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    conn = duckdb.connect()
+    _create_star_schema(conn)
+    populate(conn, args.years, args.plants, args.lines, args.equipment)
+    build_rollups(conn)
+
+    print(f"{args.plants} plants x {args.years} years, {args.lines} lines and {args.equipment} equipment per plant")
+    print(f"{'role':<12}{'fan-out join ms':>17}{'engine ms':>12}{'fan-out SUM(cement)':>22}{'true SUM(cement)':>19}")
+    for role, legacy_sql in LEGACY_QUERIES.items():
+        legacy_ms = timed(lambda: conn.execute(legacy_sql).fetchall(), args.repeat)
+        engine_ms = timed(lambda: compute_kpi_row(conn, role, START, END, 'all'), args.repeat)
+        inflated = conn.execute(legacy_sql).fetchone()[0]
+        true_total = compute_kpi_row(conn, role, START, END, 'all')['total_cement_mt']
+        print(f"{role:<12}{legacy_ms:>17.2f}{engine_ms:>12.2f}{inflated:>22,.0f}{true_total:>19,.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark /api/kpis throughput: connect-per-request vs the shared connection pool.
+
+Runs against a scratch copy of the warehouse loaded from the sample workbook, so
+the checked-in star_cement.duckdb is never touched.
+
+    cd backend && python benchmarks/bench_kpis_connections.py --requests 300
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_WORKBOOK = BACKEND_DIR.parent / 'samples' / 'StarCement_DemoData.xlsx'
+
+def run(client, n_requests, params):
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        response = client.get('/api/kpis', params=params)
+        response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return n_requests / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--role', default='CXO')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-kpis-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import duckdb
+    from fastapi.testclient import TestClient
+    import database
+    import server
+
+    client = TestClient(server.app)
+    with open(SAMPLE_WORKBOOK, 'rb') as f:
+        client.post('/api/upload', files={'file': (SAMPLE_WORKBOOK.name, f)}).raise_for_status()
+
+    params = {'role': args.role, 'start': '2024-01-01', 'end': '2025-12-31', 'plant': 'all'}
+
+    # Before: open and close the database file on every request
+    @contextmanager
+    def connect_per_request():
+        conn = duckdb.connect(str(database.DB_PATH))
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    pooled_cursor = server.db_cursor
+    database.close_db()
+    server.db_cursor = connect_per_request
+    run(client, 10, params)
+    before = run(client, args.requests, params)
+
+    # After: shared handle with pooled cursors
+    server.db_cursor = pooled_cursor
+    run(client, 10, params)
+    after = run(client, args.requests, params)
+    database.close_db()
+
+    print(f"/api/kpis role={args.role}, {args.requests} sequential requests")
+    print(f"  connect-per-request: {before:8.1f} req/s")
+    print(f"  shared pool:         {after:8.1f} req/s")
+    print(f"  speedup:             {after / before:8.2f}x")
+
+if __name__ == '__main__':
+    main()
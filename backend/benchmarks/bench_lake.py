@@ -0,0 +1,142 @@
+"""Fact queries over the Parquet lake vs the single DuckDB file, cold and warm.
+
+A synthetic multi-year warehouse is written both ways: as one database file
+with clustered fact tables (what ingest writes without a lake) and as a
+Parquet lake with fact views (STAR_CEMENT_LAKE_PATH), Hive-partitioned by
+``--partition-by`` (LAKE_PARTITION_BY).
+Each query is run on a freshly opened database (cold: empty buffer pool and
+Parquet metadata cache; the OS page cache stays warm) and then repeated
+(warm). For the lake, the Parquet files read are taken from EXPLAIN ANALYZE.
+The time to copy a snapshot (the database file, or the lake's current
+versions) is reported too.
+
+    cd backend && python benchmarks/bench_lake.py --years 6 --plants 20 --partition-by year,month,plant_id
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def dir_bytes(path):
+    return sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=6)
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--lines', type=int, default=8)
+    parser.add_argument('--equipment', type=int, default=8)
+    parser.add_argument('--partition-by', default='year,month', help='LAKE_PARTITION_BY of the lake')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-lake-')
+    os.environ['STAR_CEMENT_LAKE_PATH'] = os.path.join(workdir, 'lake')
+    os.environ['LAKE_PARTITION_BY'] = args.partition_by
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    import duckdb
+    from database import CLUSTER_KEYS, DIMENSIONS, FACT_TABLES, ConnectionManager, STAR_TABLES, create_table, table_columns
+    from lake import current_version, date_window, fact_view, new_version, write_dimension, write_fact
+    from _warehouse import populate
+
+    source = os.path.join(workdir, 'source.duckdb')
+    conn = duckdb.connect(source)
+    for table in STAR_TABLES:
+        create_table(conn, table)
+    populate(conn, args.years, args.plants, args.lines, args.equipment)
+    last = conn.execute("SELECT MAX(date) FROM fact_production").fetchall()[0][0]
+    rows = conn.execute("SELECT COUNT(*) FROM fact_production").fetchall()[0][0]
+    conn.close()
+
+    single_path = os.path.join(workdir, 'single.duckdb')
+    lake_db_path = os.path.join(workdir, 'lake.duckdb')
+    single, lake_db = ConnectionManager(single_path), ConnectionManager(lake_db_path)
+    version = new_version()
+    t0 = time.perf_counter()
+    with single.writer() as conn:
+        conn.execute(f"ATTACH '{source}' AS source (READ_ONLY)")
+        for table in STAR_TABLES:
+            create_table(conn, table)
+            order = f" ORDER BY {CLUSTER_KEYS[table]}" if table in CLUSTER_KEYS else ''
+            conn.execute(f"INSERT INTO {table} SELECT * FROM source.{table}{order}")
+        conn.execute("DETACH source")
+        conn.execute("CHECKPOINT")
+    single_write = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    with lake_db.writer() as conn:
+        conn.execute(f"ATTACH '{source}' AS source (READ_ONLY)")
+        for dim in DIMENSIONS:
+            create_table(conn, dim)
+            conn.execute(f"INSERT INTO {dim} SELECT * FROM source.{dim}")
+            write_dimension(conn, dim, dim, version)
+        for table in FACT_TABLES:
+            directory = write_fact(conn, f"source.{table}", table, table_columns(table), CLUSTER_KEYS[table], version)
+            conn.execute(fact_view(table, table_columns(table), directory))
+        conn.execute("DETACH source")
+        conn.execute("CHECKPOINT")
+    lake_write = time.perf_counter() - t0
+    single.close()
+    lake_db.close()
+
+    lake_versions = [current_version(table) for table in DIMENSIONS + FACT_TABLES]
+    lake_files = sum(1 for v in lake_versions for _ in v.rglob('*.parquet'))
+    print(f"{args.plants} plants x {args.years} years ({rows:,} production rows), windows end {last}; "
+          f"lake partitioned by {args.partition_by or 'nothing'}")
+    print(f"single file: {os.path.getsize(single_path) / 1e6:.1f} MB written in {single_write:.1f} s; "
+          f"lake: {sum(dir_bytes(v) for v in lake_versions) / 1e6:.1f} MB in {lake_files} files written in {lake_write:.1f} s")
+
+    t0 = time.perf_counter()
+    shutil.copy(single_path, os.path.join(workdir, 'single-copy.duckdb'))
+    single_copy = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for v in lake_versions:
+        shutil.copytree(v, Path(workdir) / 'lake-copy' / v.parent.name / v.name)
+    lake_copy = time.perf_counter() - t0
+    print(f"snapshot copy: single file {single_copy * 1000:.0f} ms, lake current versions {lake_copy * 1000:.0f} ms")
+
+    plant = "plant_id = (SELECT plant_id FROM dim_plant WHERE plant_name = 'Plant-3')"
+    windows = {days: {'start': str(last - __import__('datetime').timedelta(days=days - 1)), 'end': str(last)} for days in (30, 365)}
+    # (name, SQL with {window} for the date condition, parameters)
+    queries = [
+        ('30 days, all plants', "SELECT SUM(cement_mt), AVG(capacity_util_pct) FROM fact_production WHERE {window}", windows[30]),
+        ('1 year, all plants', "SELECT SUM(cement_mt), AVG(capacity_util_pct) FROM fact_production WHERE {window}", windows[365]),
+        ('30 days, one plant', f"SELECT SUM(cement_mt), AVG(capacity_util_pct) FROM fact_production WHERE {{window}} AND {plant}", windows[30]),
+        ('history, one plant', f"SELECT year(date), SUM(cement_mt) FROM fact_production WHERE {plant} GROUP BY ALL", None),
+        ('history by plant', "SELECT plant_id, SUM(cement_mt), AVG(ebitda_rs_ton) FROM fact_production "
+                             "JOIN fact_finance USING (date, plant_id) GROUP BY plant_id", None),
+    ]
+    plain = "date >= $start::DATE AND date <= $end::DATE"
+
+    # DuckDB imports pandas and pyarrow the first time it converts Python
+    # parameters; keep that one-off out of the first cold timing
+    duckdb.execute("SELECT $x", {'x': 0}).fetchall()
+    print(f"{'query':<22}{'single cold':>12}{'warm':>8}{'lake cold':>11}{'warm':>8}{'files read':>12}")
+    for name, query, params in queries:
+        timings = []
+        for path, window in ((single_path, plain), (lake_db_path, date_window())):
+            sql = query.format(window=window)
+            manager = ConnectionManager(path, read_only=True)
+            with manager.cursor() as conn:
+                t0 = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                cold = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                for _ in range(args.repeat):
+                    conn.execute(sql, params).fetchall()
+                timings += [cold * 1000, (time.perf_counter() - t0) / args.repeat * 1000]
+                if path == lake_db_path:
+                    plan = conn.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params).fetchall()[0][1]
+                    files = sum(int(n) for n in re.findall(r'"Total Files Read": "(\d+)"', plan))
+            manager.close()
+        print(f"{name:<22}{timings[0]:>12.1f}{timings[1]:>8.1f}{timings[2]:>11.1f}{timings[3]:>8.1f}{files:>7}/{lake_files}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Merge a one-week upload into a growing history: time vs history length.
+
+For each ``--years`` value, builds a synthetic warehouse, writes a workbook
+holding the last four days of history (every third value changed) plus three
+new days, and times ingest_workbook(mode='merge') on it. The full rollup
+rebuild every replace-mode upload pays, before any parsing, is timed
+alongside for reference.
+
+    cd backend && python benchmarks/bench_merge.py --years 1 4 8 16 --plants 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def named_rows(mapping):
+    """A fact table's rows with their dimension ids replaced by the names, as the sheet holds them"""
+    from database import DIMENSION_IDS
+
+    select = [f"{c}_dim.{c}" if c in DIMENSION_IDS else f"f.{c}" for c in mapping['columns']]
+    joins = [f"LEFT JOIN {DIMENSION_IDS[c][0]} {c}_dim USING ({DIMENSION_IDS[c][1]})" for c in mapping['columns'] if c in DIMENSION_IDS]
+    return f"(SELECT {', '.join(select)} FROM {mapping['table']} f {' '.join(joins)})"
+
+def write_delta(conn, path, new_days=3, recent_days=4):
+    import openpyxl
+    from excel_processor import SHEET_MAPPINGS
+
+    workbook = openpyxl.Workbook(write_only=True)
+    rows = 0
+    for sheet_name, mapping in SHEET_MAPPINGS.items():
+        table, columns = named_rows(mapping), mapping['columns']
+        last = conn.execute(f"SELECT MAX(date) FROM {table}").fetchall()[0][0]
+        measure = columns[-1]
+        recent = conn.execute(f"""
+            SELECT {', '.join(c if c != measure else f"CASE WHEN row_number() OVER () % 3 = 0 THEN {c} + 1 ELSE {c} END" for c in columns)}
+            FROM {table} WHERE date > DATE '{last}' - {recent_days}
+        """).fetchall()
+        new = conn.execute(f"""
+            SELECT date + d::INTEGER, {', '.join(columns[1:])}
+            FROM {table}, range(1, {new_days + 1}) t(d) WHERE date = DATE '{last}'
+        """).fetchall()
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(mapping['headers'])
+        for row in recent + new:
+            sheet.append(list(row))
+        rows += len(recent) + len(new)
+    workbook.save(path)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--lines', type=int, default=4)
+    parser.add_argument('--equipment', type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-merge-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    from database import _create_star_schema, db_writer
+    from data_ingestion import ingest_workbook
+    from excel_processor import SHEET_MAPPINGS, ExcelProcessor
+    from rollups import build_rollups
+    from _warehouse import populate
+
+    print(f"{'years':>5}{'fact rows':>12}{'delta rows':>12}{'merge s':>10}{'rebuild s':>11}  changes (Production)")
+    for years in args.years:
+        with db_writer() as conn:
+            _create_star_schema(conn)
+            populate(conn, years, args.plants, args.lines, args.equipment)
+            # Spreadsheet cells keep 15 significant digits; random() doubles would not round-trip
+            for mapping in SHEET_MAPPINGS.values():
+                measures = [c for c, t in zip(mapping['columns'], mapping['types']) if t == 'DOUBLE']
+                conn.execute(f"UPDATE {mapping['table']} SET {', '.join(f'{c} = round({c}, 3)' for c in measures)}")
+            build_rollups(conn)
+            facts = sum(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchall()[0][0] for t in
+                        ('fact_production', 'fact_energy', 'fact_maintenance', 'fact_quality', 'fact_sales', 'fact_finance'))
+            path = str(Path(workdir) / f'delta-{years}.xlsx')
+            delta = write_delta(conn, path)
+            t0 = time.perf_counter()
+            build_rollups(conn)
+            rebuild = time.perf_counter() - t0
+
+        processor = ExcelProcessor(path)
+        t0 = time.perf_counter()
+        changes = ingest_workbook(processor, mode='merge')
+        merge = time.perf_counter() - t0
+        processor.close()
+        print(f"{years:>5}{facts:>12,}{delta:>12,}{merge:>10.2f}{rebuild:>11.2f}  {changes['Production']}")
+
+if __name__ == '__main__':
+    main()
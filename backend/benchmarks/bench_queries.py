@@ -0,0 +1,109 @@
+"""Parse/plan time per request: values pasted into the SQL vs the bound-parameter registry.
+
+Runs the statements behind /api/kpis (role KPIs, trend, plant comparison),
+/api/charts (the chart batch) and one AI insight on a synthetic warehouse,
+three ways on one cursor:
+
+* literal:  the registry SQL with the request values pasted in, a new SQL
+            string per request as the handlers built them before the registry
+* bound:    the registry SQL with the values bound as parameters
+* planned:  each literal statement PREPAREd once and EXECUTEd, so the plan is
+            reused; literal minus planned is the parse and plan time a
+            request spends
+
+    cd backend && python benchmarks/bench_queries.py --years 4 --plants 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def literal(sql, params):
+    """``sql`` with every $parameter replaced by its value as a literal"""
+    for name in sorted(params or {}, key=len, reverse=True):
+        sql = sql.replace(f"${name}", "'" + str(params[name]).replace("'", "''") + "'")
+    return sql
+
+def timed(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=4)
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-queries-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    from database import _create_star_schema, db_cursor, db_writer
+    from chart_batch import CHART_SPECS, plan_chart_batch
+    from queries import query, trend_query
+    from rollups import build_rollups, rollup_source
+    from serialization import fetch_records, fetch_row, json_records
+    import ai_insights  # registers the insight queries
+    import kpi_engine  # registers the role KPI queries
+    from _warehouse import populate
+
+    with db_writer() as conn:
+        _create_star_schema(conn)
+        populate(conn, args.years, args.plants, 4, 4)
+        build_rollups(conn)
+        last = conn.execute("SELECT MAX(date) FROM fact_production").fetchall()[0][0]
+
+    def requests(start, end, plant):
+        """request -> [(serializer, SQL, parameters)]"""
+        table, _ = rollup_source(start, end)
+        charts = [(json_records if CHART_SPECS[name]['key'] else fetch_row, *statement)
+                  for group in plan_chart_batch(list(CHART_SPECS), start, end, plant)
+                  for name, statement in zip(group['charts'], group['statements'])]
+        return {
+            '/api/kpis': [(fetch_row, *query('kpis:CXO', start=start, end=end, plant=plant)),
+                          (json_records, *query(trend_query('CXO'), start=start, end=end, plant=plant)),
+                          (json_records, *query(f"plant_comparison:{table}", start=start, end=end))],
+            '/api/charts': charts,
+            'insight': [(fetch_records, *query('insight:plant_performance', start=start, end=end, plant=plant))]
+        }
+
+    start = str(last.replace(day=1, month=1))
+    print(f"{args.plants} plants x {args.years} years; window {start}..{last}; ms per request")
+    print(f"{'request':<13}{'plant':<9}{'statements':>11}{'literal':>9}{'bound':>8}{'planned':>9}{'parse+plan':>12}")
+    with db_cursor() as conn:
+        for plant in ('all', 'Plant-3'):
+            for name, statements in requests(start, str(last), plant).items():
+                def run_literal():
+                    for serialize, sql, params in statements:
+                        serialize(conn, literal(sql, params))
+                def run_bound():
+                    for serialize, sql, params in statements:
+                        serialize(conn, sql, params)
+                prepared = []
+                for i, (_, sql, params) in enumerate(statements):
+                    conn.execute(f"PREPARE bench_{i} AS {literal(sql, params)}")
+                    prepared.append(f"EXECUTE bench_{i}")
+                def run_executed():
+                    for _, sql, params in statements:
+                        conn.execute(literal(sql, params)).fetchall()
+                def run_planned():
+                    for statement in prepared:
+                        conn.execute(statement).fetchall()
+                literal_ms, bound_ms = timed(run_literal, args.repeat), timed(run_bound, args.repeat)
+                planning_ms = timed(run_executed, args.repeat) - timed(run_planned, args.repeat)
+                print(f"{name:<13}{plant:<9}{len(statements):>11}{literal_ms:>9.2f}{bound_ms:>8.2f}"
+                      f"{literal_ms - planning_ms:>9.2f}{planning_ms:>12.2f}")
+                for i in range(len(prepared)):
+                    conn.execute(f"DEALLOCATE bench_{i}")
+
+if __name__ == '__main__':
+    main()
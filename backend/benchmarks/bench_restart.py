@@ -0,0 +1,91 @@
+"""Time to the first useful /api/kpis response after a server restart.
+
+Before schema versioning every start dropped the star schema, so a restarted
+server answered only after the workbook was uploaded and ingested again.
+Now a restart migrates the existing warehouse in place. Each start runs in a
+fresh interpreter against the same database file, and the time is measured
+from process spawn to a /api/kpis response with data:
+
+* drop + re-ingest: the old startup (reset_star_schema()), then ingest of
+                    a ``--rows``-per-sheet workbook, then the request
+* warm restart:     import of the server (running migrate()), then the request
+
+    cd backend && python benchmarks/bench_restart.py --rows 20000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+PARAMS = {'role': 'CXO', 'start': '2020-01-01', 'end': '2030-12-31', 'plant': 'all'}
+
+def run_start(mode, path, spawned):
+    """One server start in this interpreter; prints the time of each phase in ms"""
+    timings = {'interpreter': (time.time() - spawned) * 1000}
+    t0 = time.perf_counter()
+    from fastapi.testclient import TestClient
+    import server
+    timings['startup'] = (time.perf_counter() - t0) * 1000
+    if mode == 'drop':
+        from database import reset_star_schema
+        from data_ingestion import ingest_workbook
+        from excel_processor import ExcelProcessor
+
+        t0 = time.perf_counter()
+        reset_star_schema()
+        processor = ExcelProcessor(path)
+        ingest_workbook(processor)
+        processor.close()
+        timings['re-ingest'] = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    response = TestClient(server.app).get('/api/kpis', params=PARAMS)
+    response.raise_for_status()
+    if not any(response.json().values()):
+        raise RuntimeError(f"/api/kpis answered without data: {response.text}")
+    timings['first /api/kpis'] = (time.perf_counter() - t0) * 1000
+    timings['total'] = (time.time() - spawned) * 1000
+    print(json.dumps(timings))
+
+def measure(mode, path):
+    out = subprocess.run([sys.executable, __file__, '--run', mode, '--path', path, '--spawned', repr(time.time())],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads([line for line in out.strip().splitlines() if line.startswith('{')][-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000, help='rows per sheet in the workbook')
+    parser.add_argument('--repeat', type=int, default=3, help='starts measured per mode')
+    parser.add_argument('--run', choices=['drop', 'warm'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    parser.add_argument('--spawned', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_start(args.run, args.path, args.spawned)
+        return
+
+    from bench_ingest import write_workbook
+
+    workdir = tempfile.mkdtemp(prefix='bench-restart-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    path = str(Path(workdir) / 'workbook.xlsx')
+    write_workbook(path, args.rows)
+    print(f"workbook: {args.rows:,} rows x 6 sheets, {os.path.getsize(path) / 1e6:.1f} MB; median of {args.repeat} starts")
+
+    phases = ['interpreter', 'startup', 're-ingest', 'first /api/kpis', 'total']
+    print(f"{'start':<18}" + ''.join(f"{phase:>17}" for phase in phases))
+    for mode, label in (('drop', 'drop + re-ingest'), ('warm', 'warm restart')):
+        runs = [measure(mode, path) for _ in range(args.repeat)]
+        median = {phase: sorted(r.get(phase, 0) for r in runs)[len(runs) // 2] for phase in phases}
+        print(f"{label:<18}" + ''.join(f"{median[phase]:>17,.0f}" for phase in phases))
+
+if __name__ == '__main__':
+    main()
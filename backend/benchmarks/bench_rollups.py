@@ -0,0 +1,74 @@
+"""Compare chart aggregates over raw fact rows vs the plant rollup tables.
+
+Builds a synthetic multi-year warehouse directly in DuckDB (no workbook needed),
+then times the monthly production/finance and plant-level queries against the
+fact tables and against rollup_plant_daily / rollup_plant_monthly.
+
+    cd backend && python benchmarks/bench_rollups.py --years 3 --plants 20 --lines 8
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import duckdb
+
+from database import _create_star_schema
+from rollups import DAILY_ROLLUP, MONTHLY_ROLLUP, avg_expr, build_rollups, sum_expr
+from _warehouse import populate
+
+def timed(conn, sql, repeat):
+    conn.execute(sql).fetchall()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql).fetchall()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--lines', type=int, default=8, help='production lines per plant')
+    parser.add_argument('--equipment', type=int, default=8, help='maintenance equipment per plant')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    conn = duckdb.connect()
+    _create_star_schema(conn)
+    populate(conn, args.years, args.plants, args.lines, args.equipment)
+    t0 = time.perf_counter()
+    build_rollups(conn)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    start, end = '2022-01-01', '2024-12-31'
+    queries = {
+        'monthly_production': (
+            f"SELECT strftime(date, '%Y-%m') m, SUM(cement_mt), SUM(clinker_mt), AVG(capacity_util_pct) FROM fact_production WHERE date BETWEEN '{start}' AND '{end}' GROUP BY m",
+            f"SELECT month, {sum_expr('cement_mt')}, {sum_expr('clinker_mt')}, {avg_expr('capacity_util_pct')} FROM {MONTHLY_ROLLUP} WHERE production_rows > 0 AND month_start BETWEEN '{start}' AND '{end}' GROUP BY month"),
+        'monthly_finance': (
+            f"SELECT strftime(date, '%Y-%m') m, AVG(cost_rs_ton), AVG(ebitda_rs_ton), AVG(margin_pct) FROM fact_finance WHERE date BETWEEN '{start}' AND '{end}' GROUP BY m",
+            f"SELECT month, {avg_expr('cost_rs_ton')}, {avg_expr('ebitda_rs_ton')}, {avg_expr('margin_pct')} FROM {MONTHLY_ROLLUP} WHERE finance_rows > 0 AND month_start BETWEEN '{start}' AND '{end}' GROUP BY month"),
+        'energy_by_plant': (
+            f"SELECT plant_id, AVG(power_kwh_ton), AVG(heat_kcal_kg), AVG(afr_pct) FROM fact_energy WHERE date BETWEEN '{start}' AND '{end}' GROUP BY plant_id",
+            f"SELECT plant_id, {avg_expr('power_kwh_ton')}, {avg_expr('heat_kcal_kg')}, {avg_expr('afr_pct')} FROM {MONTHLY_ROLLUP} WHERE energy_rows > 0 AND month_start BETWEEN '{start}' AND '{end}' GROUP BY plant_id"),
+        'daily_trend': (
+            f"SELECT date, AVG(ebitda_rs_ton), AVG(margin_pct) FROM fact_finance WHERE date BETWEEN '{start}' AND '{end}' GROUP BY date",
+            f"SELECT date, {avg_expr('ebitda_rs_ton')}, {avg_expr('margin_pct')} FROM {DAILY_ROLLUP} WHERE finance_rows > 0 AND date BETWEEN '{start}' AND '{end}' GROUP BY date"),
+    }
+
+    fact_rows = conn.execute("SELECT COUNT(*) FROM fact_production").fetchone()[0]
+    daily_rows = conn.execute(f"SELECT COUNT(*) FROM {DAILY_ROLLUP}").fetchone()[0]
+    monthly_rows = conn.execute(f"SELECT COUNT(*) FROM {MONTHLY_ROLLUP}").fetchone()[0]
+    print(f"fact_production rows: {fact_rows:,}  daily rollup: {daily_rows:,}  monthly rollup: {monthly_rows:,}")
+    print(f"rollup build: {build_ms:.0f} ms")
+    print(f"{'query':<22}{'raw ms':>10}{'rollup ms':>12}{'speedup':>10}")
+    for name, (raw_sql, rollup_sql) in queries.items():
+        raw_ms = timed(conn, raw_sql, args.repeat)
+        rollup_ms = timed(conn, rollup_sql, args.repeat)
+        print(f"{name:<22}{raw_ms:>10.2f}{rollup_ms:>12.2f}{raw_ms / rollup_ms:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Serialize a long trend series: pandas records vs DuckDB JSON fragments vs Arrow IPC.
+
+Builds a synthetic warehouse long enough for the CXO trend series to have
+``--years`` x 365 daily points, then times turning that query into a response
+body the three ways:
+
+* pandas: fetchdf(), date to str, fillna(0), to_dict('records'), then FastAPI's
+  jsonable_encoder and JSONResponse (the old path)
+* json:   json_records() fragment rendered by FragmentJSONResponse
+* arrow:  arrow_ipc() stream
+
+    cd backend && python benchmarks/bench_serialization.py --years 30
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import duckdb
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from database import _create_star_schema
+from rollups import DAILY_ROLLUP, avg_expr, build_rollups
+from serialization import FragmentJSONResponse, arrow_ipc, json_records
+from _warehouse import populate
+
+def timed(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=30)
+    parser.add_argument('--plants', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    conn = duckdb.connect()
+    _create_star_schema(conn)
+    populate(conn, args.years, args.plants, 1, 1)
+    # Some empty days, so the NULL fill is exercised
+    conn.execute("UPDATE fact_finance SET margin_pct = NULL WHERE day(date) = 1")
+    build_rollups(conn)
+
+    sql = f"""
+        SELECT date, {avg_expr('ebitda_rs_ton')} as ebitda, {avg_expr('margin_pct')} as margin
+        FROM {DAILY_ROLLUP}
+        WHERE finance_rows > 0
+        GROUP BY date ORDER BY date
+    """
+
+    def pandas_body():
+        trends = conn.execute(sql).fetchdf()
+        trends['date'] = trends['date'].astype(str)
+        trends = trends.fillna(0)
+        return JSONResponse(jsonable_encoder({'series': {'trends': trends.to_dict('records')}})).body
+
+    def json_body():
+        return FragmentJSONResponse({'series': {'trends': json_records(conn, sql)}}).body
+
+    def arrow_body():
+        return arrow_ipc(conn, sql)
+
+    pandas_out, json_out = pandas_body(), json_body()
+    if json.loads(pandas_out) != json.loads(json_out):
+        print("MISMATCH: fragment JSON differs from the pandas path")
+        sys.exit(1)
+    points = len(json.loads(json_out)['series']['trends'])
+    print(f"trend series: {points:,} points, bodies identical after decoding")
+    print(f"{'path':<8}{'ms':>10}{'bytes':>12}")
+    baseline = None
+    for name, fn in (('pandas', pandas_body), ('json', json_body), ('arrow', arrow_body)):
+        ms = timed(fn, args.repeat)
+        baseline = baseline or ms
+        print(f"{name:<8}{ms:>10.2f}{len(fn()):>12,}   {baseline / ms:.1f}x")
+
+if __name__ == '__main__':
+    main()
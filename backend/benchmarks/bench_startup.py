@@ -0,0 +1,102 @@
+"""API startup: import time of the server, with a regression threshold.
+
+Each start runs in a fresh interpreter under ``python -X importtime``
+against an empty warehouse, migrated by an untimed start first, and reports
+
+* import:          ``import server``
+* first /api/kpis: the first request after the import, including the
+                   imports (pandas) DuckDB makes on the first statement
+                   with bound parameters
+* the modules taking the most cumulative import time
+
+and which of the dependencies loaded on first use (LAZY_MODULES: the LLM
+client, the Excel stack and bcrypt) the import pulled in. It exits non-zero
+when the best import time exceeds ``--max-import-ms`` or a lazy dependency
+is imported at startup, so it can run as a startup check:
+
+    cd backend && python benchmarks/bench_startup.py --max-import-ms 1000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+LAZY_MODULES = ['emergentintegrations', 'litellm', 'openpyxl', 'pandas', 'bcrypt']
+
+def run_start():
+    """One server start in this interpreter; prints its timings and the lazy modules loaded"""
+    t0 = time.perf_counter()
+    import server
+    timings = {'import': (time.perf_counter() - t0) * 1000}
+    loaded = [name for name in LAZY_MODULES if name in sys.modules]
+    from fastapi.testclient import TestClient
+    client = TestClient(server.app)
+    t0 = time.perf_counter()
+    client.get('/api/kpis').raise_for_status()
+    timings['first /api/kpis'] = (time.perf_counter() - t0) * 1000
+    print(json.dumps({'timings': timings, 'loaded': loaded}))
+
+def import_profile(stderr: str):
+    """(module, cumulative ms) of the modules ``import server`` imported directly, from ``-X importtime`` output"""
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # a module's line follows those of its imports, indented two spaces a level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == 'server':
+                return [('server', int(cumulative) / 1000)] + children
+            children = []
+        elif depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+    return []
+
+def measure(workdir):
+    env = dict(os.environ, STAR_CEMENT_DB_PATH=str(Path(workdir) / 'star_cement.duckdb'))
+    process = subprocess.run([sys.executable, '-X', 'importtime', __file__, '--run'], cwd=BACKEND_DIR, env=env,
+                             check=True, capture_output=True, text=True)
+    result = json.loads([line for line in process.stdout.strip().splitlines() if line.startswith('{')][-1])
+    return result, import_profile(process.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='starts measured')
+    parser.add_argument('--top', type=int, default=10, help='modules listed by import time')
+    parser.add_argument('--max-import-ms', type=float, default=1000, help='fail above this import time')
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        sys.path.insert(0, str(BACKEND_DIR))
+        run_start()
+        return
+
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    measure(workdir)
+    starts = [measure(workdir) for _ in range(args.repeat)]
+    (best, profile) = min(starts, key=lambda start: start[0]['timings']['import'])
+    for name in ('import', 'first /api/kpis'):
+        values = sorted(start[0]['timings'][name] for start in starts)
+        print(f"{name:<18}best {values[0]:>7.1f} ms   median {values[len(values) // 2]:>7.1f} ms")
+    print("\nslowest imports of the best start (cumulative ms):")
+    for module, ms in sorted(profile, key=lambda entry: -entry[1])[1:args.top + 1]:
+        print(f"  {module:<32}{ms:>8.1f}")
+
+    failures = []
+    if best['timings']['import'] > args.max_import_ms:
+        failures.append(f"import took {best['timings']['import']:.0f} ms (limit {args.max_import_ms:.0f} ms)")
+    if best['loaded']:
+        failures.append(f"imported at startup: {', '.join(best['loaded'])}")
+    print('\n' + ('FAIL: ' + '; '.join(failures) if failures else 'OK'))
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Benchmark suite over upload and query paths, with results saved as JSON to compare commits.
+
+Writes a deterministic workbook (_workbook.py) of ``--plants`` plants x
+``--days`` days into a temporary directory, then times
+
+* parse:              ExcelProcessor reading every sheet (iter_chunks)
+* ingest:             ingest_workbook() of the workbook, replacing the warehouse
+* kpis:<role>:        the /api/kpis computation for each role, whole window
+* charts:             the /api/charts computation
+* insight:<template>: ai_insights.execute_sql_analysis for each SQL_TEMPLATES entry
+
+calling the functions directly (no result cache). Each benchmark runs once
+to warm up and then ``--repeat`` times (``--ingest-repeat`` for parse and
+ingest). The timings, the commit and the parameters are written to
+``--output`` (benchmarks/results/<commit>.json by default). With
+``--compare`` another run's JSON is the baseline: medians more than
+``--threshold`` times the baseline's are reported as regressions and the
+suite exits non-zero.
+
+    cd backend && python benchmarks/bench_suite.py --plants 10 --days 730
+    cd backend && python benchmarks/bench_suite.py --compare benchmarks/results/<base>.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+def timed(fn, repeat):
+    """Timings in ms of ``repeat`` calls after one warm-up call"""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3)
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=BACKEND_DIR,
+                              check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run_suite(args, workdir):
+    """Name -> timings of every benchmark, and the workbook's rows per sheet"""
+    from _workbook import START, write_workbook
+
+    path = str(Path(workdir) / 'workbook.xlsx')
+    rows = write_workbook(path, args.plants, args.days, args.lines, args.equipment, args.seed)
+
+    from data_ingestion import ingest_workbook
+    from excel_processor import ExcelProcessor
+    from kpi_engine import KPI_SPECS
+    import ai_insights
+    import server
+
+    def parse():
+        processor = ExcelProcessor(path)
+        for sheet_name in processor.sheets():
+            for _ in processor.iter_chunks(sheet_name):
+                pass
+        processor.close()
+
+    def ingest():
+        processor = ExcelProcessor(path)
+        ingest_workbook(processor)
+        processor.close()
+
+    start, end = str(START), str(START + timedelta(days=args.days - 1))
+    filters = {'start': start, 'end': end, 'plant': 'all'}
+    results = {
+        'parse': timed(parse, args.ingest_repeat),
+        'ingest': timed(ingest, args.ingest_repeat)
+    }
+    for role in KPI_SPECS:
+        if role != 'default':
+            results[f"kpis:{role}"] = timed(lambda: server._compute_kpis(role, start, end, 'all'), args.repeat)
+    results['charts'] = timed(lambda: server._compute_chart_data('CXO', start, end, 'all'), args.repeat)
+    for template in ai_insights.SQL_TEMPLATES:
+        results[f"insight:{template}"] = timed(lambda: ai_insights.execute_sql_analysis(template, filters), args.repeat)
+    return results, rows
+
+def compare(results, baseline, threshold):
+    """Print each benchmark's median against the baseline's; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<32}{'baseline':>10}{'now':>10}{'ratio':>8}")
+    for name, timing in results.items():
+        before = baseline['benchmarks'].get(name)
+        if not before:
+            print(f"{name:<32}{'-':>10}{timing['median_ms']:>10.1f}")
+            continue
+        ratio = timing['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        flag = '  REGRESSION' if ratio > threshold else ''
+        print(f"{name:<32}{before['median_ms']:>10.1f}{timing['median_ms']:>10.1f}{ratio:>7.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plants', type=int, default=5)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--lines', type=int, default=2, help='production lines per plant')
+    parser.add_argument('--equipment', type=int, default=3, help='maintained equipment per plant')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs of each query benchmark')
+    parser.add_argument('--ingest-repeat', type=int, default=3, help='timed runs of parse and ingest')
+    parser.add_argument('--output', help='results JSON (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='results JSON of a baseline run')
+    parser.add_argument('--threshold', type=float, default=1.2, help='median / baseline median counted as a regression')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-suite-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    import duckdb
+
+    commit = git_commit()
+    results, rows = run_suite(args, workdir)
+    report = {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'duckdb': duckdb.__version__, 'cpus': os.cpu_count()},
+        'params': {name: getattr(args, name) for name in ('plants', 'days', 'lines', 'equipment', 'seed', 'repeat', 'ingest_repeat')},
+        'rows': rows,
+        'benchmarks': results
+    }
+
+    print(f"{args.plants} plants x {args.days} days ({sum(rows.values())} rows) at {commit}; ms")
+    print(f"{'benchmark':<32}{'min':>10}{'median':>10}{'mean':>10}")
+    for name, timing in results.items():
+        print(f"{name:<32}{timing['min_ms']:>10.1f}{timing['median_ms']:>10.1f}{timing['mean_ms']:>10.1f}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline['params'] != report['params']:
+            print(f"warning: baseline parameters differ: {baseline['params']}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold}x: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Fact tables keyed on dimension ids vs the old plant/line/equipment/region names.
+
+Builds a synthetic warehouse with integer ids (the schema ingest now
+writes), then a copy with the names stored in the fact tables as before, and
+reports per fact table the checkpointed storage of each, whole and for the
+dimension columns alone (rows in workbook order, not sorted by plant). Then
+times the queries that join and group on the keys: the five-table fan-out
+join on (date, plant), a per-plant group-by (names looked up after
+aggregating on ids), a single-plant filter and the daily rollup build.
+
+    cd backend && python benchmarks/bench_surrogate_keys.py --years 4 --plants 20 --lines 8 --equipment 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import duckdb
+
+from database import DIMENSION_IDS, _create_star_schema
+from excel_processor import SHEET_MAPPINGS
+from rollups import _daily_select
+from _warehouse import populate
+
+START, END = '2022-03-01', '2024-08-15'
+
+def named_select(mapping, catalog):
+    """A fact table of ``catalog`` with its ids replaced by the names"""
+    select = [f"{c}_dim.{c}" if c in DIMENSION_IDS else f"f.{c}" for c in mapping['columns']]
+    joins = [f"LEFT JOIN {catalog}.{DIMENSION_IDS[c][0]} {c}_dim USING ({DIMENSION_IDS[c][1]})"
+             for c in mapping['columns'] if c in DIMENSION_IDS]
+    return f"SELECT {', '.join(select)} FROM {catalog}.{mapping['table']} f {' '.join(joins)}"
+
+def stored_bytes(path, source_path, table, columns='*'):
+    """Checkpointed size of ``columns`` of ``table`` copied alone into a fresh database file,
+    in workbook order: day by day with the plants of a day interleaved"""
+    conn = duckdb.connect(path)
+    conn.execute(f"ATTACH '{source_path}' AS src (READ_ONLY)")
+    conn.execute(f"CREATE TABLE {table} AS SELECT {columns} FROM src.{table} ORDER BY date, hash(rowid)")
+    conn.execute("DETACH src")
+    conn.execute("CHECKPOINT")
+    used = conn.execute("SELECT used_blocks * block_size FROM pragma_database_size()").fetchall()[0][0]
+    conn.close()
+    return used
+
+def queries(keyed_on_ids):
+    """(name, SQL) of the key-heavy queries for either schema"""
+    key = 'plant_id' if keyed_on_ids else 'plant_name'
+    joins = ' '.join(f"LEFT JOIN {t} {a} ON p.date = {a}.date AND p.{key} = {a}.{key}"
+                     for t, a in (('fact_finance', 'f'), ('fact_energy', 'e'), ('fact_quality', 'q'), ('fact_sales', 's')))
+    by_plant = (f"SELECT plant_name, g.* EXCLUDE (plant_id) FROM (SELECT plant_id, SUM(cement_mt) cement, AVG(capacity_util_pct) capacity "
+                f"FROM fact_production WHERE date BETWEEN '{START}' AND '{END}' GROUP BY plant_id) g JOIN dim_plant USING (plant_id)"
+                if keyed_on_ids else
+                f"SELECT plant_name, SUM(cement_mt) cement, AVG(capacity_util_pct) capacity "
+                f"FROM fact_production WHERE date BETWEEN '{START}' AND '{END}' GROUP BY plant_name")
+    one_plant = ("plant_id = (SELECT plant_id FROM dim_plant WHERE plant_name = 'Plant-3')"
+                 if keyed_on_ids else "plant_name = 'Plant-3'")
+    daily = _daily_select() if keyed_on_ids else _daily_select().replace('plant_id', 'plant_name')
+    return [
+        ('fan-out join', f"SELECT SUM(p.cement_mt), AVG(f.ebitda_rs_ton), AVG(e.power_kwh_ton), AVG(q.clinker_factor), AVG(s.otif_pct) "
+                         f"FROM fact_production p {joins} WHERE p.date BETWEEN '{START}' AND '{END}'"),
+        ('group by plant', by_plant),
+        ('one plant', f"SELECT SUM(cement_mt), AVG(capacity_util_pct) FROM fact_production WHERE {one_plant}"),
+        ('daily rollup', f"SELECT COUNT(*) FROM ({daily})")
+    ]
+
+def timed(conn, sql, repeat):
+    conn.execute(sql).fetchall()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql).fetchall()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=4)
+    parser.add_argument('--plants', type=int, default=20)
+    parser.add_argument('--lines', type=int, default=8)
+    parser.add_argument('--equipment', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-surrogate-keys-')
+    ids_path = os.path.join(workdir, 'ids.duckdb')
+    conn = duckdb.connect(ids_path)
+    _create_star_schema(conn)
+    populate(conn, args.years, args.plants, args.lines, args.equipment)
+    conn.close()
+
+    # The same rows with the names in the fact tables, next to the same dimensions
+    names_path = os.path.join(workdir, 'names.duckdb')
+    conn = duckdb.connect(names_path)
+    conn.execute(f"ATTACH '{ids_path}' AS ids (READ_ONLY)")
+    for mapping in SHEET_MAPPINGS.values():
+        conn.execute(f"CREATE TABLE {mapping['table']} AS {named_select(mapping, 'ids')}")
+    conn.execute("CREATE TABLE dim_plant AS SELECT * FROM ids.dim_plant")
+    conn.close()
+    names = duckdb.connect(names_path, read_only=True)
+
+    print(f"{args.plants} plants x {args.years} years, {args.lines} lines and {args.equipment} equipment per plant")
+    for label, key_columns_only in (('whole table', False), ('dimension columns only', True)):
+        print(f"{label + ' (MB)':<26}{'rows':>10}{'names':>8}{'ids':>8}{'saved':>8}")
+        totals = [0, 0]
+        for mapping in SHEET_MAPPINGS.values():
+            table = mapping['table']
+            rows = names.execute(f"SELECT COUNT(*) FROM {table}").fetchall()[0][0]
+            keys = [c for c in mapping['columns'] if c in DIMENSION_IDS]
+            sizes = [stored_bytes(os.path.join(workdir, f'{variant}-{key_columns_only}-{table}.duckdb'), source_path, table,
+                                  ', '.join(keys if variant == 'names' else [DIMENSION_IDS[c][1] for c in keys])
+                                  if key_columns_only else '*')
+                     for variant, source_path in (('names', names_path), ('ids', ids_path))]
+            totals = [t + s for t, s in zip(totals, sizes)]
+            print(f"  {table:<24}{rows:>10,}{sizes[0] / 1e6:>8.2f}{sizes[1] / 1e6:>8.2f}{1 - sizes[1] / sizes[0]:>8.0%}")
+        print(f"  {'total':<24}{'':>10}{totals[0] / 1e6:>8.2f}{totals[1] / 1e6:>8.2f}{1 - totals[1] / totals[0]:>8.0%}")
+
+    ids = duckdb.connect(ids_path, read_only=True)
+    print(f"{'query':<18}{'names ms':>10}{'ids ms':>9}{'speedup':>9}")
+    for (name, names_sql), (_, ids_sql) in zip(queries(False), queries(True)):
+        names_ms = timed(names, names_sql, args.repeat)
+        ids_ms = timed(ids, ids_sql, args.repeat)
+        print(f"{name:<18}{names_ms:>10.2f}{ids_ms:>9.2f}{names_ms / ids_ms:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
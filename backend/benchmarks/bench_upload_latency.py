@@ -0,0 +1,115 @@
+"""/api/kpis latency and consistency while a large upload is ingested.
+
+Starts from a synthetic warehouse, then ingests a ``--rows``-per-sheet
+workbook in replace mode while ``--clients`` threads run the CXO KPI query
+(the work behind /api/kpis, result cache bypassed) back to back. Every reader
+iteration also probes fact and rollup row counts in one statement: with the
+shadow-table swap each probe must match either the warehouse before the
+upload or after it, never a mix. Latency is reported for ``--idle-seconds``
+before the upload and for the upload itself.
+
+    cd backend && python benchmarks/bench_upload_latency.py --rows 50000 --clients 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = """
+    SELECT (SELECT COUNT(*) FROM fact_production), (SELECT COUNT(*) FROM fact_finance),
+           (SELECT SUM(production_rows) FROM rollup_plant_daily), (SELECT COUNT(*) FROM dim_plant)
+"""
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='rows per sheet in the uploaded workbook')
+    parser.add_argument('--years', type=int, default=2, help='history before the upload')
+    parser.add_argument('--plants', type=int, default=10)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--idle-seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-upload-latency-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    from database import _create_star_schema, db_cursor, db_writer
+    from data_ingestion import ingest_workbook
+    from excel_processor import ExcelProcessor
+    from kpi_engine import compute_kpi_row
+    from rollups import build_rollups
+    from _warehouse import populate
+    from bench_ingest import write_workbook
+
+    path = str(Path(workdir) / 'upload.xlsx')
+    write_workbook(path, args.rows)
+    with db_writer() as conn:
+        _create_star_schema(conn)
+        populate(conn, args.years, args.plants, 1, 1)
+        build_rollups(conn)
+        before = conn.execute(PROBE).fetchall()[0]
+
+    stop = threading.Event()
+    phase = {'name': 'idle'}
+    latencies = {'idle': [], 'upload': [], 'after': []}
+    states = {}
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            current = phase['name']
+            try:
+                t0 = time.perf_counter()
+                with db_cursor() as conn:
+                    compute_kpi_row(conn, 'CXO', '2022-01-01', '2030-12-31', 'all')
+                latencies[current].append(time.perf_counter() - t0)
+                with db_cursor() as conn:
+                    state = conn.execute(PROBE).fetchall()[0]
+                states[state] = states.get(state, 0) + 1
+            except Exception as e:
+                errors.append(repr(e))
+
+    threads = [threading.Thread(target=reader) for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(args.idle_seconds)
+
+    processor = ExcelProcessor(path)
+    t0 = time.perf_counter()
+    phase['name'] = 'upload'
+    ingest_workbook(processor)
+    upload_seconds = time.perf_counter() - t0
+    phase['name'] = 'after'
+    stop.set()
+    processor.close()
+    with db_cursor() as conn:
+        after = conn.execute(PROBE).fetchall()[0]
+    for thread in threads:
+        thread.join()
+
+    print(f"upload: {args.rows:,} rows x 6 sheets in {upload_seconds:.1f} s, {args.clients} KPI readers")
+    print(f"{'phase':<8}{'queries':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for name in ('idle', 'upload'):
+        values = [v * 1000 for v in latencies[name]]
+        print(f"{name:<8}{len(values):>9}{statistics.median(values):>9.1f}{percentile(values, 95):>9.1f}{max(values):>9.1f}")
+    mixed = {state: n for state, n in states.items() if state not in (before, after)}
+    print(f"probes: {states.get(before, 0)} saw the old warehouse, {states.get(after, 0)} the new one, "
+          f"{sum(mixed.values())} a mix; {len(errors)} reader errors")
+    if mixed or errors:
+        print(f"MIXED STATES {mixed} ERRORS {errors[:3]}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
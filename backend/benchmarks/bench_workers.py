@@ -0,0 +1,171 @@
+"""/api/kpis throughput of read-only snapshot workers, and snapshot swaps under load.
+
+Builds a synthetic warehouse of ``--years`` x ``--plants`` and starts a
+writer (uvicorn, read-write, publishing snapshots to a temporary
+STAR_CEMENT_SNAPSHOT_DIR). Then, for each count in ``--workers``, it starts a
+reader server with that many uvicorn workers (DUCKDB_READ_ONLY=true), and
+``--clients`` threads request /api/kpis for ``--seconds``, each request a
+different date window so the result cache does not answer it. Halfway
+through every run a merge upload (a new workbook each run) to the writer
+publishes a new snapshot, which the readers switch to while requests are
+running. Reported per run: requests/s, p50 and p99 latency, failed
+requests, and the data versions served (taken from the ETags) in order,
+the last of which must be the writer's.
+
+With one worker per core, throughput should grow with the worker count up to
+the cores available; one uvicorn worker was the limit before snapshots.
+
+    cd backend && python benchmarks/bench_workers.py --workers 1 2 4 --clients 16
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+WRITER_PORT = 8201
+READER_PORT = 8202
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+def start_server(port, workers, env, log):
+    process = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'server:app', '--port', str(port),
+                                '--workers', str(workers), '--log-level', 'warning'],
+                               cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    import httpx
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/insights/prompts", timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server on port {port} did not start; see {log.name}")
+
+def stop_server(process):
+    process.terminate()
+    process.wait(timeout=30)
+
+def upload(workbook, snapshot_dir):
+    """Merge ``workbook`` into the writer's warehouse, wait for the ingestion job and return the data version published"""
+    import httpx
+    base = f"http://127.0.0.1:{WRITER_PORT}/api"
+    with open(workbook, 'rb') as f:
+        response = httpx.post(f"{base}/upload", params={'mode': 'merge'}, files={'file': ('upload.xlsx', f)}, timeout=60)
+    response.raise_for_status()
+    job_id = response.json()['job_id']
+    while True:
+        job = httpx.get(f"{base}/jobs/{job_id}", timeout=10).json()['job']
+        if job['status'] == 'failed':
+            raise RuntimeError(job['error'])
+        if job['status'] == 'succeeded':
+            return json.loads((snapshot_dir / 'CURRENT').read_text())['data_version']
+        time.sleep(0.1)
+
+def load(clients, seconds, days, workbook, snapshot_dir):
+    """(latencies, failures, data versions served in order, the data version published by the upload)"""
+    import httpx
+
+    latencies, failures, versions = [], [], []
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def client(idx):
+        rng = random.Random(idx)
+        with httpx.Client(base_url=f"http://127.0.0.1:{READER_PORT}", timeout=30) as http:
+            while not stop.is_set():
+                start = date(2022, 1, 1) + timedelta(days=rng.randrange(days - 31))
+                params = {'role': 'CXO', 'start': str(start), 'end': str(start + timedelta(days=rng.randrange(30, days))),
+                          'plant': 'all'}
+                t0 = time.perf_counter()
+                try:
+                    response = http.get('/api/kpis', params=params)
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
+                    with lock:
+                        failures.append(str(e))
+                    continue
+                version = int(response.headers['etag'].strip('"').split('-')[0])
+                with lock:
+                    latencies.append(time.perf_counter() - t0)
+                    if version not in versions:
+                        versions.append(version)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds / 2)
+    started = time.perf_counter()
+    written = upload(workbook, snapshot_dir)
+    time.sleep(max(0.0, seconds / 2 - (time.perf_counter() - started)))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, failures, versions, written
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='uvicorn worker counts to run')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent client threads')
+    parser.add_argument('--seconds', type=float, default=20, help='duration of each run')
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--plants', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='bench-workers-'))
+    db_path = workdir / 'star_cement.duckdb'
+    os.environ['STAR_CEMENT_DB_PATH'] = str(db_path)
+    sys.path.insert(0, str(BACKEND_DIR))
+    sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+    from database import _create_star_schema, close_db, db_writer
+    from rollups import build_rollups
+    from _warehouse import populate
+    from _workbook import write_workbook
+
+    with db_writer() as conn:
+        _create_star_schema(conn)
+        populate(conn, args.years, args.plants, 1, 1)
+        build_rollups(conn)
+    close_db()
+
+    snapshot_dir = workdir / 'snapshots'
+    env = {**os.environ, 'STAR_CEMENT_SNAPSHOT_DIR': str(snapshot_dir), 'SNAPSHOT_POLL_SECONDS': '0.5',
+           'PYTHONPATH': os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get('PYTHONPATH')]))}
+    log = open(workdir / 'servers.log', 'w')
+    writer = start_server(WRITER_PORT, 1, env, log)
+    print(f"{args.years} years x {args.plants} plants, {args.clients} clients, {args.seconds:.0f}s per run, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'failed':>8}  data versions served")
+    try:
+        for run, workers in enumerate(args.workers):
+            workbook = str(workdir / f"upload-{run}.xlsx")
+            write_workbook(workbook, plants=args.plants, days=30, lines=1, equipment=1, seed=run)
+            reader = start_server(READER_PORT, workers, {**env, 'DUCKDB_READ_ONLY': 'true'}, log)
+            try:
+                latencies, failures, versions, written = load(args.clients, args.seconds, 365 * args.years, workbook,
+                                                            snapshot_dir)
+            finally:
+                stop_server(reader)
+            current = 'current' if versions and versions[-1] == written else f"STALE, published {written}"
+            print(f"{workers:>8}{len(latencies) / args.seconds:>10.1f}{statistics.median(latencies) * 1000:>10.1f}"
+                  f"{percentile(latencies, 99) * 1000:>10.1f}{len(failures):>8}  {' -> '.join(map(str, versions))} ({current})")
+            for failure in failures[:3]:
+                print(f"  {failure}")
+    finally:
+        stop_server(writer)
+        log.close()
+
+if __name__ == '__main__':
+    main()
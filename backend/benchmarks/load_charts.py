@@ -0,0 +1,110 @@
+"""Load test /api/charts with many concurrent callers and report p50/p99 latency.
+
+Each caller issues its requests back to back through an in-process ASGI
+transport, so the numbers reflect event loop and query pool behaviour rather
+than network overhead. ``--inline`` runs the chart queries directly on the
+event loop (the old behaviour) for comparison.
+
+    cd backend && python benchmarks/load_charts.py --callers 50 --requests 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_WORKBOOK = BACKEND_DIR.parent / 'samples' / 'StarCement_DemoData.xlsx'
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+async def load(app, callers, requests_per_caller):
+    import httpx
+
+    latencies = []
+    probe_latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        started = time.perf_counter()
+        finished = asyncio.Event()
+
+        async def caller(idx):
+            # Closed loop: each request is "issued" when the caller's previous
+            # one completed (or at t=0), so time spent waiting behind a blocked
+            # event loop counts towards latency.
+            issued = started
+            for _ in range(requests_per_caller):
+                params = {'role': 'CXO', 'start': '2024-01-01', 'end': '2025-12-31', 'plant': 'all'}
+                response = await client.get('/api/charts', params=params)
+                done = time.perf_counter()
+                latencies.append(done - issued)
+                issued = done
+                response.raise_for_status()
+
+        async def probe():
+            # A cheap endpoint that should stay fast while charts are running.
+            # Latency is measured from when the probe was due to fire, so a
+            # blocked event loop delaying the wake-up is counted too.
+            due = time.perf_counter()
+            while not finished.is_set():
+                await client.get('/api/insights/prompts')
+                probe_latencies.append(time.perf_counter() - due)
+                due = time.perf_counter() + 0.05
+                await asyncio.sleep(0.05)
+
+        probe_task = asyncio.create_task(probe())
+        await asyncio.gather(*(caller(i) for i in range(callers)))
+        wall = time.perf_counter() - started
+        finished.set()
+        await probe_task
+    return latencies, probe_latencies, wall
+
+def report(label, latencies, probe_latencies, wall):
+    print(f"{label}")
+    print(f"  requests:   {len(latencies)} in {wall:.2f}s ({len(latencies) / wall:.1f} req/s)")
+    print(f"  p50:        {statistics.median(latencies) * 1000:8.1f} ms")
+    print(f"  p99:        {percentile(latencies, 99) * 1000:8.1f} ms")
+    if probe_latencies:
+        print(f"  /api/insights/prompts under load: {len(probe_latencies)} probes, "
+              f"p99 {percentile(probe_latencies, 99) * 1000:.1f} ms, max {max(probe_latencies) * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--callers', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=4, help='requests per caller')
+    parser.add_argument('--inline', action='store_true', help='also measure queries run on the event loop')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-charts-')
+    os.environ['STAR_CEMENT_DB_PATH'] = str(Path(workdir) / 'star_cement.duckdb')
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from fastapi.testclient import TestClient
+    import server
+    import query_executor
+
+    with open(SAMPLE_WORKBOOK, 'rb') as f:
+        TestClient(server.app).post('/api/upload', files={'file': (SAMPLE_WORKBOOK.name, f)}).raise_for_status()
+
+    print(f"{args.callers} concurrent callers x {args.requests} requests, QUERY_CONCURRENCY={query_executor.QUERY_CONCURRENCY}")
+    if args.inline:
+        pooled = server.run_query
+
+        async def run_inline(fn, *a, **kw):
+            return fn(*a, **kw)
+
+        server.run_query = run_inline
+        report('event loop (inline)', *asyncio.run(load(server.app, args.callers, args.requests)))
+        server.run_query = pooled
+
+    report('query pool', *asyncio.run(load(server.app, args.callers, args.requests)))
+    print(f"  executor:   {query_executor.query_executor.stats()}")
+
+if __name__ == '__main__':
+    main()
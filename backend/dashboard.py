@@ -0,0 +1,67 @@
+"""Dashboard bundle for /api/dashboard: the /api/kpis and /api/charts results of
+one filter set from one request.
+
+The dashboard page asked for both with the same filters at the same moment:
+two requests, two trips through the result cache and the query pool, and two
+sets of cursors for statements that all read the same rollups. The bundle
+plans the role's KPI, trend and plant comparison statements into the chart
+batch's source groups (plan_chart_batch), so every statement on a table runs
+back to back on that table's pooled cursor and the groups run as the chart
+batch does.
+
+The per-table aggregates the statements share are the rollups themselves.
+Folding a table's statements into one aggregate, with a FILTER per chart for
+its plant-days, was measured slower than the separate statements: DuckDB
+takes as long to plan the folded statement as the statements it replaces,
+and evaluates the filters once per aggregate (benchmarks/bench_dashboard.py).
+"""
+import logging
+from typing import Any, Dict, List
+
+from chart_batch import CHART_SPECS, plan_chart_batch, run_groups
+from database import db_cursor
+from kpi_engine import KPI_SPECS
+from metrics import timed_query
+from queries import query, trend_query
+from rollups import DAILY_ROLLUP, rollup_source
+from serialization import fetch_row, json_records
+
+logger = logging.getLogger(__name__)
+
+# Metrics names of the bundle's statements, as /api/kpis records them
+QUERY_NAMES = {'kpis': 'kpis', 'trends': 'trends', 'comparisons': 'plant_comparison'}
+
+def plan_dashboard(role: str, start: str, end: str, plant: str) -> List[Dict[str, Any]]:
+    """The chart batch's source groups, with the role's 'kpis', 'trends' and 'comparisons'
+    statements added to the groups of the tables they read"""
+    groups = {group['table']: group for group in plan_chart_batch(list(CHART_SPECS), start, end, plant)}
+    comparison_table, _ = rollup_source(start, end)
+    extra = [
+        ('kpis', DAILY_ROLLUP, query(f"kpis:{role if role in KPI_SPECS else 'default'}", start=start, end=end, plant=plant)),
+        ('trends', DAILY_ROLLUP, query(trend_query(role), start=start, end=end, plant=plant)),
+        ('comparisons', comparison_table, query(f"plant_comparison:{comparison_table}", start=start, end=end))
+    ]
+    for name, table, statement in extra:
+        group = groups.setdefault(table, {'table': table, 'charts': [], 'statements': []})
+        group['charts'].append(name)
+        group['statements'].append(statement)
+    return list(groups.values())
+
+def _run_group(group: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one source group's statements on a single pooled cursor: keyed charts,
+    trends and comparisons as JSON fragments, the KPI and summary chart rows as
+    one-row lists of dicts"""
+    results = {}
+    with db_cursor() as conn:
+        for name, (sql, params) in zip(group['charts'], group['statements']):
+            label = f"chart:{name}" if name in CHART_SPECS else QUERY_NAMES[name]
+            if name == 'kpis' or (name in CHART_SPECS and not CHART_SPECS[name]['key']):
+                results[name] = [timed_query(label, fetch_row, conn, sql, params)]
+            else:
+                # chart statements fill their empty groups themselves (see _chart_select)
+                results[name] = timed_query(label, json_records, conn, sql, params, fill_nulls=name not in CHART_SPECS)
+    return results
+
+def run_dashboard(role: str, start: str, end: str, plant: str, parallel: bool = True) -> Dict[str, Any]:
+    """Name -> results (see _run_group) of every chart and the role's kpis, trends and comparisons"""
+    return run_groups(plan_dashboard(role, start, end, plant), _run_group, parallel)
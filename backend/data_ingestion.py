@@ -1,163 +1,411 @@
-import pandas as pd
-from database import get_db_connection
+import time
+import duckdb
+from database import (CLUSTER_KEYS, DIMENSION_IDS, DIMENSIONS, create_table, db_writer, bump_data_version,
+                      drop_table, is_view, publish_snapshot, table_columns)
+from excel_processor import SHEET_MAPPINGS, ExcelProcessor
+from lake import LAKE_ENABLED, discard_versions, fact_view, new_version, prune_versions, write_dimension, write_fact
+from rollups import DAILY_ROLLUP, MONTHLY_ROLLUP, build_rollups, refresh_rollups
 import logging
-from typing import Dict
-from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
-def ingest_excel_data(sheets_data: Dict[str, pd.DataFrame]) -> bool:
-    """Ingest data from Excel sheets into DuckDB star schema"""
+PLANT_REGIONS = {
+    'Lumshnong': 'Northeast',
+    'Sonapur': 'Northeast',
+    'Siliguri': 'East',
+    'Jalpaiguri': 'East',
+    'Guwahati': 'Northeast'
+}
+
+INGEST_MODES = ('replace', 'merge')
+
+# Uploads are staged in shadow_<table> copies that readers never query
+SHADOW_PREFIX = 'shadow_'
+
+# progress(sheet, rows read, rows written), called as each chunk is read and written
+Progress = Callable[[str, int, int], None]
+
+def _fact_column(column: str) -> str:
+    """Fact table column a sheet column is stored in (the id column for text attributes)"""
+    return DIMENSION_IDS[column][1] if column in DIMENSION_IDS else column
+
+def _sheet_stage(sheet_name: str) -> str:
+    """Table holding a sheet's rows as read, before their names are resolved to ids"""
+    return f"{SHADOW_PREFIX}sheet_{SHEET_MAPPINGS[sheet_name]['table']}"
+
+def _stream_sheet(conn, processor: ExcelProcessor, sheet_name: str, target: str,
+                  progress: Optional[Progress] = None) -> int:
+    """Append the rows of a sheet to ``target`` chunk by chunk; returns the row count"""
+    cols = ', '.join(SHEET_MAPPINGS[sheet_name]['columns'])
+    count = 0
+    for frame in processor.iter_chunks(sheet_name):
+        if progress:
+            progress(sheet_name, count + len(frame), count)
+        # The typed chunk is scanned in place, no conversion on the way in
+        conn.register('sheet_chunk', frame)
+        conn.execute(f"INSERT INTO {target} ({cols}) SELECT {cols} FROM sheet_chunk")
+        conn.unregister('sheet_chunk')
+        count += len(frame)
+        if progress:
+            progress(sheet_name, count, count)
+    return count
+
+def _stage_sheet(conn, processor: ExcelProcessor, sheet_name: str, progress: Optional[Progress] = None) -> int:
+    """Stream a sheet into a fresh staging table shaped like the sheet; returns the rows read"""
+    mapping = SHEET_MAPPINGS[sheet_name]
+    stage = _sheet_stage(sheet_name)
+    conn.execute(f"DROP TABLE IF EXISTS {stage}")
+    conn.execute(f"CREATE TABLE {stage} ({', '.join(f'{c} {t}' for c, t in zip(mapping['columns'], mapping['types']))})")
+    return _stream_sheet(conn, processor, sheet_name, stage, progress)
+
+def _check_staged(conn, staged: Dict[str, int]):
+    """Fail the upload unless every shadow table holds exactly the rows read for it"""
+    for sheet_name, count in staged.items():
+        shadow = SHADOW_PREFIX + SHEET_MAPPINGS[sheet_name]['table']
+        rows = conn.execute(f"SELECT COUNT(*) FROM {shadow}").fetchall()[0][0]
+        if rows != count:
+            raise RuntimeError(f"{shadow} holds {rows} rows but {count} were read from '{sheet_name}'")
+
+def _drop_shadows(conn):
+    for (name,) in conn.execute(f"SELECT table_name FROM duckdb_tables() WHERE table_name LIKE '{SHADOW_PREFIX}%'").fetchall():
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+
+def _fill_dimensions(conn, sheets: List[str], dims: Dict[str, str]):
+    """Add the dates and names of the staged ``sheets`` missing from the dimensions.
+
+    ``dims`` maps each dimension to the table to extend, the dimension itself
+    or a shadow copy of it. New names get the next ids, in name order, so ids
+    already stored in fact tables stay valid.
+    """
+    dates = ' UNION '.join(f"SELECT DISTINCT date FROM {_sheet_stage(sheet_name)}" for sheet_name in sheets)
+    added = conn.execute(f"""
+        INSERT OR IGNORE INTO {dims['dim_date']}
+        SELECT date, year(date), month(date), day(date), monthname(date), quarter(date)
+        FROM ({dates})
+    """).fetchall()[0][0]
+    logger.info(f"Loaded {added} dates into {dims['dim_date']}")
+
+    for column, (dim, id_column) in DIMENSION_IDS.items():
+        stages = [_sheet_stage(sheet_name) for sheet_name in sheets if column in SHEET_MAPPINGS[sheet_name]['columns']]
+        if not stages:
+            continue
+        target = dims[dim]
+        names = ' UNION '.join(f"SELECT DISTINCT {column} FROM {stage}" for stage in stages)
+        attributes, lookup = '', ''
+        if dim == 'dim_plant':
+            regions = ', '.join(f"('{plant}', '{region}')" for plant, region in PLANT_REGIONS.items())
+            attributes = ", COALESCE(r.region, 'Unknown')"
+            lookup = f"LEFT JOIN (VALUES {regions}) r(plant_name, region) ON r.plant_name = n.plant_name"
+        added = conn.execute(f"""
+            INSERT INTO {target}
+            SELECT (SELECT COALESCE(MAX({id_column}), 0) FROM {target}) + row_number() OVER (ORDER BY n.{column}),
+                   n.{column}{attributes}
+            FROM ({names}) n {lookup}
+            WHERE n.{column} IS NOT NULL AND n.{column} NOT IN (SELECT {column} FROM {target})
+        """).fetchall()[0][0]
+        logger.info(f"Inserted {added} names into {target}")
+
+def _row_groups(conn, table: str) -> int:
+    return conn.execute(f"SELECT COUNT(DISTINCT row_group_id) FROM pragma_storage_info('{table}')").fetchall()[0][0]
+
+def _write_lake(conn, facts: Dict[str, str], dims: Dict[str, str]) -> Dict[str, Path]:
+    """Write new lake versions of ``facts`` (fact table -> table holding its rows) and of the
+    dimensions ``dims`` holds; returns the fact version directories"""
+    version = new_version()
+    written = {}
+    try:
+        for table, source in facts.items():
+            written[table] = write_fact(conn, source, table, table_columns(table), CLUSTER_KEYS[table], version)
+        for dim in DIMENSIONS:
+            written[dim] = write_dimension(conn, dims[dim], dim, version)
+    except Exception:
+        discard_versions(written.values())
+        raise
+    return written
+
+def _point_views(conn, facts: Dict[str, str], written: Dict[str, Path]):
+    """Replace the ``facts`` tables with views over their new lake versions, dropping the tables they were written from"""
+    for table, source in facts.items():
+        drop_table(conn, table)
+        conn.execute(fact_view(table, table_columns(table), written[table]))
+        conn.execute(f"DROP TABLE {source}")
+
+def _swap_shadows(conn, tables: List[str], lake_facts: Optional[Dict[str, str]] = None, written: Optional[Dict[str, Path]] = None):
+    """Replace each of ``tables`` with its shadow copy, and each of ``lake_facts`` with a view
+    over the lake version ``written`` for it, in one transaction.
+
+    Readers use snapshots: until COMMIT they see every old table, after it
+    every new one.
+    """
+    conn.execute("BEGIN TRANSACTION")
     try:
-        conn = get_db_connection()
-        
-        # Populate dim_date
-        all_dates = set()
-        for df in sheets_data.values():
-            if 'Date' in df.columns:
-                all_dates.update(df['Date'].dropna().unique())
-        
-        date_data = []
-        for date in all_dates:
-            if pd.notna(date):
-                dt = pd.to_datetime(date)
-                date_data.append({
-                    'date': dt.strftime('%Y-%m-%d'),
-                    'year': dt.year,
-                    'month': dt.month,
-                    'day': dt.day,
-                    'month_name': dt.strftime('%B'),
-                    'quarter': (dt.month - 1) // 3 + 1
-                })
-        
-        if date_data:
-            df_dates = pd.DataFrame(date_data)
-            conn.execute("DELETE FROM dim_date")
-            conn.execute("INSERT INTO dim_date SELECT * FROM df_dates")
-            logger.info(f"Inserted {len(date_data)} dates into dim_date")
-        
-        # Populate dim_plant
-        all_plants = set()
-        for df in sheets_data.values():
-            if 'Plant' in df.columns:
-                all_plants.update(df['Plant'].dropna().unique())
-        
-        plant_data = []
-        plant_regions = {
-            'Lumshnong': 'Northeast',
-            'Sonapur': 'Northeast',
-            'Siliguri': 'East',
-            'Jalpaiguri': 'East',
-            'Guwahati': 'Northeast'
-        }
-        
-        for idx, plant in enumerate(sorted(all_plants), 1):
-            plant_data.append({
-                'plant_id': idx,
-                'plant_name': plant,
-                'region': plant_regions.get(plant, 'Unknown')
-            })
-        
-        if plant_data:
-            df_plants = pd.DataFrame(plant_data)
-            conn.execute("DELETE FROM dim_plant")
-            conn.execute("INSERT INTO dim_plant SELECT * FROM df_plants")
-            logger.info(f"Inserted {len(plant_data)} plants into dim_plant")
-        
-        # Populate fact tables
-        if 'Production' in sheets_data:
-            df = sheets_data['Production'].copy()
-            df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-            df = df.rename(columns={
-                'Cement_MT': 'cement_mt',
-                'Clinker_MT': 'clinker_mt',
-                'Capacity_Util_%': 'capacity_util_pct',
-                'Downtime_Hrs': 'downtime_hrs',
-                'Plant': 'plant_name',
-                'Line': 'line',
-                'Date': 'date'
-            })
-            conn.execute("DELETE FROM fact_production")
-            conn.execute("INSERT INTO fact_production SELECT date, plant_name, line, cement_mt, clinker_mt, capacity_util_pct, downtime_hrs FROM df")
-            logger.info(f"Inserted {len(df)} rows into fact_production")
-        
-        if 'Energy' in sheets_data:
-            df = sheets_data['Energy'].copy()
-            df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-            df = df.rename(columns={
-                'Power_kWh_Ton': 'power_kwh_ton',
-                'Heat_kcal_kg': 'heat_kcal_kg',
-                'Fuel_Cost_Rs_Ton': 'fuel_cost_rs_ton',
-                'AFR_%': 'afr_pct',
-                'Plant': 'plant_name',
-                'Date': 'date'
-            })
-            conn.execute("DELETE FROM fact_energy")
-            conn.execute("INSERT INTO fact_energy SELECT date, plant_name, power_kwh_ton, heat_kcal_kg, fuel_cost_rs_ton, afr_pct FROM df")
-            logger.info(f"Inserted {len(df)} rows into fact_energy")
-        
-        if 'Maintenance' in sheets_data:
-            df = sheets_data['Maintenance'].copy()
-            df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-            df = df.rename(columns={
-                'Breakdown_Hrs': 'breakdown_hrs',
-                'MTBF_Hrs': 'mtbf_hrs',
-                'MTTR_Hrs': 'mttr_hrs',
-                'Plant': 'plant_name',
-                'Equipment': 'equipment',
-                'Date': 'date'
-            })
-            conn.execute("DELETE FROM fact_maintenance")
-            conn.execute("INSERT INTO fact_maintenance SELECT date, plant_name, equipment, breakdown_hrs, mtbf_hrs, mttr_hrs FROM df")
-            logger.info(f"Inserted {len(df)} rows into fact_maintenance")
-        
-        if 'Quality' in sheets_data:
-            df = sheets_data['Quality'].copy()
-            df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-            df = df.rename(columns={
-                'Blaine': 'blaine',
-                'Strength_28D': 'strength_28d',
-                'Clinker_Factor': 'clinker_factor',
-                'Plant': 'plant_name',
-                'Date': 'date'
-            })
-            conn.execute("DELETE FROM fact_quality")
-            conn.execute("INSERT INTO fact_quality SELECT date, plant_name, blaine, strength_28d, clinker_factor FROM df")
-            logger.info(f"Inserted {len(df)} rows into fact_quality")
-        
-        if 'Sales_Logistics' in sheets_data:
-            df = sheets_data['Sales_Logistics'].copy()
-            df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-            df = df.rename(columns={
-                'Dispatch_MT': 'dispatch_mt',
-                'Realization_Rs_Ton': 'realization_rs_ton',
-                'Freight_Rs_Ton': 'freight_rs_ton',
-                'OTIF_%': 'otif_pct',
-                'Plant': 'plant_name',
-                'Region': 'region',
-                'Date': 'date'
-            })
-            conn.execute("DELETE FROM fact_sales")
-            conn.execute("INSERT INTO fact_sales SELECT date, plant_name, region, dispatch_mt, realization_rs_ton, freight_rs_ton, otif_pct FROM df")
-            logger.info(f"Inserted {len(df)} rows into fact_sales")
-        
-        if 'Finance' in sheets_data:
-            df = sheets_data['Finance'].copy()
-            df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-            df = df.rename(columns={
-                'Cost_Rs_Ton': 'cost_rs_ton',
-                'EBITDA_Rs_Ton': 'ebitda_rs_ton',
-                'Margin_%': 'margin_pct',
-                'Plant': 'plant_name',
-                'Date': 'date'
-            })
-            conn.execute("DELETE FROM fact_finance")
-            conn.execute("INSERT INTO fact_finance SELECT date, plant_name, cost_rs_ton, ebitda_rs_ton, margin_pct FROM df")
-            logger.info(f"Inserted {len(df)} rows into fact_finance")
-        
-        conn.close()
-        return True
-        
+        for table in tables:
+            drop_table(conn, table)
+            conn.execute(f"ALTER TABLE {SHADOW_PREFIX}{table} RENAME TO {table}")
+        if lake_facts:
+            _point_views(conn, lake_facts, written)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def _resolve_sheet(conn, sheet_name: str, dims: Dict[str, str]):
+    """Move a staged sheet into a shadow copy of its fact table, its names replaced by
+    dimension ids and its rows in CLUSTER_KEYS order"""
+    mapping = SHEET_MAPPINGS[sheet_name]
+    table, stage = mapping['table'], _sheet_stage(sheet_name)
+    shadow = SHADOW_PREFIX + table
+    select, joins = [], []
+    for column in mapping['columns']:
+        if column in DIMENSION_IDS:
+            dim, id_column = DIMENSION_IDS[column]
+            select.append(f"{column}_dim.{id_column}")
+            joins.append(f"LEFT JOIN {dims[dim]} {column}_dim ON {column}_dim.{column} = s.{column}")
+        else:
+            select.append(f"s.{column}")
+    conn.execute(f"DROP TABLE IF EXISTS {shadow}")
+    create_table(conn, table, shadow)
+    conn.execute(f"""
+        INSERT INTO {shadow} ({', '.join(_fact_column(c) for c in mapping['columns'])})
+        SELECT {', '.join(select)} FROM {stage} s {' '.join(joins)}
+        ORDER BY {CLUSTER_KEYS[table]}
+    """)
+    conn.execute(f"DROP TABLE {stage}")
+
+def _replace_tables(conn, staged: Dict[str, int]) -> Dict[str, Dict[str, int]]:
+    """Build shadow dimensions, facts and rollups next to the live tables, then swap every shadow in at once"""
+    tables = [SHEET_MAPPINGS[sheet_name]['table'] for sheet_name in staged]
+    # The shadow dimensions start as copies: tables this upload leaves alone keep their ids
+    for dim in DIMENSIONS:
+        conn.execute(f"DROP TABLE IF EXISTS {SHADOW_PREFIX}{dim}")
+        create_table(conn, dim, SHADOW_PREFIX + dim)
+        conn.execute(f"INSERT INTO {SHADOW_PREFIX}{dim} SELECT * FROM {dim}")
+    dims = {dim: SHADOW_PREFIX + dim for dim in DIMENSIONS}
+    _fill_dimensions(conn, list(staged), dims)
+    for sheet_name in staged:
+        _resolve_sheet(conn, sheet_name, dims)
+    _check_staged(conn, staged)
+    build_rollups(conn, sources={table: SHADOW_PREFIX + table for table in tables}, prefix=SHADOW_PREFIX)
+    rollups = [DAILY_ROLLUP, MONTHLY_ROLLUP]
+    if LAKE_ENABLED:
+        # The new fact rows go to the lake; the fact tables become views over them
+        lake_facts = {table: SHADOW_PREFIX + table for table in tables}
+        written = _write_lake(conn, lake_facts, dims)
+        try:
+            _swap_shadows(conn, DIMENSIONS + rollups, lake_facts, written)
+        except Exception:
+            discard_versions(written.values())
+            raise
+        for table in list(written):
+            prune_versions(table)
+    else:
+        _swap_shadows(conn, tables + DIMENSIONS + rollups)
+    for sheet_name, count in staged.items():
+        logger.info(f"Replaced {SHEET_MAPPINGS[sheet_name]['table']} with {count} rows")
+    return {sheet_name: {'inserted': count} for sheet_name, count in staged.items()}
+
+def _merge_staged(conn, sheet_name: str, target: Optional[str] = None) -> Dict[str, int]:
+    """Upsert a staged sheet into its fact table (or ``target``, a copy of it) on the sheet's merge key.
+
+    The shadow table is compared with the fact rows of its date range only
+    (date zone maps skip the rest of the history). Keys whose staged rows
+    all match fact rows are left alone. For every other key, all fact rows
+    with that key are deleted and all its staged rows appended in
+    CLUSTER_KEYS order (see recluster_tables to restore the table order): a
+    key can hold several rows (a plant-day sells to several regions), and
+    its unchanged rows go back in with the changed ones. The (date,
+    plant_id) pairs touched are added to merge_affected for the rollup
+    refresh. Counts are per staged row, plus the fact rows deleted.
+    """
+    mapping = SHEET_MAPPINGS[sheet_name]
+    stage, changed, keys = SHADOW_PREFIX + mapping['table'], f"changed_{mapping['table']}", f"changed_keys_{mapping['table']}"
+    table, cols = target or mapping['table'], ', '.join(_fact_column(c) for c in mapping['columns'])
+    key = [_fact_column(col) for col in mapping['key']]
+
+    def same_key(left: str, right: str) -> str:
+        return ' AND '.join(f"{left}.{col} IS NOT DISTINCT FROM {right}.{col}" for col in key)
+
+    window = f"date BETWEEN (SELECT MIN(date) FROM {stage}) AND (SELECT MAX(date) FROM {stage})"
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE {changed} AS
+        SELECT * FROM {stage}
+        EXCEPT
+        SELECT {cols} FROM {table} WHERE {window}
+    """)
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE {keys} AS SELECT DISTINCT {', '.join(key)} FROM {changed}")
+    staged, changed_rows, updated = conn.execute(f"""
+        SELECT
+            (SELECT COUNT(*) FROM (SELECT DISTINCT * FROM {stage})),
+            (SELECT COUNT(*) FROM {changed}),
+            (SELECT COUNT(*) FROM {changed} c WHERE EXISTS (SELECT 1 FROM {table} t WHERE t.{window} AND {same_key('t', 'c')}))
+    """).fetchall()[0]
+    deleted = conn.execute(f"DELETE FROM {table} t USING {keys} k WHERE t.{window} AND {same_key('t', 'k')}").fetchall()[0][0]
+    conn.execute(f"""
+        INSERT INTO {table} ({cols})
+        SELECT DISTINCT * FROM {stage} s WHERE EXISTS (SELECT 1 FROM {keys} k WHERE {same_key('s', 'k')})
+        ORDER BY {CLUSTER_KEYS[mapping['table']]}
+    """)
+    conn.execute(f"INSERT INTO merge_affected SELECT DISTINCT date, plant_id FROM {keys}")
+    conn.execute(f"DROP TABLE {changed}")
+    conn.execute(f"DROP TABLE {keys}")
+    conn.execute(f"DROP TABLE {stage}")
+    counts = {'inserted': changed_rows - updated, 'updated': updated, 'unchanged': staged - changed_rows, 'deleted': deleted}
+    logger.info(f"Merged into {table}: {counts}")
+    return counts
+
+def _rewrote(counts: Dict[str, int]) -> bool:
+    """True when a merge deleted or wrote fact rows"""
+    return bool(counts['deleted'] or counts['inserted'] or counts['updated'])
+
+def _merge_tables(conn, staged: Dict[str, int]) -> Dict[str, Dict[str, int]]:
+    """Extend the dimensions, upsert every staged sheet and refresh the touched rollup rows in one transaction.
+
+    A fact table kept in the lake is copied into the database, merged there
+    and written back as a new lake version, which its view then points at.
+    """
+    written = {}
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        dims = {dim: dim for dim in DIMENSIONS}
+        _fill_dimensions(conn, list(staged), dims)
+        for sheet_name in staged:
+            _resolve_sheet(conn, sheet_name, dims)
+        _check_staged(conn, staged)
+        lake_facts = {}
+        for sheet_name in staged:
+            table = SHEET_MAPPINGS[sheet_name]['table']
+            if is_view(conn, table):
+                lake_facts[table] = f"{SHADOW_PREFIX}merged_{table}"
+                conn.execute(f"CREATE TABLE {lake_facts[table]} AS SELECT {', '.join(table_columns(table))} FROM {table}")
+        conn.execute("CREATE OR REPLACE TEMP TABLE merge_affected (date DATE, plant_id INTEGER)")
+        counts = {sheet_name: _merge_staged(conn, sheet_name, lake_facts.get(SHEET_MAPPINGS[sheet_name]['table']))
+                  for sheet_name in staged}
+        # Tables whose rows were deleted or written, whatever the per-row counts say
+        changed = {SHEET_MAPPINGS[sheet_name]['table'] for sheet_name, c in counts.items() if _rewrote(c)}
+        if changed:
+            refresh_rollups(conn, 'merge_affected', sources=lake_facts)
+            rewrite = {table: copy for table, copy in lake_facts.items() if table in changed}
+            if rewrite:
+                written = _write_lake(conn, rewrite, dims)
+                _point_views(conn, rewrite, written)
+        for table, copy in lake_facts.items():
+            if table not in written:
+                conn.execute(f"DROP TABLE {copy}")
+        conn.execute("DROP TABLE merge_affected")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        discard_versions(written.values())
+        raise
+    for table in written:
+        prune_versions(table)
+    return counts
+
+def ingest_workbook(processor: ExcelProcessor, progress: Optional[Progress] = None,
+                    mode: str = 'replace') -> Dict[str, Dict[str, int]]:
+    """Stream the workbook's sheets into the DuckDB star schema; returns row counts per sheet.
+
+    Every sheet is first streamed into a staging table, which readers never
+    see. Its plant, line, equipment and region names are added to the
+    dimensions, and the rows are moved into a shadow copy of the fact table
+    with the names replaced by dimension ids. The row counts are then
+    checked. mode 'replace' builds shadow dimensions and rollups and swaps
+    all shadows in with one transaction. mode 'merge' upserts the staged rows
+    on their SHEET_MAPPINGS key in one transaction, reporting rows inserted,
+    updated and unchanged, and refreshes only the rollup rows of the
+    plant-days that changed. Either way readers see the whole upload or none
+    of it, and never wait on it. Every replace moves the data version; a
+    merge moves it only when it rewrote fact rows. Each sheet's counts also carry the rows/s it was read
+    and staged at (rows_per_sec).
+
+    A sheet that cannot be read (missing columns, text in a numeric column,
+    a corrupt sheet) is recorded in processor.validation_errors and left
+    out; database errors abort the upload.
+    """
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unknown ingest mode '{mode}'")
+    staged = {}
+    rates = {}
+    changes = {}
+    try:
+        with db_writer() as conn:
+            try:
+                _drop_shadows(conn)
+                for sheet_name in processor.sheets():
+                    try:
+                        t0 = time.perf_counter()
+                        staged[sheet_name] = _stage_sheet(conn, processor, sheet_name, progress)
+                        rates[sheet_name] = staged[sheet_name] / max(time.perf_counter() - t0, 1e-9)
+                        logger.info(f"Read '{sheet_name}' at {rates[sheet_name]:,.0f} rows/s")
+                    except duckdb.Error:
+                        raise
+                    except Exception as e:
+                        conn.execute(f"DROP TABLE IF EXISTS {_sheet_stage(sheet_name)}")
+                        processor.skip_sheet(sheet_name, e)
+
+                if staged:
+                    apply = _replace_tables if mode == 'replace' else _merge_tables
+                    changes = apply(conn, staged)
+                    for sheet_name, counts in changes.items():
+                        counts['rows_per_sec'] = round(rates[sheet_name])
+            finally:
+                _drop_shadows(conn)
+
+        return changes
+
     except Exception as e:
         logger.error(f"Error ingesting data: {str(e)}")
         raise e
+
+    finally:
+        # A replace swaps its tables in whatever their row counts (an empty sheet empties its table)
+        if changes and (mode == 'replace' or any(_rewrote(c) for c in changes.values())):
+            version = bump_data_version()
+            logger.info(f"Warehouse data version is now {version}")
+
+def recluster_tables(tables: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+    """Rewrite fact and rollup tables (all of CLUSTER_KEYS by default) in their cluster order.
+
+    Merge uploads append rows, so after incremental loads a table's row
+    groups cover overlapping date ranges again. Each table is copied sorted
+    into a shadow table and all copies are swapped in at once. The contents
+    do not change, so neither does the data version, but the new layout is
+    published to snapshot readers. Returns the rows and the row groups
+    before and after per table.
+    """
+    tables = tables or list(CLUSTER_KEYS)
+    unknown = [table for table in tables if table not in CLUSTER_KEYS]
+    if unknown:
+        raise ValueError(f"Cannot recluster {', '.join(unknown)}; tables are {', '.join(CLUSTER_KEYS)}")
+    result = {}
+    with db_writer() as conn:
+        # Lake fact tables are views over files written in order already
+        tables = [table for table in tables if not is_view(conn, table)]
+        try:
+            _drop_shadows(conn)
+            for table in tables:
+                conn.execute(f"CREATE TABLE {SHADOW_PREFIX}{table} AS SELECT * FROM {table} ORDER BY {CLUSTER_KEYS[table]}")
+                result[table] = {
+                    'rows': conn.execute(f"SELECT COUNT(*) FROM {table}").fetchall()[0][0],
+                    'row_groups_before': _row_groups(conn, table)
+                }
+            _swap_shadows(conn, tables)
+            conn.execute("CHECKPOINT")
+            for table in tables:
+                result[table]['row_groups_after'] = _row_groups(conn, table)
+        finally:
+            _drop_shadows(conn)
+    logger.info(f"Reclustered {', '.join(tables)}")
+    publish_snapshot()
+    return result
+
+if __name__ == "__main__":
+    # Offline maintenance, with the server stopped: python data_ingestion.py recluster [table ...]
+    import sys
+    if sys.argv[1:2] != ['recluster']:
+        sys.exit("usage: python data_ingestion.py recluster [table ...]")
+    logging.basicConfig(level=logging.INFO)
+    for table, counts in recluster_tables(sys.argv[2:] or None).items():
+        print(f"{table}: {counts}")
@@ -1,116 +1,559 @@
 import duckdb
 import os
+import queue
+import threading
+import time
+import logging
+from contextlib import contextmanager
 from pathlib import Path
 
-DB_PATH = Path(__file__).parent / 'star_cement.duckdb'
+from lake import LAKE_ENABLED, load_lake
+from rollups import DAILY_ROLLUP, MONTHLY_ROLLUP, build_rollups
+from snapshots import SNAPSHOT_DIR, SNAPSHOT_POLL_SECONDS, SNAPSHOTS_ENABLED, current_snapshot, publish
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = Path(os.getenv("STAR_CEMENT_DB_PATH", Path(__file__).parent / 'star_cement.duckdb'))
+DB_READ_ONLY = os.getenv("DUCKDB_READ_ONLY", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DUCKDB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DUCKDB_POOL_TIMEOUT_SECONDS", "30"))
+# Rows per row group written to the database file (a multiple of 2048). Smaller
+# row groups let date-window scans skip more of a clustered table by min/max.
+DB_ROW_GROUP_SIZE = int(os.getenv("DUCKDB_ROW_GROUP_SIZE", "16384"))
+
+# Catalog name the database file is attached under
+DB_CATALOG = 'warehouse'
+
+# Read-only processes serve the published snapshots instead of DB_PATH (see snapshots.py)
+FOLLOW_SNAPSHOTS = SNAPSHOTS_ENABLED and DB_READ_ONLY
+
+class _Database:
+    """One opened database file, its idle cursors and the number borrowed"""
+
+    def __init__(self, conn, path: Path):
+        self.conn = conn
+        self.path = path
+        self.idle = queue.LifoQueue()
+        self.in_use = 0
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self.conn.close()
+
+class ConnectionManager:
+    """Process-wide DuckDB database handle with a bounded pool of cursors.
+
+    The database file is opened once and every request borrows a cursor
+    (a lightweight connection sharing the same database instance, catalog
+    and buffer cache). Idle cursors are kept for reuse, and at most
+    ``pool_size`` can be checked out at the same time. The file is attached
+    with ``row_group_size`` rows per row group, which DuckDB does not store
+    in the file, so it applies to everything written through the manager.
+
+    swap() moves the pool to another file (a newer snapshot): cursors are
+    borrowed from the new file from then on, and the old one is closed when
+    the last cursor borrowed from it comes back.
+    """
+
+    def __init__(self, db_path=DB_PATH, pool_size=DB_POOL_SIZE, read_only=DB_READ_ONLY,
+                 row_group_size=DB_ROW_GROUP_SIZE):
+        self.db_path = Path(db_path) if db_path else None
+        self.pool_size = pool_size
+        self.read_only = read_only
+        self.row_group_size = row_group_size
+        self._db = None
+        # Swapped-out files with cursors still borrowed
+        self._retired = []
+        self._swaps = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._in_use = 0
+
+    def _open(self, path: Path) -> _Database:
+        options = f"ROW_GROUP_SIZE {self.row_group_size}" + (", READ_ONLY" if self.read_only else "")
+        conn = duckdb.connect()
+        conn.execute(f"ATTACH '{path}' AS {DB_CATALOG} ({options})")
+        conn.execute(f"USE {DB_CATALOG}")
+        logger.info(f"Opened DuckDB database {path} (read_only={self.read_only}, "
+                    f"row_group_size={self.row_group_size})")
+        return _Database(conn, path)
+
+    def _current(self) -> _Database:
+        # with self._lock held
+        if self._db is None:
+            if self.db_path is None:
+                raise RuntimeError(f"No warehouse snapshot has been published to {SNAPSHOT_DIR} yet")
+            self._db = self._open(self.db_path)
+        return self._db
+
+    def _handle(self) -> _Database:
+        with self._lock:
+            return self._current()
+
+    def _cursor(self, db: _Database = None):
+        """New cursor on the database file (cursors start in the in-memory catalog)"""
+        cur = (db or self._handle()).conn.cursor()
+        cur.execute(f"USE {DB_CATALOG}")
+        return cur
+
+    @contextmanager
+    def cursor(self):
+        """Borrow a pooled cursor for read queries"""
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT_SECONDS):
+            raise TimeoutError("Timed out waiting for a DuckDB connection from the pool")
+        try:
+            with self._lock:
+                db = self._current()
+                db.in_use += 1
+                self._in_use += 1
+            try:
+                try:
+                    cur = db.idle.get_nowait()
+                except queue.Empty:
+                    cur = self._cursor(db)
+                try:
+                    yield cur
+                except BaseException:
+                    # The cursor may be mid-transaction or holding a failed
+                    # result; never hand it to the next request.
+                    cur.close()
+                    raise
+                else:
+                    db.idle.put(cur)
+            finally:
+                with self._lock:
+                    db.in_use -= 1
+                    self._in_use -= 1
+                    if db in self._retired and not db.in_use:
+                        self._retired.remove(db)
+                        db.close()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def writer(self):
+        """Exclusive cursor for ingestion and schema changes"""
+        if self.read_only:
+            raise RuntimeError("Database is opened read-only; writes are disabled in this process")
+        with self._write_lock:
+            cur = self._cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+
+    def swap(self, path: Path):
+        """Serve new cursors from database file ``path``; queries running on the current file finish there"""
+        db = self._open(Path(path))
+        with self._lock:
+            previous, self._db, self.db_path = self._db, db, Path(path)
+            self._swaps += 1
+            if previous is not None:
+                if previous.in_use:
+                    self._retired.append(previous)
+                else:
+                    previous.close()
+
+    def stats(self):
+        """Pool usage counters"""
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'in_use': self._in_use,
+                'idle': self._db.idle.qsize() if self._db else 0,
+                'read_only': self.read_only,
+                'database': str(self.db_path) if self.db_path else None,
+                'swaps': self._swaps,
+                'retired_in_use': sum(db.in_use for db in self._retired)
+            }
+
+    def close(self):
+        """Close pooled cursors and the database handles"""
+        with self._lock:
+            for db in [self._db] + self._retired:
+                if db is not None:
+                    db.close()
+                    logger.info(f"Closed DuckDB database {db.path}")
+            self._db = None
+            self._retired = []
+
+_manager = ConnectionManager(db_path=None if FOLLOW_SNAPSHOTS else DB_PATH)
+
+def _clock_version() -> int:
+    return time.time_ns() // 1000
+
+# Versions are microsecond timestamps, so one is never reused across restarts
+# or for a warehouse changed outside this process (a reset, a restored file);
+# a restart starts a new version
+_data_version = _clock_version()
+_data_version_lock = threading.Lock()
+
+def get_data_version():
+    """Monotonically increasing number identifying the current warehouse contents"""
+    return _data_version
+
+def bump_data_version():
+    """Mark the warehouse contents as changed and publish them to the readers; returns the new version"""
+    global _data_version
+    with _data_version_lock:
+        _data_version = max(_data_version + 1, _clock_version())
+        version = _data_version
+    publish_snapshot()
+    return version
+
+def publish_snapshot():
+    """Publish the committed warehouse as a snapshot for read-only processes (writer with
+    STAR_CEMENT_SNAPSHOT_DIR set only); returns its path, None when nothing was published"""
+    if not SNAPSHOTS_ENABLED or _manager.read_only:
+        return None
+    try:
+        with db_writer() as conn:
+            # Everything committed goes into the file, and no write starts until it is copied
+            conn.execute(f"CHECKPOINT {DB_CATALOG}")
+            path = publish(_manager.db_path, get_data_version())
+    except Exception as e:
+        # The data is committed either way; readers stay on the previous snapshot
+        logger.error(f"Publishing a warehouse snapshot failed: {e}")
+        return None
+    logger.info(f"Published snapshot {path.name} (data version {get_data_version()})")
+    return path
+
+_following = threading.Event()
+_stop_following = threading.Event()
+
+def _switch_snapshot():
+    """Serve the current snapshot if another file is being served"""
+    global _data_version
+    snapshot = current_snapshot()
+    if snapshot is None or snapshot[0] == _manager.db_path:
+        return
+    path, version = snapshot
+    _manager.swap(path)
+    # Only after the swap: a result computed for the new version must come from the new file
+    with _data_version_lock:
+        _data_version = version
+    logger.info(f"Serving snapshot {path.name} (data version {version})")
+
+def _poll_snapshots():
+    while not _stop_following.wait(SNAPSHOT_POLL_SECONDS):
+        try:
+            _switch_snapshot()
+        except Exception as e:
+            logger.warning(f"Switching to the current snapshot failed: {e}")
+
+def follow_snapshots():
+    """Read-only process: serve the current snapshot and switch to each newer one as it is published"""
+    if not FOLLOW_SNAPSHOTS or _following.is_set():
+        return
+    _following.set()
+    try:
+        _switch_snapshot()
+    except Exception as e:
+        logger.warning(f"Opening the current snapshot failed: {e}")
+    threading.Thread(target=_poll_snapshots, name="snapshot-follower", daemon=True).start()
+
+def db_cursor():
+    """Context manager yielding a pooled read cursor"""
+    return _manager.cursor()
+
+def db_writer():
+    """Context manager yielding the exclusive write cursor"""
+    return _manager.writer()
+
+def db_pool_stats():
+    """Cursor pool usage counters"""
+    return _manager.stats()
+
+def close_db():
+    """Release the shared DuckDB handle (called on application shutdown)"""
+    _stop_following.set()
+    _manager.close()
 
 def get_db_connection():
-    """Get DuckDB connection"""
-    return duckdb.connect(str(DB_PATH))
+    """Get a standalone cursor on the shared DuckDB handle; the caller must close it"""
+    return _manager._cursor()
 
 def init_star_schema():
-    """Initialize star schema tables"""
-    conn = get_db_connection()
-    
-    # Drop existing tables
-    conn.execute("DROP TABLE IF EXISTS fact_production")
-    conn.execute("DROP TABLE IF EXISTS fact_energy")
-    conn.execute("DROP TABLE IF EXISTS fact_maintenance")
-    conn.execute("DROP TABLE IF EXISTS fact_quality")
-    conn.execute("DROP TABLE IF EXISTS fact_sales")
-    conn.execute("DROP TABLE IF EXISTS fact_finance")
-    conn.execute("DROP TABLE IF EXISTS dim_date")
-    conn.execute("DROP TABLE IF EXISTS dim_plant")
-    
-    # Create dimension tables
-    conn.execute("""
-        CREATE TABLE dim_date (
-            date DATE PRIMARY KEY,
-            year INTEGER,
-            month INTEGER,
-            day INTEGER,
-            month_name VARCHAR,
-            quarter INTEGER
-        )
-    """)
-    
-    conn.execute("""
-        CREATE TABLE dim_plant (
-            plant_id INTEGER PRIMARY KEY,
-            plant_name VARCHAR UNIQUE,
-            region VARCHAR
-        )
-    """)
-    
-    # Create fact tables
-    conn.execute("""
-        CREATE TABLE fact_production (
-            date DATE,
-            plant_name VARCHAR,
-            line VARCHAR,
-            cement_mt DOUBLE,
-            clinker_mt DOUBLE,
-            capacity_util_pct DOUBLE,
-            downtime_hrs DOUBLE
-        )
-    """)
-    
-    conn.execute("""
-        CREATE TABLE fact_energy (
-            date DATE,
-            plant_name VARCHAR,
-            power_kwh_ton DOUBLE,
-            heat_kcal_kg DOUBLE,
-            fuel_cost_rs_ton DOUBLE,
-            afr_pct DOUBLE
-        )
-    """)
-    
-    conn.execute("""
-        CREATE TABLE fact_maintenance (
-            date DATE,
-            plant_name VARCHAR,
-            equipment VARCHAR,
-            breakdown_hrs DOUBLE,
-            mtbf_hrs DOUBLE,
-            mttr_hrs DOUBLE
-        )
-    """)
-    
-    conn.execute("""
-        CREATE TABLE fact_quality (
-            date DATE,
-            plant_name VARCHAR,
-            blaine DOUBLE,
-            strength_28d DOUBLE,
-            clinker_factor DOUBLE
-        )
-    """)
-    
-    conn.execute("""
-        CREATE TABLE fact_sales (
-            date DATE,
-            plant_name VARCHAR,
-            region VARCHAR,
-            dispatch_mt DOUBLE,
-            realization_rs_ton DOUBLE,
-            freight_rs_ton DOUBLE,
-            otif_pct DOUBLE
-        )
-    """)
+    """Bring the star schema up to date, keeping the data already loaded (and publish it as a
+    snapshot, or start following the snapshots, when they are enabled)"""
+    if _manager.read_only:
+        follow_snapshots()
+        if FOLLOW_SNAPSHOTS and _manager.db_path is None:
+            logger.warning(f"No snapshot in {SNAPSHOT_DIR} yet; serving starts with the writer's first")
+            return
+        with db_cursor() as conn:
+            version = schema_version(conn)
+        if version < SCHEMA_VERSION:
+            logger.warning(f"Read-only warehouse is at schema version {version}, expected {SCHEMA_VERSION}; "
+                           f"run python database.py with write access")
+        return
+    with db_writer() as conn:
+        migrate(conn)
+    # A restart starts a new data version; readers move to it too
+    publish_snapshot()
+    print("Star schema initialized successfully")
+
+def reset_star_schema():
+    """Drop and recreate every star schema table at the latest schema version (empty, or loaded from the lake)"""
+    with db_writer() as conn:
+        _create_star_schema(conn)
+        _ensure_version_table(conn)
+        conn.execute(f"DELETE FROM {SCHEMA_VERSION_TABLE}")
+        conn.execute(f"INSERT INTO {SCHEMA_VERSION_TABLE} VALUES ({SCHEMA_VERSION}, 'reset', current_timestamp)")
+    bump_data_version()
+    print("Star schema reset")
+
+# Star schema tables and their column definitions. Fact tables store their
+# text attributes as integer ids into the dimensions (see DIMENSION_IDS).
+STAR_TABLES = {
+    'dim_date': """
+        date DATE PRIMARY KEY,
+        year INTEGER,
+        month INTEGER,
+        day INTEGER,
+        month_name VARCHAR,
+        quarter INTEGER
+    """,
+    'dim_plant': """
+        plant_id INTEGER PRIMARY KEY,
+        plant_name VARCHAR UNIQUE,
+        region VARCHAR
+    """,
+    'dim_line': """
+        line_id INTEGER PRIMARY KEY,
+        line VARCHAR UNIQUE
+    """,
+    'dim_equipment': """
+        equipment_id INTEGER PRIMARY KEY,
+        equipment VARCHAR UNIQUE
+    """,
+    'dim_region': """
+        region_id INTEGER PRIMARY KEY,
+        region VARCHAR UNIQUE
+    """,
+    'fact_production': """
+        date DATE,
+        plant_id INTEGER,
+        line_id INTEGER,
+        cement_mt DOUBLE,
+        clinker_mt DOUBLE,
+        capacity_util_pct DOUBLE,
+        downtime_hrs DOUBLE
+    """,
+    'fact_energy': """
+        date DATE,
+        plant_id INTEGER,
+        power_kwh_ton DOUBLE,
+        heat_kcal_kg DOUBLE,
+        fuel_cost_rs_ton DOUBLE,
+        afr_pct DOUBLE
+    """,
+    'fact_maintenance': """
+        date DATE,
+        plant_id INTEGER,
+        equipment_id INTEGER,
+        breakdown_hrs DOUBLE,
+        mtbf_hrs DOUBLE,
+        mttr_hrs DOUBLE
+    """,
+    'fact_quality': """
+        date DATE,
+        plant_id INTEGER,
+        blaine DOUBLE,
+        strength_28d DOUBLE,
+        clinker_factor DOUBLE
+    """,
+    'fact_sales': """
+        date DATE,
+        plant_id INTEGER,
+        region_id INTEGER,
+        dispatch_mt DOUBLE,
+        realization_rs_ton DOUBLE,
+        freight_rs_ton DOUBLE,
+        otif_pct DOUBLE
+    """,
+    'fact_finance': """
+        date DATE,
+        plant_id INTEGER,
+        cost_rs_ton DOUBLE,
+        ebitda_rs_ton DOUBLE,
+        margin_pct DOUBLE
+    """
+}
+
+# Text attribute -> (dimension, id column). The dimension holds the text under
+# the attribute's own name; facts store only the id and queries join back to
+# the name in their final projection.
+DIMENSION_IDS = {
+    'plant_name': ('dim_plant', 'plant_id'),
+    'line': ('dim_line', 'line_id'),
+    'equipment': ('dim_equipment', 'equipment_id'),
+    'region': ('dim_region', 'region_id')
+}
+
+DIMENSIONS = ['dim_date'] + [dim for dim, _ in DIMENSION_IDS.values()]
+
+FACT_TABLES = [table for table in STAR_TABLES if table not in DIMENSIONS]
+
+def table_columns(table: str) -> list:
+    """Column names of star schema table ``table``, in order"""
+    return [line.split()[0] for line in STAR_TABLES[table].strip().splitlines()]
+
+# Physical row order of the fact and rollup tables. Date first, so the rows of
+# a date window sit in a few row groups and scans skip the rest by min/max.
+CLUSTER_KEYS = {
+    'fact_production': 'date, plant_id, line_id',
+    'fact_energy': 'date, plant_id',
+    'fact_maintenance': 'date, plant_id, equipment_id',
+    'fact_quality': 'date, plant_id',
+    'fact_sales': 'date, plant_id, region_id',
+    'fact_finance': 'date, plant_id',
+    DAILY_ROLLUP: 'date, plant_id',
+    MONTHLY_ROLLUP: 'month_start, plant_id'
+}
+
+def plant_filter(column: str = 'plant_id') -> str:
+    """Condition matching the rows of the plant named by the $plant parameter on the plant id ``column``
+    ('all' matches every row; DuckDB folds the test away once $plant is bound)"""
+    return f"($plant = 'all' OR {column} = (SELECT plant_id FROM dim_plant WHERE plant_name = $plant))"
+
+def plants_filter(column: str = 'plant_id') -> str:
+    """Condition matching the rows of the plants named in the $plants list parameter on the plant id ``column``"""
+    return f"{column} IN (SELECT plant_id FROM dim_plant WHERE list_contains($plants, plant_name))"
+
+def create_table(conn, table: str, name: str = None):
+    """Create star schema table ``table`` (under ``name`` if given, e.g. a shadow copy)"""
+    conn.execute(f"CREATE TABLE {name or table} ({STAR_TABLES[table]})")
+
+def is_view(conn, name: str) -> bool:
+    """True when ``name`` is a view (a fact table kept in the lake)"""
+    return conn.execute(f"SELECT COUNT(*) FROM duckdb_views() WHERE view_name = '{name}' "
+                        f"AND database_name = current_database()").fetchall()[0][0] > 0
+
+def drop_table(conn, name: str):
+    """Drop table or lake view ``name`` if it exists"""
+    conn.execute(f"DROP {'VIEW' if is_view(conn, name) else 'TABLE'} IF EXISTS {name}")
+
+def _create_star_schema(conn):
+    """Drop and recreate the star schema tables (fact tables as views over the lake when it is enabled)"""
+    for table in STAR_TABLES:
+        drop_table(conn, table)
+    for table in STAR_TABLES:
+        create_table(conn, table)
+    if LAKE_ENABLED:
+        load_lake(conn, {table: table_columns(table) for table in FACT_TABLES}, DIMENSIONS)
     
-    conn.execute("""
-        CREATE TABLE fact_finance (
-            date DATE,
-            plant_name VARCHAR,
-            cost_rs_ton DOUBLE,
-            ebitda_rs_ton DOUBLE,
-            margin_pct DOUBLE
+    # Empty rollups, so dashboards work before the first upload
+    build_rollups(conn)
+
+SCHEMA_VERSION_TABLE = 'schema_version'
+
+def _objects(conn) -> set:
+    """Names of the tables and views in the warehouse"""
+    return {name for (name,) in conn.execute("""
+        SELECT table_name FROM duckdb_tables() WHERE database_name = current_database()
+        UNION ALL
+        SELECT view_name FROM duckdb_views() WHERE database_name = current_database() AND NOT internal
+    """).fetchall()}
+
+def _stored_columns(conn, table: str) -> list:
+    return [name for (name,) in conn.execute(f"""
+        SELECT column_name FROM duckdb_columns()
+        WHERE database_name = current_database() AND table_name = '{table}'
+        ORDER BY column_index
+    """).fetchall()]
+
+def _recreate_changed_tables(conn):
+    """Drop the star schema tables whose columns differ from STAR_TABLES and rebuild the rollups.
+
+    Until the schema was versioned it was dropped on every start, so tables
+    of an older layout (e.g. plant names in the fact tables) hold nothing to
+    keep; _ensure_schema creates them anew.
+    """
+    existing = _objects(conn)
+    for table in STAR_TABLES:
+        if table in existing and not is_view(conn, table) and _stored_columns(conn, table) != table_columns(table):
+            logger.info(f"Recreating {table}: its columns predate schema version 1")
+            conn.execute(f"DROP TABLE {table}")
+    for rollup in (DAILY_ROLLUP, MONTHLY_ROLLUP):
+        conn.execute(f"DROP TABLE IF EXISTS {rollup}")
+
+# Ordered (version, description, function) steps. Each runs once, in the
+# transaction that records it in schema_version; objects still missing
+# afterwards are created by _ensure_schema on every start.
+MIGRATIONS = [
+    (1, 'Star schema keyed on dimension ids', _recreate_changed_tables),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def _ensure_version_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR,
+            applied_at TIMESTAMP
         )
     """)
-    
-    conn.close()
-    print("Star schema initialized successfully")
+
+def schema_version(conn) -> int:
+    """Latest migration applied to the warehouse, 0 for an unversioned one"""
+    if SCHEMA_VERSION_TABLE not in _objects(conn):
+        return 0
+    return conn.execute(f"SELECT COALESCE(MAX(version), 0) FROM {SCHEMA_VERSION_TABLE}").fetchall()[0][0]
+
+def _ensure_schema(conn):
+    """Create the star schema objects that are missing, leaving existing ones and their rows alone.
+
+    Missing tables are created empty. With the lake enabled, fact tables
+    still held in the database are replaced by views over the lake (see
+    load_lake). The rollups are rebuilt only when they are missing or the
+    facts under them changed here.
+    """
+    existing = _objects(conn)
+    created = [table for table in STAR_TABLES if table not in existing]
+    for table in created:
+        create_table(conn, table)
+    facts = [table for table in FACT_TABLES if not is_view(conn, table)] if LAKE_ENABLED else []
+    if facts:
+        load_lake(conn, {table: table_columns(table) for table in facts}, DIMENSIONS)
+    if created or facts or not {DAILY_ROLLUP, MONTHLY_ROLLUP} <= existing:
+        build_rollups(conn)
+    if created:
+        logger.info(f"Created missing tables {', '.join(created)}")
+
+def migrate(conn) -> int:
+    """Apply the pending MIGRATIONS and create missing objects; returns the schema version"""
+    _ensure_version_table(conn)
+    current = schema_version(conn)
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            step(conn)
+            conn.execute(f"INSERT INTO {SCHEMA_VERSION_TABLE} VALUES (?, ?, current_timestamp)", [version, description])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info(f"Migrated the warehouse to schema version {version}: {description}")
+        current = version
+    _ensure_schema(conn)
+    return current
 
 if __name__ == "__main__":
-    init_star_schema()
+    # python database.py applies pending migrations; python database.py reset empties the warehouse
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] == ['reset']:
+        reset_star_schema()
+    elif sys.argv[1:]:
+        sys.exit("usage: python database.py [reset]")
+    else:
+        init_star_schema()
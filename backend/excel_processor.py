@@ -1,11 +1,20 @@
-import pandas as pd
-import openpyxl
-from datetime import datetime
-from typing import Dict, List, Any
+import os
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Tuple
 import logging
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# openpyxl and pandas are imported on first use: the API imports this module
+# at startup, and only uploads need them
+
 EXPECTED_SHEETS = {
     'Production': ['Date', 'Plant', 'Line', 'Cement_MT', 'Clinker_MT', 'Capacity_Util_%', 'Downtime_Hrs'],
     'Energy': ['Date', 'Plant', 'Power_kWh_Ton', 'Heat_kcal_kg', 'Fuel_Cost_Rs_Ton', 'AFR_%'],
@@ -15,13 +24,161 @@ EXPECTED_SHEETS = {
     'Finance': ['Date', 'Plant', 'Cost_Rs_Ton', 'EBITDA_Rs_Ton', 'Margin_%']
 }
 
+# Fact tables and columns are the lower-cased sheet and header names ('%' -> 'pct'), except:
+TABLE_NAMES = {'Sales_Logistics': 'fact_sales'}
+COLUMN_NAMES = {'Plant': 'plant_name'}
+
+# Text columns; Date is a DATE and every other column a DOUBLE
+TEXT_COLUMNS = {'Plant', 'Line', 'Equipment', 'Region'}
+
+# Columns that, with Date and Plant, identify one fact row
+KEY_COLUMNS = {'Line', 'Equipment'}
+
+def _mapping(sheet_name: str, headers: List[str]) -> Dict[str, Any]:
+    columns = [(header,
+                COLUMN_NAMES.get(header, header.lower().replace('%', 'pct')),
+                'DATE' if header == 'Date' else 'VARCHAR' if header in TEXT_COLUMNS else 'DOUBLE')
+               for header in headers]
+    return {
+        'table': TABLE_NAMES.get(sheet_name, f"fact_{sheet_name.lower()}"),
+        'columns': [column for _, column, _ in columns],
+        'types': [sql_type for _, _, sql_type in columns],
+        'headers': headers,
+        'key': [column for header, column, _ in columns if header in ('Date', 'Plant') or header in KEY_COLUMNS]
+    }
+
+# sheet -> how it loads into its fact table:
+#   table:   the fact table
+#   headers: sheet columns read, in EXPECTED_SHEETS order
+#   columns: the fact table column each header loads into
+#   types:   DuckDB type of each column
+#   key:     columns identifying one fact row (the merge key)
+SHEET_MAPPINGS: Dict[str, Dict[str, Any]] = {sheet: _mapping(sheet, headers) for sheet, headers in EXPECTED_SHEETS.items()}
+
+# Rows handed to the loader at a time; bounds memory whatever the file size
+EXCEL_CHUNK_ROWS = int(os.getenv("EXCEL_CHUNK_ROWS", "10000"))
+
+def _to_date(value) -> Optional[date]:
+    """Cell value as a date, None when it is not one (what pd.to_datetime(errors='coerce') dropped)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value.strip():
+        import pandas as pd
+        parsed = pd.to_datetime(value.strip(), errors='coerce')
+        return None if pd.isna(parsed) else parsed.date()
+    return None
+
+def _to_number(value) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        raise ValueError(f"not a number: {value!r}")
+
+def _to_text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+CONVERTERS = {'DATE': _to_date, 'DOUBLE': _to_number, 'VARCHAR': _to_text}
+
+# Cell types each column type takes as they are; any other cell goes through CONVERTERS
+NATIVE_TYPES = {
+    'DATE': {datetime, date, type(None)},
+    'DOUBLE': {int, float, type(None)},
+    'VARCHAR': {str, type(None)}
+}
+if ARROW_AVAILABLE:
+    ARROW_TYPES = {'DATE': pa.date32(), 'DOUBLE': pa.float64(), 'VARCHAR': pa.string()}
+
+def _convert(values: Sequence, sql_type: str, first_line: int, dated: Optional[List[bool]] = None) -> List:
+    """Cell values converted one at a time; rows not marked ``dated`` are left None unchecked"""
+    convert = CONVERTERS[sql_type]
+    converted = []
+    for i, value in enumerate(values):
+        if dated is not None and not dated[i]:
+            converted.append(None)
+            continue
+        try:
+            converted.append(convert(value))
+        except ValueError as e:
+            raise ValueError(f"row {first_line + i}: {e}")
+    return converted
+
+def _typed_chunk(mapping: Dict[str, Any], columns: List[Sequence], first_line: int):
+    """Rows of a chunk with a valid date, typed per ``mapping``, from one value tuple per column.
+
+    An Arrow table (a DataFrame without pyarrow) with the fact column names.
+    A column whose cells all have their native type (numbers, datetimes,
+    text) is cast by pyarrow in one call; the others, such as text dates or
+    numbers typed as text, are converted cell by cell.
+    """
+    names, types = mapping['columns'], mapping['types']
+    date_index = types.index('DATE')
+    dates = columns[date_index]
+    if not ARROW_AVAILABLE or not set(map(type, dates)) <= NATIVE_TYPES['DATE']:
+        dates = _convert(dates, 'DATE', first_line)
+    dated = None
+    if None in dates:
+        dated = [day is not None for day in dates]
+
+    if not ARROW_AVAILABLE:
+        import pandas as pd
+        frame = pd.DataFrame({name: dates if i == date_index else _convert(values, sql_type, first_line, dated)
+                              for i, (name, values, sql_type) in enumerate(zip(names, columns, types))})
+        return frame if dated is None else frame[dated].reset_index(drop=True)
+
+    arrays = []
+    for i, (values, sql_type) in enumerate(zip(columns, types)):
+        if i == date_index:
+            values = dates
+        elif not set(map(type, values)) <= NATIVE_TYPES[sql_type]:
+            values = _convert(values, sql_type, first_line, dated)
+        arrays.append(pa.array(values, type=ARROW_TYPES[sql_type]))
+    frame = pa.table(dict(zip(names, arrays)))
+    return frame if dated is None else frame.filter(pa.array(dated))
+
+def _chunk_stats(frame) -> Tuple[Optional[date], Optional[date], set]:
+    """(first date, last date, plants) of a typed chunk"""
+    if not len(frame):
+        return None, None, set()
+    if not ARROW_AVAILABLE:
+        return frame['date'].min(), frame['date'].max(), set(frame['plant_name'].dropna())
+    span = pc.min_max(frame['date'])
+    plants = set(pc.unique(frame['plant_name']).drop_null().to_pylist())
+    return span['min'].as_py(), span['max'].as_py(), plants
+
+def _preview_value(value):
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
 class ExcelProcessor:
-    def __init__(self, file_path: str):
+    """Single streaming pass over an uploaded workbook.
+
+    The workbook is opened read-only, so openpyxl parses each sheet's XML as
+    rows are requested instead of loading every cell. iter_chunks() hands out
+    one sheet EXCEL_CHUNK_ROWS rows at a time, cast column by column to the
+    types of its SHEET_MAPPINGS entry, collecting the preview rows and stats
+    for the upload response on the way.
+    """
+
+    def __init__(self, file_path: str, preview_rows: int = 5):
+        import openpyxl
         self.file_path = file_path
-        self.workbook = openpyxl.load_workbook(file_path, data_only=True)
+        self.workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        self.preview_rows = preview_rows
         self.validation_errors = []
-        self.sheets_data = {}
-    
+        self.preview: Dict[str, List[Dict]] = {}
+        self.stats: Dict[str, Any] = {'rowsPerSheet': {}, 'dateRange': {}, 'plants': []}
+        self._plants = set()
+
+    def close(self):
+        self.workbook.close()
+
     def validate_structure(self) -> Dict[str, Any]:
         """Validate Excel structure and return validation results"""
         results = {
@@ -31,88 +188,94 @@ class ExcelProcessor:
             'sheets_found': [],
             'mapping_suggestions': {}
         }
-        
+
         available_sheets = self.workbook.sheetnames
         results['sheets_found'] = available_sheets
-        
+
         # Check for expected sheets
         for expected_sheet in EXPECTED_SHEETS.keys():
             if expected_sheet not in available_sheets:
                 results['warnings'].append(f"Sheet '{expected_sheet}' not found")
-        
+
         return results
-    
-    def read_and_validate_data(self) -> Dict[str, pd.DataFrame]:
-        """Read all sheets and validate data"""
-        data = {}
-        
-        for sheet_name in EXPECTED_SHEETS.keys():
-            if sheet_name in self.workbook.sheetnames:
-                try:
-                    df = pd.read_excel(self.file_path, sheet_name=sheet_name)
-                    
-                    # Normalize column names
-                    df.columns = df.columns.str.strip()
-                    
-                    # Convert Date column
-                    if 'Date' in df.columns:
-                        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-                    
-                    # Remove rows with missing dates
-                    df = df.dropna(subset=['Date'])
-                    
-                    data[sheet_name] = df
-                    logger.info(f"Sheet '{sheet_name}' loaded: {len(df)} rows")
-                except Exception as e:
-                    logger.error(f"Error reading sheet '{sheet_name}': {str(e)}")
-                    self.validation_errors.append(f"Sheet '{sheet_name}': {str(e)}")
-        
-        return data
-    
-    def get_preview_data(self, max_rows: int = 10) -> Dict[str, List[Dict]]:
-        """Get preview of data from each sheet"""
-        preview = {}
-        data = self.read_and_validate_data()
-        
-        for sheet_name, df in data.items():
-            preview[sheet_name] = df.head(max_rows).to_dict('records')
-            # Convert datetime to string for JSON serialization
-            for row in preview[sheet_name]:
-                for key, value in row.items():
-                    if pd.isna(value):
-                        row[key] = None
-                    elif isinstance(value, pd.Timestamp):
-                        row[key] = value.strftime('%Y-%m-%d')
-                    elif isinstance(value, (pd.Int64Dtype, int)):
-                        row[key] = int(value)
-                    elif isinstance(value, float):
-                        row[key] = float(value)
-        
-        return preview
-    
+
+    def sheets(self) -> List[str]:
+        """Expected sheets present in the workbook, in load order"""
+        return [name for name in EXPECTED_SHEETS if name in self.workbook.sheetnames]
+
+    def iter_chunks(self, sheet_name: str, chunk_rows: int = EXCEL_CHUNK_ROWS) -> Iterator[Any]:
+        """Typed frames of ``sheet_name``'s rows (see _typed_chunk), ``chunk_rows`` rows at a time.
+
+        Rows without a valid date are skipped. Raises ValueError when the
+        sheet lacks an expected column or a numeric cell holds text.
+        """
+        mapping = SHEET_MAPPINGS[sheet_name]
+        worksheet = self.workbook[sheet_name]
+        # Files without a <dimension> record would otherwise be parsed twice, once just to size the sheet
+        worksheet.reset_dimensions()
+        rows = worksheet.iter_rows(values_only=True)
+        header = [str(name).strip() if name is not None else '' for name in next(rows, ())]
+        missing = [name for name in mapping['headers'] if name not in header]
+        if missing:
+            raise ValueError(f"missing columns {', '.join(missing)}")
+        positions = [header.index(name) for name in mapping['headers']]
+        date_pos = header.index('Date')
+        width = len(header)
+
+        preview = self.preview.setdefault(sheet_name, [])
+
+        def raw_chunks():
+            """(first line, rows) of up to chunk_rows rows, collecting the preview on the way"""
+            buffer, first_line = [], 2
+            for line, cells in enumerate(rows, start=2):
+                if len(cells) < width:
+                    cells = cells + (None,) * (width - len(cells))
+                if len(preview) < self.preview_rows:
+                    day = _to_date(cells[date_pos])
+                    if day is not None:
+                        record = {name: _preview_value(cells[i]) for i, name in enumerate(header) if name}
+                        record['Date'] = day.strftime('%Y-%m-%d')
+                        preview.append(record)
+                buffer.append(cells)
+                if len(buffer) >= chunk_rows:
+                    yield first_line, buffer
+                    buffer, first_line = [], line + 1
+            if buffer:
+                yield first_line, buffer
+
+        count = 0
+        first = last = None
+        plants = set()
+        for first_line, buffer in raw_chunks():
+            # Rows to columns in one zip, then one cast per column
+            by_column = list(zip(*buffer))
+            frame = _typed_chunk(mapping, [by_column[pos] for pos in positions], first_line)
+            chunk_first, chunk_last, chunk_plants = _chunk_stats(frame)
+            if chunk_first is not None:
+                first = chunk_first if first is None else min(first, chunk_first)
+                last = chunk_last if last is None else max(last, chunk_last)
+            plants |= chunk_plants
+            count += len(frame)
+            yield frame
+
+        # Only sheets that streamed completely count towards the stats
+        self.stats['rowsPerSheet'][sheet_name] = count
+        if first is not None:
+            self.stats['dateRange'][sheet_name] = {'start': first.strftime('%Y-%m-%d'), 'end': last.strftime('%Y-%m-%d')}
+        self._plants |= plants
+        self.stats['plants'] = sorted(self._plants)
+        logger.info(f"Sheet '{sheet_name}' streamed: {count} rows")
+
+    def skip_sheet(self, sheet_name: str, error: Exception):
+        """Record a sheet that failed to load so it is left out of the preview and stats"""
+        logger.error(f"Error reading sheet '{sheet_name}': {str(error)}")
+        self.validation_errors.append(f"Sheet '{sheet_name}': {str(error)}")
+        self.preview.pop(sheet_name, None)
+
+    def get_preview_data(self) -> Dict[str, List[Dict]]:
+        """Preview rows collected while streaming"""
+        return self.preview
+
     def get_stats(self) -> Dict[str, Any]:
-        """Get statistics about the data"""
-        data = self.read_and_validate_data()
-        stats = {
-            'rowsPerSheet': {},
-            'dateRange': {},
-            'plants': []
-        }
-        
-        all_plants = set()
-        
-        for sheet_name, df in data.items():
-            stats['rowsPerSheet'][sheet_name] = len(df)
-            
-            if 'Date' in df.columns and len(df) > 0:
-                stats['dateRange'][sheet_name] = {
-                    'start': df['Date'].min().strftime('%Y-%m-%d'),
-                    'end': df['Date'].max().strftime('%Y-%m-%d')
-                }
-            
-            if 'Plant' in df.columns:
-                all_plants.update(df['Plant'].dropna().unique().tolist())
-        
-        stats['plants'] = sorted(list(all_plants))
-        
-        return stats
+        """Statistics collected while streaming"""
+        return self.stats
@@ -0,0 +1,138 @@
+"""Conditional GET and precompressed bodies for responses that only change with the warehouse data.
+
+A response's strong ETag is built from the data version and the normalized
+request parameters, so a request whose If-None-Match holds it is answered
+304 before any query runs. Full responses are rendered once per data version
+and kept in the result cache as an EncodedBody: the body plus, for large
+ones, its gzip and (with the brotli package) brotli encodings, served in the
+encoding the client accepts. Each encoding has its own ETag, the data one
+with a suffix, as strong validators must differ between representations.
+"""
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from result_cache import cached_query, normalize_params
+from database import get_data_version
+from profiling import traced
+from serialization import dumps
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Bodies from this size on are stored compressed too
+PRECOMPRESS_MIN_BYTES = int(os.getenv("PRECOMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Encodings in the order they are preferred when the client accepts several
+ENCODINGS = ['br', 'gzip']
+
+class EncodedBody:
+    """A rendered response body and its precompressed encodings"""
+
+    def __init__(self, body: bytes, media_type: str = JSON_MEDIA_TYPE):
+        self.media_type = media_type
+        self.encodings = {'identity': body}
+        if len(body) >= PRECOMPRESS_MIN_BYTES:
+            self.encodings['gzip'] = gzip.compress(body, GZIP_LEVEL)
+            if BROTLI_AVAILABLE:
+                self.encodings['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+        # read by the result cache's memory budget
+        self.nbytes = sum(len(encoded) for encoded in self.encodings.values())
+
+    def select(self, accept_encoding: str) -> str:
+        """The stored encoding to send for an Accept-Encoding header"""
+        accepted = _accepted(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in self.encodings and (encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
+
+def _accepted(accept_encoding: str) -> set:
+    """Content codings an Accept-Encoding header accepts (q > 0)"""
+    accepted = set()
+    for item in accept_encoding.split(','):
+        coding, *options = [part.strip() for part in item.split(';')]
+        q = 1.0
+        for option in options:
+            name, _, value = option.partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+def etag(endpoint: str, params: Dict[str, Any], version: Any) -> str:
+    """Strong ETag of an endpoint's response to ``params`` at data ``version``"""
+    digest = hashlib.sha1(json.dumps([endpoint, params], sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+def _encoded_tag(tag: str, encoding: str) -> str:
+    return tag if encoding == 'identity' else f'{tag[:-1]}-{encoding}"'
+
+def not_modified(request: Request, tag: str) -> Optional[str]:
+    """The ETag the request's If-None-Match holds of ``tag`` (in any encoding), None when it holds none"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return None
+    variants = {tag} | {_encoded_tag(tag, encoding) for encoding in ENCODINGS}
+    for candidate in header.split(','):
+        # If-None-Match compares weakly: W/"x" matches "x"
+        candidate = candidate.strip().removeprefix('W/')
+        if candidate == '*':
+            return tag
+        if candidate in variants:
+            return candidate
+    return None
+
+def not_modified_response(tag: str) -> Response:
+    return Response(status_code=304, headers=_headers(tag))
+
+def _headers(tag: str) -> Dict[str, str]:
+    # no-cache: clients may keep the response but must revalidate it on every use
+    return {'ETag': tag, 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'}
+
+def encoded_response(request: Request, body: EncodedBody, tag: str) -> Response:
+    """``body`` in the encoding the request accepts, with its ETag"""
+    encoding = body.select(request.headers.get('accept-encoding', ''))
+    headers = _headers(_encoded_tag(tag, encoding))
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(body.encodings[encoding], media_type=body.media_type, headers=headers)
+
+def _rendered(compute: Callable, media_type: str) -> Callable:
+    def render(**params) -> EncodedBody:
+        value = compute(**params)
+        return EncodedBody(value if isinstance(value, bytes) else dumps(value).encode('utf-8'), media_type)
+    return render
+
+async def conditional_response(request: Request, endpoint: str, compute: Callable,
+                               media_type: str = JSON_MEDIA_TYPE, **params) -> Response:
+    """Serve ``compute(**params)`` with an ETag: 304 when the client's copy is current, else the
+    rendered body from the result cache (computed and encoded on the query pool on a miss).
+
+    ``compute`` returns bytes, or a value rendered as JSON (RawJSON fragments
+    spliced in).
+    """
+    params = normalize_params(params)
+    tag = etag(endpoint, params, get_data_version())
+    # a traced request runs its queries whatever the client holds
+    current = None if traced() else not_modified(request, tag)
+    if current:
+        return not_modified_response(current)
+    body = await cached_query(endpoint, _rendered(compute, media_type), **params)
+    return encoded_response(request, body, tag)
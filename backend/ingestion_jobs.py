@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from excel_processor import ExcelProcessor
+from data_ingestion import ingest_workbook, recluster_tables
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for /api/jobs/{id}; older ones are forgotten
+INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "50"))
+
+class IngestionJobs:
+    """Background parse-and-ingest of uploaded workbooks.
+
+    /api/upload saves the file and submits it here, getting a job id back
+    straight away. A single worker thread runs the jobs one at a time in
+    submission order, so concurrent uploads never interleave their sheet
+    replacements, and the event loop never runs parse or ingest work. Each
+    job records per-sheet progress (rows read, rows written) for polling.
+    Maintenance jobs (recluster) run on the same worker, between uploads.
+    """
+
+    def __init__(self, history: int = INGEST_JOB_HISTORY):
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _add(self, filename: Optional[str], mode: str) -> str:
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'filename': filename,
+            'mode': mode,
+            'status': 'queued',
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'sheets': {},
+            'result': None,
+            'error': None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+        return job_id
+
+    def submit(self, file_path: str, filename: str, mode: str = 'replace') -> Dict[str, Any]:
+        """Queue ``file_path`` for ingestion in ``mode``; the job owns (and deletes) the file"""
+        job_id = self._add(filename, mode)
+        self._executor.submit(self._run, job_id, file_path, mode)
+        logger.info(f"Queued ingestion job {job_id} for {filename}")
+        return self.get(job_id)
+
+    def submit_recluster(self, tables: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Queue a rewrite of ``tables`` (default all) in their cluster order"""
+        job_id = self._add(None, 'recluster')
+        self._executor.submit(self._run_recluster, job_id, tables)
+        logger.info(f"Queued recluster job {job_id}")
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job, None when unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+            snapshot['sheets'] = {name: dict(progress) for name, progress in job['sheets'].items()}
+            return snapshot
+
+    def stats(self) -> Dict[str, int]:
+        """Job counts by status"""
+        counts = {'queued': 0, 'running': 0, 'succeeded': 0, 'failed': 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+        return counts
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _progress(self, job_id: str, sheet_name: str, rows_read: int, rows_written: int):
+        with self._lock:
+            self._jobs[job_id]['sheets'][sheet_name] = {'rows_read': rows_read, 'rows_written': rows_written}
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('succeeded', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _run(self, job_id: str, file_path: str, mode: str):
+        self._update(job_id, status='running', started_at=time.time())
+        processor = None
+        try:
+            processor = ExcelProcessor(file_path, preview_rows=5)
+            validation = processor.validate_structure()
+            changes = ingest_workbook(processor, progress=lambda *args: self._progress(job_id, *args), mode=mode)
+            validation['errors'] += processor.validation_errors
+            self._update(job_id, status='succeeded', finished_at=time.time(), result={
+                'message': 'Data uploaded and ingested successfully',
+                'preview': processor.get_preview_data(),
+                'mapping': validation,
+                'stats': processor.get_stats(),
+                'changes': changes
+            })
+            logger.info(f"Ingestion job {job_id} finished")
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {str(e)}")
+            self._update(job_id, status='failed', finished_at=time.time(), error=f"Error processing file: {str(e)}")
+        finally:
+            if processor is not None:
+                processor.close()
+            try:
+                os.unlink(file_path)
+            except OSError:
+                pass
+            with self._lock:
+                self._prune()
+
+    def _run_recluster(self, job_id: str, tables: Optional[List[str]]):
+        self._update(job_id, status='running', started_at=time.time())
+        try:
+            result = recluster_tables(tables)
+            self._update(job_id, status='succeeded', finished_at=time.time(), result={
+                'message': 'Tables reclustered',
+                'tables': result
+            })
+            logger.info(f"Recluster job {job_id} finished")
+        except Exception as e:
+            logger.error(f"Recluster job {job_id} failed: {str(e)}")
+            self._update(job_id, status='failed', finished_at=time.time(), error=f"Error reclustering: {str(e)}")
+        finally:
+            with self._lock:
+                self._prune()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Ingestion worker stopped")
+
+ingestion_jobs = IngestionJobs()
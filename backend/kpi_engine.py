@@ -0,0 +1,144 @@
+"""Role KPI queries planned as pre-aggregate-then-join.
+
+Joining fact_production (one row per line per day) to the other fact tables on
+(date, plant_name) multiplies rows: SUM(cement_mt) is counted once per matching
+finance/energy/... row, and maintenance (one row per equipment) multiplies it
+again. Instead, every fact table is first aggregated to (date, plant) grain on
+its own -- that is exactly rollup_plant_daily -- and the role's metrics are
+combined from those per-domain aggregates:
+
+* the role's driving domain selects the plant-days in the filter (the FROM
+  table of the old LEFT JOIN query);
+* SUM/AVG/MIN/MAX of any domain are taken over that domain's own rows on those
+  plant-days, so each fact row counts exactly once.
+"""
+from typing import Any, Dict, List, Tuple
+
+from database import plant_filter, plants_filter
+from metrics import timed_query
+from queries import query, register
+from rollups import DAILY_ROLLUP, ROLLUP_DOMAINS, avg_expr, sum_expr
+from serialization import fetch_records, fetch_row
+
+# role -> (driving domain, [(kpi name, aggregate, fact column)])
+KPI_SPECS: Dict[str, Tuple[str, List[Tuple[str, str, str]]]] = {
+    # Strategic: Financial, Value Creation, Risk
+    'CXO': ('production', [
+        ('total_cement_mt', 'sum', 'cement_mt'),
+        ('total_clinker_mt', 'sum', 'clinker_mt'),
+        ('avg_ebitda_ton', 'avg', 'ebitda_rs_ton'),
+        ('avg_cost_ton', 'avg', 'cost_rs_ton'),
+        ('avg_margin_pct', 'avg', 'margin_pct'),
+        ('avg_power_kwh_ton', 'avg', 'power_kwh_ton'),
+        ('avg_clinker_factor', 'avg', 'clinker_factor'),
+        ('avg_capacity_util', 'avg', 'capacity_util_pct'),
+        ('avg_realization_ton', 'avg', 'realization_rs_ton'),
+        ('avg_freight_ton', 'avg', 'freight_rs_ton'),
+        ('avg_otif_pct', 'avg', 'otif_pct'),
+        ('avg_afr_pct', 'avg', 'afr_pct')
+    ]),
+    # Operations: Production, Equipment, Quality, Loss Management
+    'Plant Head': ('production', [
+        ('total_cement_mt', 'sum', 'cement_mt'),
+        ('avg_daily_cement', 'avg', 'cement_mt'),
+        ('total_clinker_mt', 'sum', 'clinker_mt'),
+        ('avg_capacity_util', 'avg', 'capacity_util_pct'),
+        ('avg_downtime_hrs', 'avg', 'downtime_hrs'),
+        ('avg_blaine', 'avg', 'blaine'),
+        ('avg_strength_28d', 'avg', 'strength_28d'),
+        ('avg_clinker_factor', 'avg', 'clinker_factor'),
+        ('avg_breakdown_hrs', 'avg', 'breakdown_hrs'),
+        ('avg_mtbf_hrs', 'avg', 'mtbf_hrs'),
+        ('avg_mttr_hrs', 'avg', 'mttr_hrs')
+    ]),
+    # Energy: Cost Reduction, Sustainability, Optimization
+    'Energy Manager': ('energy', [
+        ('avg_power_kwh_ton', 'avg', 'power_kwh_ton'),
+        ('avg_heat_kcal_kg', 'avg', 'heat_kcal_kg'),
+        ('avg_fuel_cost_ton', 'avg', 'fuel_cost_rs_ton'),
+        ('avg_afr_pct', 'avg', 'afr_pct'),
+        ('max_power_kwh_ton', 'max', 'power_kwh_ton'),
+        ('min_power_kwh_ton', 'min', 'power_kwh_ton'),
+        ('max_heat_kcal_kg', 'max', 'heat_kcal_kg'),
+        ('min_heat_kcal_kg', 'min', 'heat_kcal_kg'),
+        ('total_cement_mt', 'sum', 'cement_mt')
+    ]),
+    # Sales: Margin, Pricing, Logistics, Market
+    'Sales': ('sales', [
+        ('total_dispatch_mt', 'sum', 'dispatch_mt'),
+        ('avg_realization_ton', 'avg', 'realization_rs_ton'),
+        ('avg_freight_ton', 'avg', 'freight_rs_ton'),
+        ('avg_otif_pct', 'avg', 'otif_pct'),
+        ('avg_margin_pct', 'avg', 'margin_pct'),
+        ('avg_ebitda_ton', 'avg', 'ebitda_rs_ton'),
+        ('max_realization_ton', 'max', 'realization_rs_ton'),
+        ('min_realization_ton', 'min', 'realization_rs_ton')
+    ]),
+    # Default view for any other role
+    'default': ('production', [
+        ('total_cement_mt', 'sum', 'cement_mt'),
+        ('avg_ebitda_ton', 'avg', 'ebitda_rs_ton'),
+        ('avg_power_kwh_ton', 'avg', 'power_kwh_ton'),
+        ('avg_margin_pct', 'avg', 'margin_pct')
+    ])
+}
+
+def kpi_spec(role: str) -> Tuple[str, List[Tuple[str, str, str]]]:
+    """Driving domain and metric list for a role"""
+    return KPI_SPECS.get(role, KPI_SPECS['default'])
+
+def metric_expr(aggregate: str, column: str) -> str:
+    """SQL over rollup_plant_daily for one fact-level aggregate"""
+    if aggregate == 'sum':
+        return sum_expr(column)
+    if aggregate == 'avg':
+        return avg_expr(column)
+    if aggregate in ('min', 'max'):
+        minmax = {col for _, _, cols in ROLLUP_DOMAINS.values() for col in cols}
+        if column not in minmax:
+            raise ValueError(f"Rollups keep no {aggregate} for '{column}'")
+        return f"{aggregate.upper()}({column}_{aggregate})"
+    raise ValueError(f"Unsupported KPI aggregate '{aggregate}'")
+
+def build_kpi_query(role: str) -> str:
+    """SQL producing one row with the role's KPI aggregates over $start..$end for $plant"""
+    driving, metrics = kpi_spec(role)
+    select = ',\n                '.join(f"{metric_expr(agg, col)} as {name}" for name, agg, col in metrics)
+    return f"""
+            SELECT
+                {select}
+            FROM {DAILY_ROLLUP}
+            WHERE {driving}_rows > 0 AND date >= $start::DATE AND date <= $end::DATE AND {plant_filter()}
+        """
+
+def build_plant_kpi_query(role: str) -> str:
+    """SQL producing one row per plant in $plants with the role's KPI aggregates over $start..$end"""
+    driving, metrics = kpi_spec(role)
+    select = ',\n                    '.join(f"{metric_expr(agg, col)} as {name}" for name, agg, col in metrics)
+    return f"""
+            SELECT p.plant_name, k.* EXCLUDE (plant_id)
+            FROM (
+                SELECT
+                    plant_id,
+                    {select}
+                FROM {DAILY_ROLLUP}
+                WHERE {driving}_rows > 0 AND date >= $start::DATE AND date <= $end::DATE AND {plants_filter()}
+                GROUP BY plant_id
+            ) k
+            JOIN dim_plant p USING (plant_id)
+        """
+
+for role in KPI_SPECS:
+    register(f"kpis:{role}", build_kpi_query(role))
+    register(f"plant_kpis:{role}", build_plant_kpi_query(role))
+
+def compute_kpi_row(conn, role: str, start: str, end: str, plant: str) -> Dict[str, Any]:
+    """Role KPI aggregates as a dict (NULL when nothing matched)"""
+    sql, params = query(f"kpis:{role if role in KPI_SPECS else 'default'}", start=start, end=end, plant=plant)
+    return timed_query('kpis', fetch_row, conn, sql, params)
+
+def compute_plant_kpi_rows(conn, role: str, start: str, end: str, plants: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Role KPI aggregates of each of ``plants`` by plant name, from one grouped query
+    (plants with no rows in the window are left out)"""
+    sql, params = query(f"plant_kpis:{role if role in KPI_SPECS else 'default'}", start=start, end=end, plants=plants)
+    return {row.pop('plant_name'): row for row in timed_query('plant_kpis', fetch_records, conn, sql, params)}
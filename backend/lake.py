@@ -0,0 +1,158 @@
+"""Optional Parquet lake holding the fact tables and dimension snapshots.
+
+With STAR_CEMENT_LAKE_PATH set, every ingest writes the fact tables it
+changed as Hive-partitioned Parquet (LAKE_PARTITION_BY, year / month by
+default) into a new version directory, ``<lake>/<table>/v<timestamp>``, and
+the fact table in DuckDB becomes a view over that directory. The dimensions are written next
+to them as one Parquet file per version. A lake directory is a complete
+snapshot: copy it to another environment and load_lake() (run with the star
+schema at startup) picks up the latest version of every table.
+
+DuckDB skips a view's files only on plain comparisons of the partition
+columns: plant filters on plant_id prune on their own, date windows on fact
+tables go through date_window().
+"""
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LAKE_PATH = os.getenv("STAR_CEMENT_LAKE_PATH", "")
+LAKE_ENABLED = bool(LAKE_PATH)
+# Versions kept per table: the current one plus those in-flight readers may still scan
+LAKE_KEEP_VERSIONS = int(os.getenv("LAKE_KEEP_VERSIONS", "2"))
+
+# Hive partition columns of the fact files, outermost first: any of year, month
+# (with year) and plant_id. Every partition is at least one file, so finer
+# partitions prune more but cost more files to list per query; with plant_id
+# too, a few years of 20 plants is thousands of files and listing them costs
+# more than the scans it saves (benchmarks/bench_lake.py).
+LAKE_PARTITION_BY = [c.strip() for c in os.getenv("LAKE_PARTITION_BY", "year,month").split(',') if c.strip()]
+if not set(LAKE_PARTITION_BY) <= {'year', 'month', 'plant_id'} or ('month' in LAKE_PARTITION_BY and 'year' not in LAKE_PARTITION_BY):
+    raise ValueError(f"LAKE_PARTITION_BY must list year, month (with year) and/or plant_id, not {LAKE_PARTITION_BY}")
+
+# Partition columns are exposed in the views under these names, clear of query aliases like "month"
+VIEW_NAMES = {'year': 'lake_year', 'month': 'lake_month'}
+DERIVED = {'year': 'year(date)', 'month': 'month(date)'}
+HIVE_TYPES = '{' + ', '.join(f"'{c}': INTEGER" for c in LAKE_PARTITION_BY) + '}'
+
+# An empty fact table is one empty file in a partition no date falls into
+EMPTY_PARTITION = '/'.join(f"{c}=0" for c in LAKE_PARTITION_BY)
+
+def new_version() -> str:
+    """Version directory name for the tables of one ingest; names sort by time"""
+    return f"v{time.time_ns():020d}"
+
+def _versions(table: str) -> List[Path]:
+    root = Path(LAKE_PATH) / table
+    return sorted(p for p in root.glob('v*') if p.is_dir()) if root.is_dir() else []
+
+def current_version(table: str) -> Optional[Path]:
+    """Latest complete version directory of ``table``, None when it has none"""
+    versions = _versions(table)
+    return versions[-1] if versions else None
+
+def _staging(table: str, version: str) -> Path:
+    # Written under a dot name and renamed when complete, so a crash never leaves a partial version
+    path = Path(LAKE_PATH) / table / f".{version}"
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+    return path
+
+def write_fact(conn, source: str, table: str, columns: List[str], order: str, version: str) -> Path:
+    """Write the rows of ``source`` as version ``version`` of fact table ``table``, sorted by ``order``"""
+    staging = _staging(table, version)
+    rows = conn.execute(f"SELECT COUNT(*) FROM {source}").fetchall()[0][0]
+    if rows and LAKE_PARTITION_BY:
+        derived = ''.join(f", {DERIVED[c]} AS {c}" for c in LAKE_PARTITION_BY if c in DERIVED)
+        conn.execute(f"""
+            COPY (SELECT {', '.join(columns)}{derived} FROM {source} ORDER BY {order})
+            TO '{staging}' (FORMAT parquet, PARTITION_BY ({', '.join(LAKE_PARTITION_BY)}), OVERWRITE_OR_IGNORE)
+        """)
+    else:
+        (staging / EMPTY_PARTITION).mkdir(parents=True, exist_ok=True)
+        data = [c for c in columns if c not in LAKE_PARTITION_BY]
+        conn.execute(f"COPY (SELECT {', '.join(data)} FROM {source} ORDER BY {order}) "
+                     f"TO '{staging / EMPTY_PARTITION}/data_0.parquet' (FORMAT parquet)")
+    target = staging.with_name(version)
+    staging.rename(target)
+    logger.info(f"Wrote {rows} rows of {table} to {target}")
+    return target
+
+def write_dimension(conn, source: str, table: str, version: str) -> Path:
+    """Write the rows of ``source`` as version ``version`` of dimension ``table``"""
+    staging = _staging(table, version)
+    conn.execute(f"COPY (SELECT * FROM {source}) TO '{staging}/{table}.parquet' (FORMAT parquet)")
+    target = staging.with_name(version)
+    staging.rename(target)
+    return target
+
+def fact_view(table: str, columns: List[str], directory: Path) -> str:
+    """CREATE VIEW statement exposing a fact version as ``table``: its columns, then the
+    year and month partitions as lake_year and lake_month"""
+    partitions = ''.join(f", {c} AS {VIEW_NAMES[c]}" for c in LAKE_PARTITION_BY if c in VIEW_NAMES)
+    # A fixed-depth pattern lists the directories far faster than **
+    files = '/'.join(['*'] * len(LAKE_PARTITION_BY) + ['*.parquet'])
+    hive = f", hive_partitioning = true, hive_types = {HIVE_TYPES}" if LAKE_PARTITION_BY else ''
+    return f"""
+        CREATE VIEW {table} AS
+        SELECT {', '.join(columns)}{partitions}
+        FROM read_parquet('{directory}/{files}'{hive})
+    """
+
+def prune_versions(table: str):
+    """Delete all but the newest LAKE_KEEP_VERSIONS versions of ``table`` and abandoned staging directories"""
+    for path in _versions(table)[:-LAKE_KEEP_VERSIONS]:
+        shutil.rmtree(path, ignore_errors=True)
+    for path in (Path(LAKE_PATH) / table).glob('.v*'):
+        shutil.rmtree(path, ignore_errors=True)
+
+def discard_versions(directories: Iterable[Path]):
+    """Delete versions written for an ingest that was rolled back"""
+    for path in directories:
+        shutil.rmtree(path, ignore_errors=True)
+
+def date_window(alias: str = '') -> str:
+    """Condition keeping the rows of ``alias`` (a fact table) dated $start..$end.
+
+    On lake views it also bounds lake_year and lake_month by the parameters,
+    so only the files of the window's years or months are read.
+    """
+    prefix = f"{alias}." if alias else ''
+    start, end = '$start::DATE', '$end::DATE'
+    condition = f"{prefix}date >= {start} AND {prefix}date <= {end}"
+    if not LAKE_ENABLED or 'year' not in LAKE_PARTITION_BY:
+        return condition
+    condition += f" AND {prefix}lake_year BETWEEN year({start}) AND year({end})"
+    if 'month' in LAKE_PARTITION_BY:
+        condition += (f" AND ({prefix}lake_year > year({start}) OR {prefix}lake_month >= month({start}))"
+                      f" AND ({prefix}lake_year < year({end}) OR {prefix}lake_month <= month({end}))")
+    return condition
+
+def load_lake(conn, facts: Dict[str, List[str]], dimensions: List[str]):
+    """Point the star schema's fact tables at the lake.
+
+    Empty dimension tables are loaded from their latest lake version. Every
+    fact table (``facts`` maps them to their columns) is replaced by a view
+    over its latest version. Tables the lake does not hold yet are written
+    to it first, with the rows they have.
+    """
+    Path(LAKE_PATH).mkdir(parents=True, exist_ok=True)
+    version_name = new_version()
+    for dim in dimensions:
+        version = current_version(dim)
+        if version is None:
+            write_dimension(conn, dim, dim, version_name)
+        elif conn.execute(f"SELECT COUNT(*) FROM {dim}").fetchall()[0][0] == 0:
+            conn.execute(f"INSERT INTO {dim} SELECT * FROM read_parquet('{version}/{dim}.parquet')")
+    for table, columns in facts.items():
+        version = current_version(table)
+        if version is None:
+            version = write_fact(conn, table, table, columns, 'date', version_name)
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(fact_view(table, columns, version))
+    logger.info(f"Loaded the star schema from the lake at {LAKE_PATH}")
@@ -0,0 +1,183 @@
+"""Query and external call metrics, exported in the Prometheus text format at /api/metrics.
+
+Every DuckDB call made for a request goes through timed_query(), which
+records its latency histogram, the rows it returned and the JSON or Arrow
+bytes it serialized under the name of what it computes (kpis, trends,
+chart:<name>, insight:<template>, ...; a chart keeps its name whichever
+rollup serves the window) and the endpoint and role of the request it ran
+for. Request handlers set the endpoint and role with request_context();
+the query pool and chart batch threads run in a copy of the handler's
+context, so the labels follow the work onto them. timed_call() times the
+LLM and email calls the same way. Slow and traced queries are also handed
+to profiling.observe() for the slow-query log.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import profiling
+
+# Upper bounds, in seconds, of the latency histogram buckets
+QUERY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+CALL_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+# (endpoint, role) of the request the current work is for
+_request: ContextVar[Tuple[str, str]] = ContextVar('metrics_request', default=('none', ''))
+
+@contextmanager
+def request_context(endpoint: str, role: Optional[str] = None):
+    """Label the queries run within the block (and on the pools it awaits) with ``endpoint`` and ``role``"""
+    token = _request.set((endpoint, role or ''))
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        # labels -> [count per bucket (not cumulative), sum, count]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, labels: Tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self, name: str, label_names: Tuple[str, ...]) -> Iterator[str]:
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = _labels(label_names, labels)
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + [float('inf')], counts):
+                cumulative += bucket
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f'{name}_bucket{{{base},le="{le}"}} {cumulative}'
+            yield f'{name}_sum{{{base}}} {total!r}'
+            yield f'{name}_count{{{base}}} {count}'
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+def _size(result: Any) -> Tuple[Optional[int], Optional[int]]:
+    """(rows, serialized bytes) of a query helper's result, None where it does not tell"""
+    if isinstance(result, bytes):
+        return None, len(result)
+    if isinstance(result, str):
+        # json_records/json_columns fragments carry their row count
+        return getattr(result, 'rows', None), len(result.encode('utf-8'))
+    if isinstance(result, list):
+        return len(result), None
+    if isinstance(result, dict):
+        # fetch_row()
+        return 1, None
+    if result is None:
+        return 0, None
+    return None, None
+
+QUERY_LABELS = ('query', 'endpoint', 'role')
+CALL_LABELS = ('service', 'operation')
+
+class Metrics:
+    """Query and external call metrics of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._query_seconds = Histogram(QUERY_BUCKETS)
+        self._query_rows: Dict[Tuple, int] = {}
+        self._query_bytes: Dict[Tuple, int] = {}
+        self._query_errors: Dict[Tuple, int] = {}
+        self._call_seconds = Histogram(CALL_BUCKETS)
+        self._call_errors: Dict[Tuple, int] = {}
+
+    def record_query(self, name: str, seconds: float, result: Any = None, failed: bool = False):
+        labels = (name,) + _request.get()
+        rows, nbytes = _size(result)
+        with self._lock:
+            self._query_seconds.observe(labels, seconds)
+            if failed:
+                self._query_errors[labels] = self._query_errors.get(labels, 0) + 1
+            if rows is not None:
+                self._query_rows[labels] = self._query_rows.get(labels, 0) + rows
+            if nbytes is not None:
+                self._query_bytes[labels] = self._query_bytes.get(labels, 0) + nbytes
+
+    def record_call(self, service: str, operation: str, seconds: float, failed: bool = False):
+        labels = (service, operation)
+        with self._lock:
+            self._call_seconds.observe(labels, seconds)
+            if failed:
+                self._call_errors[labels] = self._call_errors.get(labels, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def render(self, extra: Optional[List[Tuple[str, str, str, float]]] = None) -> str:
+        """Every metric in the Prometheus text exposition format, plus ``extra`` unlabelled
+        samples as (name, type, help, value)"""
+        lines = []
+
+        def family(name: str, kind: str, help_text: str, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        def counter(name: str, values: Dict[Tuple, int], label_names: Tuple[str, ...]):
+            return [f'{name}{{{_labels(label_names, labels)}}} {value}' for labels, value in sorted(values.items())]
+
+        with self._lock:
+            family('starcement_query_duration_seconds', 'histogram', 'DuckDB query latency by query, endpoint and role',
+                   list(self._query_seconds.samples('starcement_query_duration_seconds', QUERY_LABELS)))
+            family('starcement_query_rows_total', 'counter', 'Rows returned by DuckDB queries',
+                   counter('starcement_query_rows_total', self._query_rows, QUERY_LABELS))
+            family('starcement_query_bytes_total', 'counter', 'JSON and Arrow bytes serialized from DuckDB query results',
+                   counter('starcement_query_bytes_total', self._query_bytes, QUERY_LABELS))
+            family('starcement_query_errors_total', 'counter', 'DuckDB queries that raised',
+                   counter('starcement_query_errors_total', self._query_errors, QUERY_LABELS))
+            family('starcement_external_call_duration_seconds', 'histogram', 'LLM and email API call latency',
+                   list(self._call_seconds.samples('starcement_external_call_duration_seconds', CALL_LABELS)))
+            family('starcement_external_call_errors_total', 'counter', 'LLM and email API calls that raised',
+                   counter('starcement_external_call_errors_total', self._call_errors, CALL_LABELS))
+        for name, kind, help_text, value in extra or []:
+            family(name, kind, help_text, [f'{name} {value}'])
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+def timed_query(name: str, fn: Callable, conn, sql: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+    """``fn(conn, sql, params, **kwargs)``, a helper running one query, recorded under ``name``"""
+    start = time.perf_counter()
+    try:
+        result = fn(conn, sql, params, **kwargs)
+    except Exception:
+        metrics.record_query(name, time.perf_counter() - start, failed=True)
+        raise
+    seconds = time.perf_counter() - start
+    metrics.record_query(name, seconds, result)
+    profiling.observe(name, _request.get(), seconds, conn, sql, params)
+    return result
+
+@contextmanager
+def timed_call(service: str, operation: str):
+    """Record the latency of the external call made within the block"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        metrics.record_call(service, operation, time.perf_counter() - start, failed=True)
+        raise
+    metrics.record_call(service, operation, time.perf_counter() - start)
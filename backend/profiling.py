@@ -0,0 +1,215 @@
+"""Slow-query log: DuckDB profiles of queries over SLOW_QUERY_MS and of every query of a traced request.
+
+metrics.timed_query() hands each query's latency here. A query over the
+threshold is run again under EXPLAIN (ANALYZE, FORMAT JSON) on a background
+thread with its own cursor (a run's profile cannot be had afterwards
+without profiling every query), at most one at a time; its plan, with each
+operator's timing and input and output cardinalities, goes into a ring
+buffer of the last SLOW_QUERY_LOG_SIZE profiles. A request sent with the
+X-Profile header by a CXO is traced: it bypasses the result and HTTP
+caches, each of its queries is profiled before the response is sent, and
+every entry it adds carries its trace id (the X-Profile-Id response header).
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+from database import db_cursor
+
+logger = logging.getLogger(__name__)
+
+# Queries taking at least this long are profiled (0 turns the slow-query log off)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "50"))
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Trace id of the traced request the current work is for
+_trace: ContextVar[Optional[str]] = ContextVar('profile_trace', default=None)
+
+def traced() -> Optional[str]:
+    """The current request's trace id, None when it is not traced"""
+    return _trace.get()
+
+@contextmanager
+def trace_request():
+    """Trace the work within the block; yields its trace id"""
+    trace_id = uuid.uuid4().hex[:12]
+    token = _trace.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        _trace.reset(token)
+
+def _operator(node: Dict[str, Any]) -> Dict[str, Any]:
+    """One operator of a DuckDB JSON profile, with its children"""
+    extra = dict(node.get('extra_info') or {})
+    estimated = extra.pop('Estimated Cardinality', None)
+    return {
+        'operator': node.get('operator_name', '').strip(),
+        'timing_ms': round(node.get('operator_timing', 0) * 1000, 3),
+        'cardinality': node.get('operator_cardinality'),
+        'estimated_cardinality': int(estimated) if estimated and str(estimated).isdigit() else estimated,
+        'rows_scanned': node.get('operator_rows_scanned'),
+        'extra_info': extra,
+        'children': [_operator(child) for child in node.get('children', [])]
+    }
+
+def profile_query(conn, sql: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run ``sql`` under EXPLAIN ANALYZE: its wall time and operator tree"""
+    start = time.perf_counter()
+    _, profile = conn.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params).fetchall()[0]
+    elapsed = (time.perf_counter() - start) * 1000
+    # root -> EXPLAIN_ANALYZE -> the query's plan
+    plans = [_operator(node) for explain in json.loads(profile).get('children', []) for node in explain.get('children', [])]
+    return {'profile_ms': round(elapsed, 3), 'plan': plans[0] if len(plans) == 1 else plans}
+
+class SlowQueryLog:
+    """Ring buffer of the last ``size`` profiles and traced requests"""
+
+    def __init__(self, size: int = SLOW_QUERY_LOG_SIZE):
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._captured = 0
+        self._skipped = 0
+        self._failed = 0
+
+    def add(self, entry: Dict[str, Any]):
+        with self._lock:
+            entry = {'id': self._next_id, 'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'), **entry}
+            self._next_id += 1
+            self._entries.append(entry)
+            if entry['kind'] == 'query':
+                self._captured += 1
+
+    def count(self, outcome: str):
+        with self._lock:
+            if outcome == 'skipped':
+                self._skipped += 1
+            else:
+                self._failed += 1
+
+    def entries(self, trace_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries newest first, only those of ``trace_id`` if given"""
+        with self._lock:
+            entries = [entry for entry in reversed(self._entries) if trace_id is None or entry.get('trace_id') == trace_id]
+        return entries[:limit] if limit else entries
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'threshold_ms': SLOW_QUERY_MS,
+                'capacity': self._entries.maxlen,
+                'entries': len(self._entries),
+                'captured': self._captured,
+                # slow queries not profiled because a profile was already running
+                'skipped': self._skipped,
+                'failed': self._failed
+            }
+
+slow_query_log = SlowQueryLog()
+
+_profiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-profile")
+_profiler_idle = threading.Semaphore(1)
+
+def _capture(conn, entry: Dict[str, Any], sql: str, params: Optional[Dict[str, Any]]):
+    try:
+        entry.update(profile_query(conn, sql, params))
+    except Exception as e:
+        logger.warning(f"Profiling {entry['query']} failed: {e}")
+        slow_query_log.count('failed')
+        return
+    slow_query_log.add(entry)
+
+def _capture_slow(entry: Dict[str, Any], sql: str, params: Optional[Dict[str, Any]]):
+    try:
+        with db_cursor() as conn:
+            _capture(conn, entry, sql, params)
+    finally:
+        _profiler_idle.release()
+
+def observe(name: str, labels: Tuple[str, str], seconds: float, conn, sql: str, params: Optional[Dict[str, Any]]):
+    """Profile the query just run on ``conn`` if it was slow or its request is traced"""
+    trace_id = _trace.get()
+    ms = seconds * 1000
+    if not trace_id and not (SLOW_QUERY_MS > 0 and ms >= SLOW_QUERY_MS):
+        return
+    endpoint, role = labels
+    entry = {
+        'kind': 'query',
+        'query': name,
+        'endpoint': endpoint,
+        'role': role,
+        'trace_id': trace_id,
+        'ms': round(ms, 3),
+        'sql': sql,
+        'params': params
+    }
+    if trace_id:
+        _capture(conn, entry, sql, params)
+    elif _profiler_idle.acquire(blocking=False):
+        _profiler.submit(_capture_slow, entry, sql, params)
+    else:
+        slow_query_log.count('skipped')
+
+def record_trace(trace_id: str, method: str, path: str, query_string: str, status: int, seconds: float):
+    """Add a traced request's own entry, for its overall time"""
+    slow_query_log.add({
+        'kind': 'request',
+        'trace_id': trace_id,
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'status': status,
+        'ms': round(seconds * 1000, 3)
+    })
+
+class ProfileMiddleware:
+    """Trace requests sent with the X-Profile header, when ``authorize(authorization header)`` allows it (403 otherwise)"""
+
+    def __init__(self, app, authorize: Callable[[Optional[str]], bool]):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        if not headers.get(PROFILE_HEADER):
+            return await self.app(scope, receive, send)
+        if not self.authorize(headers.get('authorization')):
+            response = JSONResponse({'detail': f"{PROFILE_HEADER} requires the CXO role"}, status_code=403)
+            return await response(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+        with trace_request() as trace_id:
+            async def send_traced(message):
+                nonlocal status
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+                    MutableHeaders(scope=message).append(PROFILE_ID_HEADER, trace_id)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                record_trace(trace_id, scope['method'], scope['path'], scope.get('query_string', b'').decode('latin-1'),
+                             status, time.perf_counter() - start)
+
+def shutdown_profiler():
+    _profiler.shutdown(wait=False, cancel_futures=True)
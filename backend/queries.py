@@ -0,0 +1,92 @@
+"""Registry of the named, parameterized read queries behind the API.
+
+Queries take the request's values as bound parameters ($start, $end,
+$plant, ...) instead of having them pasted into their SQL, so a value can
+never change a statement and every request for a query runs the same SQL
+text. Each query's SQL is built once, when it is registered: the trend,
+comparison and report queries here, the role KPI queries by kpi_engine,
+the charts by chart_batch and the insight templates by ai_insights.
+
+DuckDB plans a statement with parameters again on every execution, with
+the bound values folded in as constants (that is what lets date windows
+skip row groups and lake files), so binding does not save planning; see
+benchmarks/bench_queries.py.
+"""
+import re
+from typing import Any, Dict, List, Tuple
+
+from database import plant_filter
+from rollups import DAILY_ROLLUP, MONTHLY_ROLLUP, avg_expr
+
+QUERIES: Dict[str, str] = {}
+_PARAMS: Dict[str, List[str]] = {}
+
+def register(name: str, sql: str):
+    """Add query ``name``; its parameters are the $names in ``sql``"""
+    QUERIES[name] = sql
+    _PARAMS[name] = sorted(set(re.findall(r'\$([a-z_]+)', sql)))
+
+def query(name: str, **values) -> Tuple[str, Dict[str, Any]]:
+    """SQL of query ``name`` and the parameters to bind, taken from ``values``.
+
+    Only the parameters the statement uses are bound (DuckDB rejects extra
+    ones); a missing or blank plant means all plants.
+    """
+    if 'plant' in values and not (values['plant'] and values['plant'].strip()):
+        values['plant'] = 'all'
+    missing = [param for param in _PARAMS[name] if param not in values]
+    if missing:
+        raise ValueError(f"Query {name} needs {', '.join(missing)}")
+    return QUERIES[name], {param: values[param] for param in _PARAMS[name]}
+
+# role -> (domain whose plant-days are trended, [(series, fact column)])
+TREND_SPECS = {
+    'CXO': ('finance', [('ebitda', 'ebitda_rs_ton'), ('margin', 'margin_pct')]),
+    'Plant Head': ('production', [('capacity', 'capacity_util_pct'), ('downtime', 'downtime_hrs')]),
+    'Energy Manager': ('energy', [('power', 'power_kwh_ton'), ('afr', 'afr_pct')]),
+    'Sales': ('sales', [('realization', 'realization_rs_ton'), ('otif', 'otif_pct')]),
+    'default': ('finance', [('value', 'margin_pct')])
+}
+
+def trend_query(role: str) -> str:
+    """Name of the role's daily trend query"""
+    return f"trend:{role if role in TREND_SPECS else 'default'}"
+
+for role, (domain, series) in TREND_SPECS.items():
+    register(trend_query(role), f"""
+        SELECT date, {', '.join(f"{avg_expr(column)} as {name}" for name, column in series)}
+        FROM {DAILY_ROLLUP}
+        WHERE {domain}_rows > 0 AND date >= $start::DATE AND date <= $end::DATE AND {plant_filter()}
+        GROUP BY date ORDER BY date
+    """)
+
+# Plant EBITDA ranking, on the rollup rollup_source() picks for the window
+for table, date_col in ((DAILY_ROLLUP, 'date'), (MONTHLY_ROLLUP, 'month_start')):
+    register(f"plant_comparison:{table}", f"""
+        SELECT
+            p.plant_name,
+            r.ebitda_ton
+        FROM (
+            SELECT plant_id, {avg_expr('ebitda_rs_ton')} as ebitda_ton
+            FROM {table}
+            WHERE finance_rows > 0 AND {date_col} >= $start::DATE AND {date_col} <= $end::DATE
+            GROUP BY plant_id
+        ) r
+        LEFT JOIN dim_plant p USING (plant_id)
+        ORDER BY r.ebitda_ton DESC
+    """)
+
+# Emailed report KPIs over the whole history, one query per fact table
+REPORT_KPIS = {
+    'fact_production': "SUM(cement_mt) as total_cement_mt, AVG(capacity_util_pct) as avg_capacity_util",
+    'fact_finance': "AVG(ebitda_rs_ton) as avg_ebitda_ton, AVG(cost_rs_ton) as avg_cost_ton, AVG(margin_pct) as avg_margin_pct",
+    'fact_energy': ("AVG(power_kwh_ton) as avg_power_kwh_ton, AVG(heat_kcal_kg) as avg_heat_kcal_kg, "
+                    "AVG(afr_pct) as avg_afr_pct, AVG(fuel_cost_rs_ton) as avg_fuel_cost_ton"),
+    'fact_sales': ("SUM(dispatch_mt) as total_dispatch_mt, AVG(realization_rs_ton) as avg_realization_ton, "
+                   "AVG(otif_pct) as avg_otif_pct, AVG(freight_rs_ton) as avg_freight_ton"),
+    'fact_maintenance': "AVG(mtbf_hrs) as avg_mtbf_hrs, AVG(mttr_hrs) as avg_mttr_hrs, AVG(breakdown_hrs) as avg_downtime_hrs",
+    'fact_quality': "AVG(strength_28d) as avg_strength_28d, AVG(blaine) as avg_blaine"
+}
+
+for table, select in REPORT_KPIS.items():
+    register(f"report:{table}", f"SELECT {select} FROM {table} WHERE {plant_filter()}")
@@ -0,0 +1,83 @@
+import asyncio
+import contextvars
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from database import DB_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+QUERY_CONCURRENCY = int(os.getenv("QUERY_CONCURRENCY", str(DB_POOL_SIZE)))
+
+class QueryExecutor:
+    """Runs blocking DuckDB work on a bounded thread pool.
+
+    Async handlers await ``run()`` so a slow aggregate occupies a worker
+    thread instead of the event loop. Work beyond ``max_concurrency`` waits
+    in the executor queue; queue depth and in-flight counts are tracked for
+    the stats endpoint.
+    """
+
+    def __init__(self, max_concurrency: int = QUERY_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="duckdb-query")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _track(self, fn: Callable, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._in_flight += 1
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+        return result
+
+    def _on_done(self, future):
+        # A request cancelled before a worker picked it up never ran _track
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the query pool and await its result"""
+        with self._lock:
+            self._queued += 1
+        # the worker runs in the caller's context (the request's metrics labels)
+        future = self._executor.submit(contextvars.copy_context().run, self._track, fn, args, kwargs)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth, in-flight and completion counters"""
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'queued': self._queued,
+                'in_flight': self._in_flight,
+                'completed': self._completed,
+                'failed': self._failed
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("Query executor stopped")
+
+query_executor = QueryExecutor()
+
+async def run_query(fn: Callable, *args, **kwargs) -> Any:
+    """Run blocking database work off the event loop"""
+    return await query_executor.run(fn, *args, **kwargs)
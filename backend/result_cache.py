@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import logging
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Tuple
+
+from database import get_data_version
+from metrics import request_context
+from profiling import traced
+from query_executor import run_query
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "64"))
+
+def _normalize_value(name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        if name == 'plant' and not value:
+            return 'all'
+        try:
+            # '2024-1-5' and '2024-01-05' are the same filter
+            return date.fromisoformat(value).isoformat() if name in ('start', 'end') else value
+        except ValueError:
+            return value
+    if value is None and name == 'plant':
+        return 'all'
+    return value
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Canonical form of filter parameters, so equivalent requests share a cache entry"""
+    return {name: _normalize_value(name, value) for name, value in params.items()}
+
+def cache_key(endpoint: str, params: Dict[str, Any]) -> Tuple:
+    """Cache key for an endpoint and its (already normalized) parameters"""
+    return (endpoint,) + tuple(sorted((name, json.dumps(value, default=str)) for name, value in params.items()))
+
+def _estimate_size(value: Any) -> int:
+    if hasattr(value, 'nbytes'):
+        # rendered bodies (http_cache.EncodedBody) know their size
+        return value.nbytes
+    return len(json.dumps(value, default=str))
+
+class ResultCache:
+    """In-process LRU cache of endpoint results, bounded by a memory budget.
+
+    Entries belong to the warehouse data version they were computed against.
+    When ingestion bumps the version the whole cache is dropped on the next
+    access, and results computed against an older version are never stored.
+    """
+
+    def __init__(self, max_bytes: int = int(RESULT_CACHE_MAX_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._version = get_data_version()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._per_endpoint = {}
+
+    def _sync_version(self):
+        version = get_data_version()
+        if version != self._version:
+            if self._entries:
+                self._invalidations += 1
+                logger.info(f"Data version {self._version} -> {version}; dropping {len(self._entries)} cached results")
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def _count(self, endpoint: str, outcome: str):
+        counters = self._per_endpoint.setdefault(endpoint, {'hits': 0, 'misses': 0})
+        counters[outcome] += 1
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """Return (found, value) and mark the entry most recently used"""
+        with self._lock:
+            self._sync_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                self._count(key[0], 'misses')
+                return False, None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            self._count(key[0], 'hits')
+            return True, entry[0]
+
+    def put(self, key: Tuple, value: Any, version: int):
+        """Store a result computed against data ``version``"""
+        size = _estimate_size(value)
+        with self._lock:
+            self._sync_version()
+            if version != self._version or size > self.max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss, eviction and memory counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'data_version': self._version,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'endpoints': {name: dict(counters) for name, counters in self._per_endpoint.items()}
+            }
+
+result_cache = ResultCache()
+
+async def cached_query(endpoint: str, compute: Callable, **params) -> Any:
+    """Serve ``compute(**params)`` from the result cache, running it on the query pool on a miss
+    (always, for a traced request)"""
+    params = normalize_params(params)
+    key = cache_key(endpoint, params)
+    found, value = (False, None) if traced() else result_cache.get(key)
+    if found:
+        return value
+    version = get_data_version()
+    with request_context(endpoint, params.get('role')):
+        value = await run_query(compute, **params)
+    result_cache.put(key, value, version)
+    return value
@@ -0,0 +1,139 @@
+"""Plant-level rollup tables rebuilt from the fact tables at ingest time.
+
+rollup_plant_daily holds one wide row per (date, plant) combining all six fact
+domains, and rollup_plant_monthly one row per (month, plant). Every numeric
+fact column is stored as a ``<col>_sum`` / ``<col>_cnt`` pair so averages can
+be re-aggregated exactly at any coarser grain; a few columns also keep
+``_min`` / ``_max`` for the range KPIs. ``<domain>_rows`` counts the source
+rows so queries can tell whether a domain reported on that day.
+"""
+import calendar
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# domain -> (fact table, numeric columns, columns that also keep min/max)
+ROLLUP_DOMAINS: Dict[str, Tuple[str, List[str], List[str]]] = {
+    'production': ('fact_production', ['cement_mt', 'clinker_mt', 'capacity_util_pct', 'downtime_hrs'], []),
+    'energy': ('fact_energy', ['power_kwh_ton', 'heat_kcal_kg', 'fuel_cost_rs_ton', 'afr_pct'], ['power_kwh_ton', 'heat_kcal_kg']),
+    'maintenance': ('fact_maintenance', ['breakdown_hrs', 'mtbf_hrs', 'mttr_hrs'], []),
+    'quality': ('fact_quality', ['blaine', 'strength_28d', 'clinker_factor'], []),
+    'sales': ('fact_sales', ['dispatch_mt', 'realization_rs_ton', 'freight_rs_ton', 'otif_pct'], ['realization_rs_ton']),
+    'finance': ('fact_finance', ['cost_rs_ton', 'ebitda_rs_ton', 'margin_pct'], [])
+}
+
+DAILY_ROLLUP = 'rollup_plant_daily'
+MONTHLY_ROLLUP = 'rollup_plant_monthly'
+
+def avg_expr(column: str, alias: str = '') -> str:
+    """Exact AVG(column) over rollup rows"""
+    prefix = f"{alias}." if alias else ''
+    return f"SUM({prefix}{column}_sum) / NULLIF(SUM({prefix}{column}_cnt), 0)"
+
+def sum_expr(column: str, alias: str = '') -> str:
+    """SUM(column) over rollup rows"""
+    prefix = f"{alias}." if alias else ''
+    return f"SUM({prefix}{column}_sum)"
+
+def _measure_columns(columns: List[str], minmax: List[str]) -> List[str]:
+    names = []
+    for col in columns:
+        names += [f"{col}_sum", f"{col}_cnt"]
+        if col in minmax:
+            names += [f"{col}_min", f"{col}_max"]
+    return names
+
+def _daily_select(affected: str = '', sources: Optional[Dict[str, str]] = None) -> str:
+    """SELECT producing daily rollup rows, only for the (date, plant_id) pairs in ``affected`` if given.
+
+    ``sources`` maps fact tables to the table to read instead (e.g. a shadow copy).
+    """
+    scope = f" SEMI JOIN {affected} USING (date, plant_id)" if affected else ''
+    sources = sources or {}
+    ctes = []
+    select_cols = []
+    for domain, (table, columns, minmax) in ROLLUP_DOMAINS.items():
+        aggs = [f"COUNT(*) AS {domain}_rows"]
+        for col in columns:
+            aggs += [f"SUM({col}) AS {col}_sum", f"COUNT({col}) AS {col}_cnt"]
+            if col in minmax:
+                aggs += [f"MIN({col}) AS {col}_min", f"MAX({col}) AS {col}_max"]
+        ctes.append(f"{domain} AS (SELECT date, plant_id, {', '.join(aggs)} FROM {sources.get(table, table)}{scope} GROUP BY date, plant_id)")
+        select_cols.append(f"COALESCE({domain}.{domain}_rows, 0) AS {domain}_rows")
+        select_cols += [f"{domain}.{name}" for name in _measure_columns(columns, minmax)]
+
+    keys = ' UNION '.join(f"SELECT date, plant_id FROM {domain}" for domain in ROLLUP_DOMAINS)
+    joins = ' '.join(f"LEFT JOIN {domain} USING (date, plant_id)" for domain in ROLLUP_DOMAINS)
+    return f"""
+        WITH {', '.join(ctes)},
+        keys AS ({keys})
+        SELECT keys.date, keys.plant_id, {', '.join(select_cols)}
+        FROM keys {joins}
+        ORDER BY keys.date, keys.plant_id
+    """
+
+def _monthly_select(where: str = '', daily: str = DAILY_ROLLUP) -> str:
+    """SELECT re-aggregating rows of the daily rollup ``daily`` (those matching ``where``) to months"""
+    # SUM over BIGINT widens to HUGEINT; keep the monthly counts BIGINT like the daily ones
+    monthly_cols = []
+    for domain, (table, columns, minmax) in ROLLUP_DOMAINS.items():
+        monthly_cols.append(f"SUM({domain}_rows)::BIGINT AS {domain}_rows")
+        for col in columns:
+            monthly_cols += [f"SUM({col}_sum) AS {col}_sum", f"SUM({col}_cnt)::BIGINT AS {col}_cnt"]
+            if col in minmax:
+                monthly_cols += [f"MIN({col}_min) AS {col}_min", f"MAX({col}_max) AS {col}_max"]
+    return f"""
+        SELECT
+            date_trunc('month', date)::DATE AS month_start,
+            strftime(date, '%Y-%m') AS month,
+            plant_id,
+            {', '.join(monthly_cols)}
+        FROM {daily}
+        {where}
+        GROUP BY ALL
+        ORDER BY month_start, plant_id
+    """
+
+def build_rollups(conn, sources: Optional[Dict[str, str]] = None, prefix: str = ''):
+    """Rebuild the daily and monthly plant rollups from the fact tables.
+
+    With ``sources`` (fact table -> table to read) and ``prefix`` the rollups
+    are built from shadow fact tables into ``<prefix><rollup>`` tables.
+    """
+    daily, monthly = prefix + DAILY_ROLLUP, prefix + MONTHLY_ROLLUP
+    conn.execute(f"CREATE OR REPLACE TABLE {daily} AS {_daily_select(sources=sources)}")
+    conn.execute(f"CREATE OR REPLACE TABLE {monthly} AS {_monthly_select(daily=daily)}")
+
+    daily_rows = conn.execute(f"SELECT COUNT(*) FROM {daily}").fetchone()[0]
+    monthly_rows = conn.execute(f"SELECT COUNT(*) FROM {monthly}").fetchone()[0]
+    logger.info(f"Built rollups: {daily_rows} plant-days, {monthly_rows} plant-months")
+
+def refresh_rollups(conn, affected: str, sources: Optional[Dict[str, str]] = None):
+    """Recompute only the rollup rows of the (date, plant_id) pairs in the table ``affected``
+    (reading ``sources`` instead of the fact tables they map, as in build_rollups)"""
+    conn.execute(f"DELETE FROM {DAILY_ROLLUP} WHERE (date, plant_id) IN (SELECT date, plant_id FROM {affected})")
+    conn.execute(f"INSERT INTO {DAILY_ROLLUP} {_daily_select(affected, sources)}")
+
+    months = f"(SELECT DISTINCT date_trunc('month', date)::DATE, plant_id FROM {affected})"
+    in_months = f"WHERE (date_trunc('month', date)::DATE, plant_id) IN {months}"
+    conn.execute(f"DELETE FROM {MONTHLY_ROLLUP} WHERE (month_start, plant_id) IN {months}")
+    conn.execute(f"INSERT INTO {MONTHLY_ROLLUP} {_monthly_select(in_months)}")
+    logger.info(f"Refreshed rollups for the plant-days in {affected}")
+
+def month_aligned(start: str, end: str) -> bool:
+    """True when [start, end] covers whole calendar months, so the monthly rollup can answer it"""
+    try:
+        start_date = date.fromisoformat(start)
+        end_date = date.fromisoformat(end)
+    except ValueError:
+        return False
+    last_day = calendar.monthrange(end_date.year, end_date.month)[1]
+    return start_date.day == 1 and end_date.day == last_day
+
+def rollup_source(start: str, end: str) -> Tuple[str, str]:
+    """(table, date column) of the coarsest rollup that answers a [start, end] filter exactly"""
+    if month_aligned(start, end):
+        return MONTHLY_ROLLUP, 'month_start'
+    return DAILY_ROLLUP, 'date'
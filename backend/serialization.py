@@ -0,0 +1,133 @@
+"""DuckDB results rendered to JSON or Arrow IPC without going through pandas.
+
+json_records() has DuckDB serialize each row with to_json() and join them
+into one JSON array string, so no per-cell Python objects are built;
+json_columns() does the same for a result as one array per column. The
+JSON is returned as a RawJSON fragment: endpoints nest fragments inside an
+ordinary response dict and FragmentJSONResponse splices them into the body
+verbatim. arrow_ipc() streams the record batches of a query as an Arrow IPC
+stream for clients that can read Arrow directly.
+"""
+import io
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+NUMERIC_TYPES = {
+    'tinyint', 'smallint', 'integer', 'bigint', 'hugeint',
+    'utinyint', 'usmallint', 'uinteger', 'ubigint', 'uhugeint',
+    'float', 'double', 'decimal'
+}
+
+class RawJSON(str):
+    """An already-serialized JSON value embedded in a response (``rows``: the rows it holds, when known)"""
+
+    rows = None
+
+def _fragment(json_text: str, rows: int) -> RawJSON:
+    fragment = RawJSON(json_text)
+    fragment.rows = rows
+    return fragment
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+# Filled SQL of parameterized statements: their text does not change with the
+# values bound, so the column types are looked up (a bind of the whole
+# statement) once per statement instead of on every call
+_filled_sql: Dict[str, str] = {}
+
+def _filled(conn, sql: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """``sql`` with NULLs in numeric columns replaced by 0 (what fillna(0) did)"""
+    if params and sql in _filled_sql:
+        return _filled_sql[sql]
+    relation = conn.sql(sql, params=params)
+    columns = []
+    for name, dtype in zip(relation.columns, relation.dtypes):
+        if dtype.id in NUMERIC_TYPES:
+            columns.append(f"COALESCE({_quote(name)}, 0) AS {_quote(name)}")
+        else:
+            columns.append(_quote(name))
+    filled = f"SELECT {', '.join(columns)} FROM ({sql}) s"
+    if params:
+        _filled_sql[sql] = filled
+    return filled
+
+def json_records(conn, sql: str, params: Optional[Dict[str, Any]] = None, fill_nulls: bool = True) -> RawJSON:
+    """Rows of ``sql`` (with ``params`` bound) as a JSON array of objects, in result order"""
+    if fill_nulls:
+        sql = _filled(conn, sql, params)
+    # row_number() over the ordered result keeps string_agg in result order
+    row = conn.execute(f"""
+        SELECT '[' || COALESCE(string_agg(j, ',' ORDER BY rn), '') || ']', count(*)
+        FROM (SELECT to_json(t)::VARCHAR AS j, row_number() OVER () AS rn FROM ({sql}) t)
+    """, params).fetchall()[0]
+    return _fragment(row[0], row[1])
+
+def json_columns(conn, sql: str, params: Optional[Dict[str, Any]] = None) -> RawJSON:
+    """Rows of ``sql`` as a JSON object of column arrays, in result order"""
+    row = conn.execute(f"""
+        SELECT to_json(c)::VARCHAR, len(struct_extract_at(c, 1)) FROM (
+            SELECT COALESCE(list(COLUMNS(* EXCLUDE (rn)) ORDER BY rn), [])
+            FROM (SELECT *, row_number() OVER () AS rn FROM ({sql}) t)
+        ) c
+    """, params).fetchall()[0]
+    return _fragment(row[0], row[1])
+
+def fetch_records(conn, sql: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Rows of ``sql`` as dicts, for results consumed in Python"""
+    cursor = conn.execute(sql, params)
+    names = [d[0] for d in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+def fetch_row(conn, sql: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """First row of ``sql`` as a dict (None when empty)"""
+    cursor = conn.execute(sql, params)
+    names = [d[0] for d in cursor.description]
+    # Read the whole result: a half-read one keeps the pooled cursor's
+    # snapshot open, which blocks ingestion from re-inserting primary keys
+    rows = cursor.fetchall()
+    return dict(zip(names, rows[0])) if rows else None
+
+def arrow_ipc(conn, sql: str, params: Optional[Dict[str, Any]] = None, fill_nulls: bool = True) -> bytes:
+    """Rows of ``sql`` as an Arrow IPC stream"""
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is not installed")
+    if fill_nulls:
+        sql = _filled(conn, sql, params)
+    reader = conn.execute(sql, params).fetch_record_batch()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+    return sink.getvalue()
+
+def dumps(value: Any) -> str:
+    """JSON for a response value, splicing RawJSON fragments in as-is"""
+    if isinstance(value, RawJSON):
+        return value
+    if isinstance(value, dict):
+        return '{' + ','.join(f"{json.dumps(str(k), ensure_ascii=False)}:{dumps(v)}" for k, v in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join(dumps(v) for v in value) + ']'
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+class FragmentJSONResponse(JSONResponse):
+    """JSONResponse whose content may contain RawJSON fragments"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content).encode("utf-8")
+
+class ArrowResponse(Response):
+    media_type = ARROW_STREAM_MEDIA_TYPE
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Header, Depends
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Header, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
@@ -10,12 +10,22 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional, Dict, Any, List
 from datetime import timedelta, datetime
 import tempfile
-import json
 
 from auth import authenticate_user, create_access_token, decode_token, LoginRequest, Token
-from database import init_star_schema, get_db_connection
-from excel_processor import ExcelProcessor
-from data_ingestion import ingest_excel_data
+from database import CLUSTER_KEYS, DB_READ_ONLY, STAR_TABLES, init_star_schema, db_cursor, db_pool_stats, close_db
+from query_executor import run_query, query_executor
+from result_cache import result_cache
+from http_cache import JSON_MEDIA_TYPE, conditional_response
+from metrics import metrics, request_context, timed_call, timed_query
+from profiling import ProfileMiddleware, shutdown_profiler, slow_query_log
+from rollups import rollup_source
+from queries import REPORT_KPIS, query, trend_query
+from kpi_engine import compute_kpi_row, compute_plant_kpi_rows
+from chart_batch import CHART_SPECS, chart_query, plant_chart_queries, run_chart_batch, shutdown_chart_batch
+from dashboard import run_dashboard
+from serialization import ARROW_AVAILABLE, ARROW_STREAM_MEDIA_TYPE, arrow_ipc, fetch_row, json_columns, json_records
+from data_ingestion import INGEST_MODES
+from ingestion_jobs import ingestion_jobs
 from ai_insights import generate_insight, SAMPLE_PROMPTS
 
 # Try to import resend
@@ -37,7 +47,10 @@ if RESEND_API_KEY and RESEND_AVAILABLE:
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Initialize star schema on startup
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Bring the star schema up to date on startup; loaded data is kept
 try:
     init_star_schema()
     logging.info("Star schema initialized")
@@ -88,10 +101,25 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         pass
     return None
 
+async def require_cxo(current_user: Optional[dict] = Depends(get_current_user)):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if current_user['role'] != 'CXO':
+        raise HTTPException(status_code=403, detail="Requires the CXO role")
+    return current_user
+
+def _is_cxo(authorization: Optional[str]) -> bool:
+    token_data = decode_token(authorization.replace("Bearer ", "")) if authorization else None
+    return bool(token_data and token_data.role == 'CXO')
+
+def require_writer():
+    if DB_READ_ONLY:
+        raise HTTPException(status_code=503, detail="This process serves a read-only warehouse; send writes to the writer process")
+
 # Routes
 @api_router.post("/auth/login", response_model=Token)
-async def login(login_req: LoginRequest):
-    """Demo authentication endpoint"""
+def login(login_req: LoginRequest):
+    """Demo authentication endpoint (a plain def: FastAPI runs it on its threadpool, as bcrypt blocks)"""
     user = authenticate_user(login_req.email, login_req.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -113,92 +141,232 @@ async def get_me(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=401, detail="Not authenticated")
     return current_user
 
-@api_router.post("/upload")
-async def upload_excel(file: UploadFile = File(...)):
-    """Upload and process Excel file"""
+@api_router.post("/upload", dependencies=[Depends(require_writer)])
+async def upload_excel(file: UploadFile = File(...), mode: str = "replace"):
+    """Upload and process Excel file (mode=replace reloads the sheets' tables, mode=merge upserts into them)"""
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="File must be Excel format")
+    if mode not in INGEST_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(INGEST_MODES)}")
     
-    # Check file size (50MB limit)
-    contents = await file.read()
-    if len(contents) > 50 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File size exceeds 50MB limit")
-    
-    # Save to temp file
+    # Save to temp file in chunks, checking the size (50MB limit) as we go
+    size = 0
     with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-        tmp.write(contents)
         tmp_path = tmp.name
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                break
+            tmp.write(chunk)
+    if size > MAX_UPLOAD_BYTES:
+        os.unlink(tmp_path)
+        raise HTTPException(status_code=400, detail="File size exceeds 50MB limit")
     
-    try:
-        # Process Excel
-        processor = ExcelProcessor(tmp_path)
-        validation = processor.validate_structure()
-        preview = processor.get_preview_data(max_rows=5)
-        stats = processor.get_stats()
-        
-        # Ingest data
-        sheets_data = processor.read_and_validate_data()
-        ingest_excel_data(sheets_data)
-        
-        return JSONResponse({
-            'status': 'ok',
-            'message': 'Data uploaded and ingested successfully',
-            'preview': preview,
-            'mapping': validation,
-            'stats': stats
-        })
-    
-    except Exception as e:
-        logger.error(f"Upload error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
-    
-    finally:
-        # Clean up temp file
-        try:
-            os.unlink(tmp_path)
-        except:
-            pass
+    # Parse and ingest run on the ingestion worker; poll /api/jobs/{id}
+    job = ingestion_jobs.submit(tmp_path, file.filename, mode)
+    return JSONResponse({
+        'status': 'accepted',
+        'message': 'Upload received; ingestion queued',
+        'job_id': job['id'],
+        'job': job
+    }, status_code=202)
 
-@api_router.get("/schema")
-async def get_schema():
-    """Get star schema metadata and sample data"""
-    try:
-        conn = get_db_connection()
-        
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get an ingestion job's status, per-sheet progress and, once done, its result"""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return {'status': 'ok', 'job': job}
+
+@api_router.post("/maintenance/recluster", dependencies=[Depends(require_writer)])
+async def recluster(tables: Optional[List[str]] = Query(None, alias="table")):
+    """Rewrite fact and rollup tables in (date, plant) order, e.g. after merge uploads; returns 202 with a job_id"""
+    unknown = [table for table in tables or [] if table not in CLUSTER_KEYS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown tables {', '.join(unknown)}; use {', '.join(CLUSTER_KEYS)}")
+    job = ingestion_jobs.submit_recluster(tables)
+    return JSONResponse({'status': 'accepted', 'job_id': job['id'], 'job': job}, status_code=202)
+
+def _fetch_schema_samples():
+    """Read sample rows from each star schema table"""
+    with db_cursor() as conn:
         # Get sample from each table
         samples = {}
-        tables = ['dim_date', 'dim_plant', 'fact_production', 'fact_energy', 
-                  'fact_maintenance', 'fact_quality', 'fact_sales', 'fact_finance']
-        
+        tables = list(STAR_TABLES)
+    
         for table in tables:
             try:
-                result = conn.execute(f"SELECT * FROM {table} LIMIT 5").fetchdf()
-                samples[table] = result.to_dict('records')
+                samples[table] = timed_query(f"schema_sample:{table}", json_records, conn, f"SELECT * FROM {table} LIMIT 5", fill_nulls=False)
             except:
                 samples[table] = []
-        
-        conn.close()
-        
-        return {
-            'status': 'ok',
-            'schema': {
-                'dim_date': ['date', 'year', 'month', 'day', 'month_name', 'quarter'],
-                'dim_plant': ['plant_id', 'plant_name', 'region'],
-                'fact_production': ['date', 'plant_name', 'line', 'cement_mt', 'clinker_mt', 'capacity_util_pct', 'downtime_hrs'],
-                'fact_energy': ['date', 'plant_name', 'power_kwh_ton', 'heat_kcal_kg', 'fuel_cost_rs_ton', 'afr_pct'],
-                'fact_maintenance': ['date', 'plant_name', 'equipment', 'breakdown_hrs', 'mtbf_hrs', 'mttr_hrs'],
-                'fact_quality': ['date', 'plant_name', 'blaine', 'strength_28d', 'clinker_factor'],
-                'fact_sales': ['date', 'plant_name', 'region', 'dispatch_mt', 'realization_rs_ton', 'freight_rs_ton', 'otif_pct'],
-                'fact_finance': ['date', 'plant_name', 'cost_rs_ton', 'ebitda_rs_ton', 'margin_pct']
-            },
-            'samples': samples
-        }
+    
+    return {
+        'status': 'ok',
+        'schema': {
+            'dim_date': ['date', 'year', 'month', 'day', 'month_name', 'quarter'],
+            'dim_plant': ['plant_id', 'plant_name', 'region'],
+            'dim_line': ['line_id', 'line'],
+            'dim_equipment': ['equipment_id', 'equipment'],
+            'dim_region': ['region_id', 'region'],
+            'fact_production': ['date', 'plant_id', 'line_id', 'cement_mt', 'clinker_mt', 'capacity_util_pct', 'downtime_hrs'],
+            'fact_energy': ['date', 'plant_id', 'power_kwh_ton', 'heat_kcal_kg', 'fuel_cost_rs_ton', 'afr_pct'],
+            'fact_maintenance': ['date', 'plant_id', 'equipment_id', 'breakdown_hrs', 'mtbf_hrs', 'mttr_hrs'],
+            'fact_quality': ['date', 'plant_id', 'blaine', 'strength_28d', 'clinker_factor'],
+            'fact_sales': ['date', 'plant_id', 'region_id', 'dispatch_mt', 'realization_rs_ton', 'freight_rs_ton', 'otif_pct'],
+            'fact_finance': ['date', 'plant_id', 'cost_rs_ton', 'ebitda_rs_ton', 'margin_pct']
+        },
+        'samples': samples
+    }
+
+@api_router.get("/schema")
+async def get_schema(request: Request):
+    """Get star schema metadata and sample data"""
+    try:
+        return await conditional_response(request, 'schema', _fetch_schema_samples)
     except Exception as e:
         logger.error(f"Schema error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _role_kpis(role: str, kpis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """The role's KPI cards from its KPI aggregates"""
+    # Clean KPI results - handle NaN
+    for key in kpis_result:
+        if kpis_result[key] is None or (isinstance(kpis_result[key], float) and (kpis_result[key] != kpis_result[key])):
+            kpis_result[key] = 0
+    
+    # Map KPIs based on role with comprehensive metrics
+    if role == "CXO":
+        kpis = {
+            # Primary Financial KPIs
+            'total_cement_mt': round(kpis_result.get('total_cement_mt', 0) or 0, 2),
+            'total_clinker_mt': round(kpis_result.get('total_clinker_mt', 0) or 0, 2),
+            'avg_ebitda_ton': round(kpis_result.get('avg_ebitda_ton', 0) or 0, 2),
+            'avg_cost_ton': round(kpis_result.get('avg_cost_ton', 0) or 0, 2),
+            'avg_margin_pct': round(kpis_result.get('avg_margin_pct', 0) or 0, 2),
+            # Operations KPIs
+            'avg_capacity_util': round(kpis_result.get('avg_capacity_util', 0) or 0, 2),
+            'avg_clinker_factor': round(kpis_result.get('avg_clinker_factor', 0) or 0, 3),
+            # Energy KPIs
+            'avg_power_kwh_ton': round(kpis_result.get('avg_power_kwh_ton', 0) or 0, 2),
+            'avg_afr_pct': round(kpis_result.get('avg_afr_pct', 0) or 0, 2),
+            # Sales & Logistics KPIs
+            'avg_realization_ton': round(kpis_result.get('avg_realization_ton', 0) or 0, 2),
+            'avg_freight_ton': round(kpis_result.get('avg_freight_ton', 0) or 0, 2),
+            'avg_otif_pct': round(kpis_result.get('avg_otif_pct', 0) or 0, 2),
+            # Calculated KPIs
+            'revenue_per_ton': round((kpis_result.get('avg_realization_ton', 0) or 0), 2),
+            'net_margin_ton': round((kpis_result.get('avg_ebitda_ton', 0) or 0) - (kpis_result.get('avg_cost_ton', 0) or 0), 2),
+            'clinker_production': round((kpis_result.get('total_cement_mt', 0) or 0) * (kpis_result.get('avg_clinker_factor', 0) or 0), 2)
+        }
+    elif role == "Plant Head":
+        kpis = {
+            # Production KPIs
+            'total_cement_mt': round(kpis_result.get('total_cement_mt', 0) or 0, 2),
+            'avg_daily_cement': round(kpis_result.get('avg_daily_cement', 0) or 0, 2),
+            'total_clinker_mt': round(kpis_result.get('total_clinker_mt', 0) or 0, 2),
+            # Efficiency KPIs
+            'avg_capacity_util': round(kpis_result.get('avg_capacity_util', 0) or 0, 2),
+            'avg_downtime_hrs': round(kpis_result.get('avg_downtime_hrs', 0) or 0, 2),
+            # Quality KPIs
+            'avg_blaine': round(kpis_result.get('avg_blaine', 0) or 0, 2),
+            'avg_strength_28d': round(kpis_result.get('avg_strength_28d', 0) or 0, 2),
+            'avg_clinker_factor': round(kpis_result.get('avg_clinker_factor', 0) or 0, 3),
+            # Maintenance KPIs
+            'avg_breakdown_hrs': round(kpis_result.get('avg_breakdown_hrs', 0) or 0, 2),
+            'avg_mtbf_hrs': round(kpis_result.get('avg_mtbf_hrs', 0) or 0, 2),
+            'avg_mttr_hrs': round(kpis_result.get('avg_mttr_hrs', 0) or 0, 2),
+            # Calculated KPIs
+            'uptime_pct': round(100 - ((kpis_result.get('avg_downtime_hrs', 0) or 0) / 24 * 100), 2),
+            'daily_clinker': round((kpis_result.get('avg_daily_cement', 0) or 0) * (kpis_result.get('avg_clinker_factor', 0) or 0), 2),
+            'production_days': round((kpis_result.get('total_cement_mt', 0) or 0) / (kpis_result.get('avg_daily_cement', 0) or 1), 0)
+        }
+    elif role == "Energy Manager":
+        kpis = {
+            # Power KPIs
+            'avg_power_kwh_ton': round(kpis_result.get('avg_power_kwh_ton', 0) or 0, 2),
+            'max_power_kwh_ton': round(kpis_result.get('max_power_kwh_ton', 0) or 0, 2),
+            'min_power_kwh_ton': round(kpis_result.get('min_power_kwh_ton', 0) or 0, 2),
+            'power_variance': round((kpis_result.get('max_power_kwh_ton', 0) or 0) - (kpis_result.get('min_power_kwh_ton', 0) or 0), 2),
+            # Thermal KPIs
+            'avg_heat_kcal_kg': round(kpis_result.get('avg_heat_kcal_kg', 0) or 0, 2),
+            'max_heat_kcal_kg': round(kpis_result.get('max_heat_kcal_kg', 0) or 0, 2),
+            'min_heat_kcal_kg': round(kpis_result.get('min_heat_kcal_kg', 0) or 0, 2),
+            'heat_variance': round((kpis_result.get('max_heat_kcal_kg', 0) or 0) - (kpis_result.get('min_heat_kcal_kg', 0) or 0), 2),
+            # Cost & Sustainability KPIs
+            'avg_fuel_cost_ton': round(kpis_result.get('avg_fuel_cost_ton', 0) or 0, 2),
+            'avg_afr_pct': round(kpis_result.get('avg_afr_pct', 0) or 0, 2),
+            'total_cement_mt': round(kpis_result.get('total_cement_mt', 0) or 0, 2),
+            # Performance KPIs
+            'best_power': round(kpis_result.get('min_power_kwh_ton', 0) or 0, 2),
+            'worst_power': round(kpis_result.get('max_power_kwh_ton', 0) or 0, 2),
+            'savings_potential': round(((kpis_result.get('avg_power_kwh_ton', 0) or 0) - (kpis_result.get('min_power_kwh_ton', 0) or 0)) * (kpis_result.get('total_cement_mt', 0) or 0) * 5, 2)
+        }
+    elif role == "Sales":
+        kpis = {
+            # Volume KPIs
+            'total_dispatch_mt': round(kpis_result.get('total_dispatch_mt', 0) or 0, 2),
+            # Pricing KPIs
+            'avg_realization_ton': round(kpis_result.get('avg_realization_ton', 0) or 0, 2),
+            'max_realization_ton': round(kpis_result.get('max_realization_ton', 0) or 0, 2),
+            'min_realization_ton': round(kpis_result.get('min_realization_ton', 0) or 0, 2),
+            'price_variance': round((kpis_result.get('max_realization_ton', 0) or 0) - (kpis_result.get('min_realization_ton', 0) or 0), 2),
+            # Logistics KPIs
+            'avg_freight_ton': round(kpis_result.get('avg_freight_ton', 0) or 0, 2),
+            'avg_otif_pct': round(kpis_result.get('avg_otif_pct', 0) or 0, 2),
+            # Financial KPIs
+            'avg_margin_pct': round(kpis_result.get('avg_margin_pct', 0) or 0, 2),
+            'avg_ebitda_ton': round(kpis_result.get('avg_ebitda_ton', 0) or 0, 2),
+            # Calculated KPIs
+            'best_realization': round(kpis_result.get('max_realization_ton', 0) or 0, 2),
+            'worst_realization': round(kpis_result.get('min_realization_ton', 0) or 0, 2),
+            'net_realization': round((kpis_result.get('avg_realization_ton', 0) or 0) - (kpis_result.get('avg_freight_ton', 0) or 0), 2),
+            'total_revenue': round((kpis_result.get('total_dispatch_mt', 0) or 0) * (kpis_result.get('avg_realization_ton', 0) or 0), 2),
+            'revenue_per_day': round(((kpis_result.get('total_dispatch_mt', 0) or 0) * (kpis_result.get('avg_realization_ton', 0) or 0)) / 365, 2)
+        }
+    else:
+        # Default view
+        kpis = {
+            'total_cement_mt': round(kpis_result.get('total_cement_mt', 0) or 0, 2),
+            'avg_ebitda_ton': round(kpis_result.get('avg_ebitda_ton', 0) or 0, 2),
+            'avg_power_kwh_ton': round(kpis_result.get('avg_power_kwh_ton', 0) or 0, 2),
+            'avg_margin_pct': round(kpis_result.get('avg_margin_pct', 0) or 0, 2)
+        }
+    
+    return kpis
+
+def _compute_kpis(role: str, start: str, end: str, plant: str):
+    """Run the role-specific KPI, trend and comparison queries"""
+    with db_cursor() as conn:
+        # Handle plant filter - ensure it's never None or empty
+        plant = plant if plant and plant.strip() else "all"
+    
+        logger.info(f"KPI request: role={role}, plant={plant}, start={start}, end={end}")
+    
+        # Role-specific KPIs, aggregated per fact table before combining
+        kpis_result = compute_kpi_row(conn, role, start, end, plant)
+    
+        # Role-specific trend series
+        trends = timed_query('trends', json_records, conn, *query(trend_query(role), start=start, end=end, plant=plant))
+    
+        # Get plant comparisons (monthly rollup when the window is whole months)
+        rollup_table, _ = rollup_source(start, end)
+        comparisons = timed_query('plant_comparison', json_records, conn, *query(f"plant_comparison:{rollup_table}", start=start, end=end))
+    
+    # Return role-specific KPIs
+    response = {
+        'status': 'ok',
+        'role': role,
+        'kpis': _role_kpis(role, kpis_result),
+        'series': {'trends': trends},
+        'comparisons': comparisons
+    }
+    
+    return response
+
 @api_router.get("/kpis")
 async def get_kpis(
+    request: Request,
     role: str = "CXO",
     start: str = "2024-01-01",
     end: str = "2025-12-31",
@@ -206,299 +374,82 @@ async def get_kpis(
 ):
     """Get role-specific KPIs for specified filters"""
     try:
-        conn = get_db_connection()
-        
-        # Handle plant filter - ensure it's never None or empty
-        plant = plant if plant and plant.strip() else "all"
-        
-        logger.info(f"KPI request: role={role}, plant={plant}, start={start}, end={end}")
-        
-        # Role-specific KPI queries with correct plant filters
-        if role == "CXO":
-            plant_filter = "" if plant == "all" else f"AND p.plant_name = '{plant}'"
-            # Strategic: Financial, Value Creation, Risk
-            query = f"""
-                SELECT 
-                    SUM(p.cement_mt) as total_cement_mt,
-                    SUM(p.clinker_mt) as total_clinker_mt,
-                    AVG(f.ebitda_rs_ton) as avg_ebitda_ton,
-                    AVG(f.cost_rs_ton) as avg_cost_ton,
-                    AVG(f.margin_pct) as avg_margin_pct,
-                    AVG(e.power_kwh_ton) as avg_power_kwh_ton,
-                    AVG(q.clinker_factor) as avg_clinker_factor,
-                    AVG(p.capacity_util_pct) as avg_capacity_util,
-                    AVG(s.realization_rs_ton) as avg_realization_ton,
-                    AVG(s.freight_rs_ton) as avg_freight_ton,
-                    AVG(s.otif_pct) as avg_otif_pct,
-                    AVG(e.afr_pct) as avg_afr_pct
-                FROM fact_production p
-                LEFT JOIN fact_finance f ON p.date = f.date AND p.plant_name = f.plant_name
-                LEFT JOIN fact_energy e ON p.date = e.date AND p.plant_name = e.plant_name
-                LEFT JOIN fact_quality q ON p.date = q.date AND p.plant_name = q.plant_name
-                LEFT JOIN fact_sales s ON p.date = s.date AND p.plant_name = s.plant_name
-                WHERE p.date >= '{start}' AND p.date <= '{end}' {plant_filter}
-            """
-        
-        elif role == "Plant Head":
-            plant_filter = "" if plant == "all" else f"AND p.plant_name = '{plant}'"
-            # Operations: Production, Equipment, Quality, Loss Management
-            query = f"""
-                SELECT 
-                    SUM(p.cement_mt) as total_cement_mt,
-                    AVG(p.cement_mt) as avg_daily_cement,
-                    SUM(p.clinker_mt) as total_clinker_mt,
-                    AVG(p.capacity_util_pct) as avg_capacity_util,
-                    AVG(p.downtime_hrs) as avg_downtime_hrs,
-                    AVG(q.blaine) as avg_blaine,
-                    AVG(q.strength_28d) as avg_strength_28d,
-                    AVG(q.clinker_factor) as avg_clinker_factor,
-                    AVG(m.breakdown_hrs) as avg_breakdown_hrs,
-                    AVG(m.mtbf_hrs) as avg_mtbf_hrs,
-                    AVG(m.mttr_hrs) as avg_mttr_hrs
-                FROM fact_production p
-                LEFT JOIN fact_quality q ON p.date = q.date AND p.plant_name = q.plant_name
-                LEFT JOIN fact_maintenance m ON p.date = m.date AND p.plant_name = m.plant_name
-                WHERE p.date >= '{start}' AND p.date <= '{end}' {plant_filter}
-            """
-        
-        elif role == "Energy Manager":
-            plant_filter = "" if plant == "all" else f"AND e.plant_name = '{plant}'"
-            # Energy: Cost Reduction, Sustainability, Optimization
-            query = f"""
-                SELECT 
-                    AVG(e.power_kwh_ton) as avg_power_kwh_ton,
-                    AVG(e.heat_kcal_kg) as avg_heat_kcal_kg,
-                    AVG(e.fuel_cost_rs_ton) as avg_fuel_cost_ton,
-                    AVG(e.afr_pct) as avg_afr_pct,
-                    MAX(e.power_kwh_ton) as max_power_kwh_ton,
-                    MIN(e.power_kwh_ton) as min_power_kwh_ton,
-                    MAX(e.heat_kcal_kg) as max_heat_kcal_kg,
-                    MIN(e.heat_kcal_kg) as min_heat_kcal_kg,
-                    SUM(p.cement_mt) as total_cement_mt
-                FROM fact_energy e
-                LEFT JOIN fact_production p ON e.date = p.date AND e.plant_name = p.plant_name
-                WHERE e.date >= '{start}' AND e.date <= '{end}' {plant_filter}
-            """
-        
-        elif role == "Sales":
-            plant_filter = "" if plant == "all" else f"AND s.plant_name = '{plant}'"
-            # Sales: Margin, Pricing, Logistics, Market
-            query = f"""
-                SELECT 
-                    SUM(s.dispatch_mt) as total_dispatch_mt,
-                    AVG(s.realization_rs_ton) as avg_realization_ton,
-                    AVG(s.freight_rs_ton) as avg_freight_ton,
-                    AVG(s.otif_pct) as avg_otif_pct,
-                    AVG(f.margin_pct) as avg_margin_pct,
-                    AVG(f.ebitda_rs_ton) as avg_ebitda_ton,
-                    MAX(s.realization_rs_ton) as max_realization_ton,
-                    MIN(s.realization_rs_ton) as min_realization_ton
-                FROM fact_sales s
-                LEFT JOIN fact_finance f ON s.date = f.date AND s.plant_name = f.plant_name
-                WHERE s.date >= '{start}' AND s.date <= '{end}' {plant_filter}
-            """
-        
-        else:
-            # Default to CXO view
-            query = f"""
-                SELECT 
-                    SUM(p.cement_mt) as total_cement_mt,
-                    AVG(f.ebitda_rs_ton) as avg_ebitda_ton,
-                    AVG(e.power_kwh_ton) as avg_power_kwh_ton,
-                    AVG(f.margin_pct) as avg_margin_pct
-                FROM fact_production p
-                LEFT JOIN fact_finance f ON p.date = f.date AND p.plant_name = f.plant_name
-                LEFT JOIN fact_energy e ON p.date = e.date AND p.plant_name = e.plant_name
-                WHERE p.date >= '{start}' AND p.date <= '{end}' {plant_filter}
-            """
-        
-        kpis_result = conn.execute(query).fetchdf().to_dict('records')[0]
-        
-        # Get role-specific trend data
-        trend_filter = "" if plant == "all" else f"AND plant_name = '{plant}'"
-        
-        if role == "CXO":
-            # EBITDA and Margin trends
-            trend_query = f"""
-                SELECT date, AVG(ebitda_rs_ton) as ebitda, AVG(margin_pct) as margin
-                FROM fact_finance
-                WHERE date >= '{start}' AND date <= '{end}' {trend_filter}
-                GROUP BY date ORDER BY date
-            """
-        elif role == "Plant Head":
-            # Capacity and downtime trends
-            trend_query = f"""
-                SELECT date, AVG(capacity_util_pct) as capacity, AVG(downtime_hrs) as downtime
-                FROM fact_production
-                WHERE date >= '{start}' AND date <= '{end}' {trend_filter}
-                GROUP BY date ORDER BY date
-            """
-        elif role == "Energy Manager":
-            # Power and AFR trends
-            trend_query = f"""
-                SELECT date, AVG(power_kwh_ton) as power, AVG(afr_pct) as afr
-                FROM fact_energy
-                WHERE date >= '{start}' AND date <= '{end}' {trend_filter}
-                GROUP BY date ORDER BY date
-            """
-        elif role == "Sales":
-            # Realization and OTIF trends
-            trend_query = f"""
-                SELECT date, AVG(realization_rs_ton) as realization, AVG(otif_pct) as otif
-                FROM fact_sales
-                WHERE date >= '{start}' AND date <= '{end}' {trend_filter}
-                GROUP BY date ORDER BY date
-            """
-        else:
-            # Default margin trend
-            trend_query = f"""
-                SELECT date, AVG(margin_pct) as value
-                FROM fact_finance
-                WHERE date >= '{start}' AND date <= '{end}' {trend_filter}
-                GROUP BY date ORDER BY date
-            """
-        
-        trends = conn.execute(trend_query).fetchdf()
-        trends['date'] = trends['date'].astype(str)
-        trends = trends.fillna(0)
-        
-        # Get plant comparisons
-        comparison_query = f"""
-            SELECT 
-                f.plant_name,
-                AVG(f.ebitda_rs_ton) as ebitda_ton
-            FROM fact_finance f
-            WHERE f.date >= '{start}' AND f.date <= '{end}'
-            GROUP BY f.plant_name
-            ORDER BY ebitda_ton DESC
-        """
-        
-        comparisons = conn.execute(comparison_query).fetchdf()
-        comparisons = comparisons.fillna(0)
-        comparisons = comparisons.to_dict('records')
-        
-        conn.close()
-        
-        # Clean KPI results - handle NaN
-        for key in kpis_result:
-            if kpis_result[key] is None or (isinstance(kpis_result[key], float) and (kpis_result[key] != kpis_result[key])):
-                kpis_result[key] = 0
-        
-        # Return role-specific KPIs
-        response = {
-            'status': 'ok',
-            'role': role,
-            'kpis': {},
-            'series': {'trends': trends.to_dict('records')},
-            'comparisons': comparisons
-        }
-        
-        # Map KPIs based on role with comprehensive metrics
-        if role == "CXO":
-            response['kpis'] = {
-                # Primary Financial KPIs
-                'total_cement_mt': round(kpis_result.get('total_cement_mt', 0) or 0, 2),
-                'total_clinker_mt': round(kpis_result.get('total_clinker_mt', 0) or 0, 2),
-                'avg_ebitda_ton': round(kpis_result.get('avg_ebitda_ton', 0) or 0, 2),
-                'avg_cost_ton': round(kpis_result.get('avg_cost_ton', 0) or 0, 2),
-                'avg_margin_pct': round(kpis_result.get('avg_margin_pct', 0) or 0, 2),
-                # Operations KPIs
-                'avg_capacity_util': round(kpis_result.get('avg_capacity_util', 0) or 0, 2),
-                'avg_clinker_factor': round(kpis_result.get('avg_clinker_factor', 0) or 0, 3),
-                # Energy KPIs
-                'avg_power_kwh_ton': round(kpis_result.get('avg_power_kwh_ton', 0) or 0, 2),
-                'avg_afr_pct': round(kpis_result.get('avg_afr_pct', 0) or 0, 2),
-                # Sales & Logistics KPIs
-                'avg_realization_ton': round(kpis_result.get('avg_realization_ton', 0) or 0, 2),
-                'avg_freight_ton': round(kpis_result.get('avg_freight_ton', 0) or 0, 2),
-                'avg_otif_pct': round(kpis_result.get('avg_otif_pct', 0) or 0, 2),
-                # Calculated KPIs
-                'revenue_per_ton': round((kpis_result.get('avg_realization_ton', 0) or 0), 2),
-                'net_margin_ton': round((kpis_result.get('avg_ebitda_ton', 0) or 0) - (kpis_result.get('avg_cost_ton', 0) or 0), 2),
-                'clinker_production': round((kpis_result.get('total_cement_mt', 0) or 0) * (kpis_result.get('avg_clinker_factor', 0) or 0), 2)
-            }
-        elif role == "Plant Head":
-            response['kpis'] = {
-                # Production KPIs
-                'total_cement_mt': round(kpis_result.get('total_cement_mt', 0) or 0, 2),
-                'avg_daily_cement': round(kpis_result.get('avg_daily_cement', 0) or 0, 2),
-                'total_clinker_mt': round(kpis_result.get('total_clinker_mt', 0) or 0, 2),
-                # Efficiency KPIs
-                'avg_capacity_util': round(kpis_result.get('avg_capacity_util', 0) or 0, 2),
-                'avg_downtime_hrs': round(kpis_result.get('avg_downtime_hrs', 0) or 0, 2),
-                # Quality KPIs
-                'avg_blaine': round(kpis_result.get('avg_blaine', 0) or 0, 2),
-                'avg_strength_28d': round(kpis_result.get('avg_strength_28d', 0) or 0, 2),
-                'avg_clinker_factor': round(kpis_result.get('avg_clinker_factor', 0) or 0, 3),
-                # Maintenance KPIs
-                'avg_breakdown_hrs': round(kpis_result.get('avg_breakdown_hrs', 0) or 0, 2),
-                'avg_mtbf_hrs': round(kpis_result.get('avg_mtbf_hrs', 0) or 0, 2),
-                'avg_mttr_hrs': round(kpis_result.get('avg_mttr_hrs', 0) or 0, 2),
-                # Calculated KPIs
-                'uptime_pct': round(100 - ((kpis_result.get('avg_downtime_hrs', 0) or 0) / 24 * 100), 2),
-                'daily_clinker': round((kpis_result.get('avg_daily_cement', 0) or 0) * (kpis_result.get('avg_clinker_factor', 0) or 0), 2),
-                'production_days': round((kpis_result.get('total_cement_mt', 0) or 0) / (kpis_result.get('avg_daily_cement', 0) or 1), 0)
-            }
-        elif role == "Energy Manager":
-            response['kpis'] = {
-                # Power KPIs
-                'avg_power_kwh_ton': round(kpis_result.get('avg_power_kwh_ton', 0) or 0, 2),
-                'max_power_kwh_ton': round(kpis_result.get('max_power_kwh_ton', 0) or 0, 2),
-                'min_power_kwh_ton': round(kpis_result.get('min_power_kwh_ton', 0) or 0, 2),
-                'power_variance': round((kpis_result.get('max_power_kwh_ton', 0) or 0) - (kpis_result.get('min_power_kwh_ton', 0) or 0), 2),
-                # Thermal KPIs
-                'avg_heat_kcal_kg': round(kpis_result.get('avg_heat_kcal_kg', 0) or 0, 2),
-                'max_heat_kcal_kg': round(kpis_result.get('max_heat_kcal_kg', 0) or 0, 2),
-                'min_heat_kcal_kg': round(kpis_result.get('min_heat_kcal_kg', 0) or 0, 2),
-                'heat_variance': round((kpis_result.get('max_heat_kcal_kg', 0) or 0) - (kpis_result.get('min_heat_kcal_kg', 0) or 0), 2),
-                # Cost & Sustainability KPIs
-                'avg_fuel_cost_ton': round(kpis_result.get('avg_fuel_cost_ton', 0) or 0, 2),
-                'avg_afr_pct': round(kpis_result.get('avg_afr_pct', 0) or 0, 2),
-                'total_cement_mt': round(kpis_result.get('total_cement_mt', 0) or 0, 2),
-                # Performance KPIs
-                'best_power': round(kpis_result.get('min_power_kwh_ton', 0) or 0, 2),
-                'worst_power': round(kpis_result.get('max_power_kwh_ton', 0) or 0, 2),
-                'savings_potential': round(((kpis_result.get('avg_power_kwh_ton', 0) or 0) - (kpis_result.get('min_power_kwh_ton', 0) or 0)) * (kpis_result.get('total_cement_mt', 0) or 0) * 5, 2)
-            }
-        elif role == "Sales":
-            response['kpis'] = {
-                # Volume KPIs
-                'total_dispatch_mt': round(kpis_result.get('total_dispatch_mt', 0) or 0, 2),
-                # Pricing KPIs
-                'avg_realization_ton': round(kpis_result.get('avg_realization_ton', 0) or 0, 2),
-                'max_realization_ton': round(kpis_result.get('max_realization_ton', 0) or 0, 2),
-                'min_realization_ton': round(kpis_result.get('min_realization_ton', 0) or 0, 2),
-                'price_variance': round((kpis_result.get('max_realization_ton', 0) or 0) - (kpis_result.get('min_realization_ton', 0) or 0), 2),
-                # Logistics KPIs
-                'avg_freight_ton': round(kpis_result.get('avg_freight_ton', 0) or 0, 2),
-                'avg_otif_pct': round(kpis_result.get('avg_otif_pct', 0) or 0, 2),
-                # Financial KPIs
-                'avg_margin_pct': round(kpis_result.get('avg_margin_pct', 0) or 0, 2),
-                'avg_ebitda_ton': round(kpis_result.get('avg_ebitda_ton', 0) or 0, 2),
-                # Calculated KPIs
-                'best_realization': round(kpis_result.get('max_realization_ton', 0) or 0, 2),
-                'worst_realization': round(kpis_result.get('min_realization_ton', 0) or 0, 2),
-                'net_realization': round((kpis_result.get('avg_realization_ton', 0) or 0) - (kpis_result.get('avg_freight_ton', 0) or 0), 2),
-                'total_revenue': round((kpis_result.get('total_dispatch_mt', 0) or 0) * (kpis_result.get('avg_realization_ton', 0) or 0), 2),
-                'revenue_per_day': round(((kpis_result.get('total_dispatch_mt', 0) or 0) * (kpis_result.get('avg_realization_ton', 0) or 0)) / 365, 2)
-            }
-        else:
-            # Default view
-            response['kpis'] = {
-                'total_cement_mt': round(kpis_result.get('total_cement_mt', 0) or 0, 2),
-                'avg_ebitda_ton': round(kpis_result.get('avg_ebitda_ton', 0) or 0, 2),
-                'avg_power_kwh_ton': round(kpis_result.get('avg_power_kwh_ton', 0) or 0, 2),
-                'avg_margin_pct': round(kpis_result.get('avg_margin_pct', 0) or 0, 2)
-            }
-        
-        return response
-    
+        return await conditional_response(request, 'kpis', _compute_kpis, role=role, start=start, end=end, plant=plant)
     except Exception as e:
         logger.error(f"KPI error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _compute_compare(role: str, start: str, end: str, plants: List[str]):
+    """Every plant's role KPIs and per-plant chart series, each from one query grouped by plant"""
+    with db_cursor() as conn:
+        rows = compute_plant_kpi_rows(conn, role, start, end, plants)
+        charts = {name: timed_query(f"plant_chart:{name}", json_columns, conn, sql, params)
+                  for name, (sql, params) in plant_chart_queries(start, end, plants).items()}
+    cards = [_role_kpis(role, rows.get(plant, {})) for plant in plants]
+    return {
+        'status': 'ok',
+        'role': role,
+        'plants': plants,
+        # one array per KPI, in the order of 'plants'
+        'kpis': {name: [card[name] for card in cards] for name in cards[0]},
+        # one array per column: key, plant_name and the measures
+        'charts': charts
+    }
+
+@api_router.get("/compare")
+async def compare_plants(
+    request: Request,
+    plants: Optional[List[str]] = Query(None, alias="plant"),
+    role: str = "CXO",
+    start: str = "2024-01-01",
+    end: str = "2025-12-31"
+):
+    """Compare plants (repeat ?plant=): their role KPIs and chart series as one columnar payload"""
+    plants = list(dict.fromkeys(p.strip() for p in plants or [] if p.strip() and p.strip() != 'all'))
+    if not plants:
+        raise HTTPException(status_code=400, detail="Name at least one plant to compare")
+    try:
+        return await conditional_response(request, 'compare', _compute_compare, role=role, start=start, end=end, plants=plants)
+    except Exception as e:
+        logger.error(f"Compare error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _shape_charts(charts: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn the cost waterfall and performance radar summary rows into their chart data"""
+    # Cost Breakdown (for waterfall) - plant-days reporting energy, sales and finance
+    cost_breakdown = charts['cost_waterfall'][0]
+    power_cost = (cost_breakdown['power'] or 0) * 6
+    charts['cost_waterfall'] = [
+        {'name': 'Realization', 'value': round(cost_breakdown.get('realization', 0) or 0, 0), 'type': 'total'},
+        {'name': 'Fuel Cost', 'value': -round(cost_breakdown.get('fuel_cost', 0) or 0, 0), 'type': 'cost'},
+        {'name': 'Power Cost', 'value': -round(power_cost, 0), 'type': 'cost'},
+        {'name': 'Freight', 'value': -round(cost_breakdown.get('freight_cost', 0) or 0, 0), 'type': 'cost'},
+        {'name': 'Other Costs', 'value': -round((cost_breakdown.get('total_cost', 0) or 0) - (cost_breakdown.get('fuel_cost', 0) or 0) - power_cost, 0), 'type': 'cost'},
+        {'name': 'EBITDA', 'value': round(cost_breakdown.get('ebitda', 0) or 0, 0), 'type': 'profit'}
+    ]
+
+    # Performance Radar Data - plant-days reporting every domain in the radar
+    perf_data = charts['performance_radar'][0]
+
+    # Normalize to 0-100 scale
+    charts['performance_radar'] = [
+        {'metric': 'Capacity Util', 'current': round(perf_data.get('capacity', 0) or 0, 1), 'target': 90},
+        {'metric': 'Energy Eff', 'current': round(100 - ((perf_data.get('power', 75) or 75) - 65) * 3, 1), 'target': 85},
+        {'metric': 'Quality', 'current': round(min((perf_data.get('quality', 40) or 40) / 55 * 100, 100), 1), 'target': 90},
+        {'metric': 'Delivery', 'current': round(perf_data.get('delivery', 0) or 0, 1), 'target': 95},
+        {'metric': 'Margin', 'current': round(perf_data.get('margin', 0) or 0, 1), 'target': 25},
+        {'metric': 'AFR%', 'current': round(perf_data.get('sustainability', 0) or 0, 1), 'target': 15}
+    ]
+
+    return charts
+
+def _compute_chart_data(role: str, start: str, end: str, plant: str):
+    """Run the dashboard chart queries as one batch"""
+    return {'status': 'ok', 'charts': _shape_charts(run_chart_batch(list(CHART_SPECS), start, end, plant))}
+
 @api_router.get("/charts")
 async def get_chart_data(
+    request: Request,
     role: str = "CXO",
     start: str = "2024-01-01",
     end: str = "2025-12-31",
@@ -506,191 +457,83 @@ async def get_chart_data(
 ):
     """Get comprehensive chart data for dashboard visualizations"""
     try:
-        conn = get_db_connection()
-        plant = plant if plant and plant.strip() else "all"
-        plant_filter = "" if plant == "all" else f"AND plant_name = '{plant}'"
-        
-        charts = {}
-        
-        # 1. Monthly Production Trend
-        monthly_prod = conn.execute(f"""
-            SELECT 
-                strftime(date, '%Y-%m') as month,
-                SUM(cement_mt) as cement,
-                SUM(clinker_mt) as clinker,
-                AVG(capacity_util_pct) as capacity
-            FROM fact_production
-            WHERE date >= '{start}' AND date <= '{end}' {plant_filter}
-            GROUP BY strftime(date, '%Y-%m')
-            ORDER BY month
-        """).fetchdf()
-        monthly_prod = monthly_prod.fillna(0)
-        charts['monthly_production'] = monthly_prod.to_dict('records')
-        
-        # 2. Plant-wise Production Distribution
-        plant_prod = conn.execute(f"""
-            SELECT 
-                plant_name,
-                SUM(cement_mt) as cement,
-                AVG(capacity_util_pct) as capacity
-            FROM fact_production
-            WHERE date >= '{start}' AND date <= '{end}'
-            GROUP BY plant_name
-            ORDER BY cement DESC
-        """).fetchdf()
-        plant_prod = plant_prod.fillna(0)
-        charts['plant_production'] = plant_prod.to_dict('records')
-        
-        # 3. Energy Consumption by Plant
-        energy_plant = conn.execute(f"""
-            SELECT 
-                plant_name,
-                AVG(power_kwh_ton) as power,
-                AVG(heat_kcal_kg) as heat,
-                AVG(afr_pct) as afr
-            FROM fact_energy
-            WHERE date >= '{start}' AND date <= '{end}'
-            GROUP BY plant_name
-            ORDER BY power
-        """).fetchdf()
-        energy_plant = energy_plant.fillna(0)
-        charts['energy_by_plant'] = energy_plant.to_dict('records')
-        
-        # 4. Quality Metrics by Plant
-        quality = conn.execute(f"""
-            SELECT 
-                plant_name,
-                AVG(blaine) as blaine,
-                AVG(strength_28d) as strength,
-                AVG(clinker_factor) as clinker_factor
-            FROM fact_quality
-            WHERE date >= '{start}' AND date <= '{end}'
-            GROUP BY plant_name
-        """).fetchdf()
-        quality = quality.fillna(0)
-        charts['quality_by_plant'] = quality.to_dict('records')
-        
-        # 5. Sales by Region
-        sales_region = conn.execute(f"""
-            SELECT 
-                region,
-                SUM(dispatch_mt) as dispatch,
-                AVG(realization_rs_ton) as realization,
-                AVG(otif_pct) as otif
-            FROM fact_sales
-            WHERE date >= '{start}' AND date <= '{end}'
-            GROUP BY region
-            ORDER BY dispatch DESC
-        """).fetchdf()
-        sales_region = sales_region.fillna(0)
-        charts['sales_by_region'] = sales_region.to_dict('records')
-        
-        # 6. Monthly Financial Trend
-        monthly_fin = conn.execute(f"""
-            SELECT 
-                strftime(date, '%Y-%m') as month,
-                AVG(cost_rs_ton) as cost,
-                AVG(ebitda_rs_ton) as ebitda,
-                AVG(margin_pct) as margin
-            FROM fact_finance
-            WHERE date >= '{start}' AND date <= '{end}' {plant_filter}
-            GROUP BY strftime(date, '%Y-%m')
-            ORDER BY month
-        """).fetchdf()
-        monthly_fin = monthly_fin.fillna(0)
-        charts['monthly_finance'] = monthly_fin.to_dict('records')
-        
-        # 7. Maintenance KPIs by Plant
-        maintenance = conn.execute(f"""
-            SELECT 
-                plant_name,
-                AVG(breakdown_hrs) as breakdown,
-                AVG(mtbf_hrs) as mtbf,
-                AVG(mttr_hrs) as mttr
-            FROM fact_maintenance
-            WHERE date >= '{start}' AND date <= '{end}'
-            GROUP BY plant_name
-        """).fetchdf()
-        maintenance = maintenance.fillna(0)
-        charts['maintenance_by_plant'] = maintenance.to_dict('records')
-        
-        # 8. Cost Breakdown (for waterfall)
-        cost_breakdown = conn.execute(f"""
-            SELECT 
-                AVG(e.fuel_cost_rs_ton) as fuel_cost,
-                AVG(e.power_kwh_ton) * 6 as power_cost,
-                AVG(s.freight_rs_ton) as freight_cost,
-                AVG(f.cost_rs_ton) as total_cost,
-                AVG(s.realization_rs_ton) as realization,
-                AVG(f.ebitda_rs_ton) as ebitda
-            FROM fact_energy e
-            JOIN fact_sales s ON e.date = s.date AND e.plant_name = s.plant_name
-            JOIN fact_finance f ON e.date = f.date AND e.plant_name = f.plant_name
-            WHERE e.date >= '{start}' AND e.date <= '{end}'
-        """).fetchdf().to_dict('records')[0]
-        
-        charts['cost_waterfall'] = [
-            {'name': 'Realization', 'value': round(cost_breakdown.get('realization', 0) or 0, 0), 'type': 'total'},
-            {'name': 'Fuel Cost', 'value': -round(cost_breakdown.get('fuel_cost', 0) or 0, 0), 'type': 'cost'},
-            {'name': 'Power Cost', 'value': -round(cost_breakdown.get('power_cost', 0) or 0, 0), 'type': 'cost'},
-            {'name': 'Freight', 'value': -round(cost_breakdown.get('freight_cost', 0) or 0, 0), 'type': 'cost'},
-            {'name': 'Other Costs', 'value': -round((cost_breakdown.get('total_cost', 0) or 0) - (cost_breakdown.get('fuel_cost', 0) or 0) - (cost_breakdown.get('power_cost', 0) or 0), 0), 'type': 'cost'},
-            {'name': 'EBITDA', 'value': round(cost_breakdown.get('ebitda', 0) or 0, 0), 'type': 'profit'}
-        ]
-        
-        # 9. Weekly Trend (last 12 weeks) - DuckDB syntax
-        weekly = conn.execute(f"""
-            SELECT 
-                strftime(date, '%Y-W%W') as week,
-                SUM(cement_mt) as cement,
-                AVG(capacity_util_pct) as capacity
-            FROM fact_production
-            WHERE date >= '{end}'::DATE - INTERVAL '84 days' AND date <= '{end}' {plant_filter}
-            GROUP BY strftime(date, '%Y-W%W')
-            ORDER BY week
-        """).fetchdf()
-        weekly = weekly.fillna(0)
-        charts['weekly_trend'] = weekly.to_dict('records')
-        
-        # 10. Performance Radar Data
-        perf_data = conn.execute(f"""
-            SELECT 
-                AVG(p.capacity_util_pct) as capacity,
-                AVG(e.power_kwh_ton) as power,
-                AVG(q.strength_28d) as quality,
-                AVG(s.otif_pct) as delivery,
-                AVG(f.margin_pct) as margin,
-                AVG(e.afr_pct) as sustainability
-            FROM fact_production p
-            JOIN fact_energy e ON p.date = e.date AND p.plant_name = e.plant_name
-            JOIN fact_quality q ON p.date = q.date AND p.plant_name = q.plant_name
-            JOIN fact_sales s ON p.date = s.date AND p.plant_name = s.plant_name
-            JOIN fact_finance f ON p.date = f.date AND p.plant_name = f.plant_name
-            WHERE p.date >= '{start}' AND p.date <= '{end}' {plant_filter}
-        """).fetchdf().to_dict('records')[0]
-        
-        # Normalize to 0-100 scale
-        charts['performance_radar'] = [
-            {'metric': 'Capacity Util', 'current': round(perf_data.get('capacity', 0) or 0, 1), 'target': 90},
-            {'metric': 'Energy Eff', 'current': round(100 - ((perf_data.get('power', 75) or 75) - 65) * 3, 1), 'target': 85},
-            {'metric': 'Quality', 'current': round(min((perf_data.get('quality', 40) or 40) / 55 * 100, 100), 1), 'target': 90},
-            {'metric': 'Delivery', 'current': round(perf_data.get('delivery', 0) or 0, 1), 'target': 95},
-            {'metric': 'Margin', 'current': round(perf_data.get('margin', 0) or 0, 1), 'target': 25},
-            {'metric': 'AFR%', 'current': round(perf_data.get('sustainability', 0) or 0, 1), 'target': 15}
-        ]
-        
-        conn.close()
-        return {'status': 'ok', 'charts': charts}
-        
+        return await conditional_response(request, 'charts', _compute_chart_data, role=role, start=start, end=end, plant=plant)
     except Exception as e:
         logger.error(f"Charts error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _compute_dashboard(role: str, start: str, end: str, plant: str):
+    """The /api/kpis and /api/charts results of one filter set, from the dashboard's shared aggregates"""
+    plant = plant if plant and plant.strip() else "all"
+    results = run_dashboard(role, start, end, plant)
+    kpis_result = results.pop('kpis')[0]
+    trends, comparisons = results.pop('trends'), results.pop('comparisons')
+    return {
+        'status': 'ok',
+        'role': role,
+        'kpis': _role_kpis(role, kpis_result),
+        'series': {'trends': trends},
+        'comparisons': comparisons,
+        'charts': _shape_charts({name: results[name] for name in CHART_SPECS})
+    }
+
+@api_router.get("/dashboard")
+async def get_dashboard(
+    request: Request,
+    role: str = "CXO",
+    start: str = "2024-01-01",
+    end: str = "2025-12-31",
+    plant: str = "all"
+):
+    """Get the role's KPIs, trend, plant comparison and chart data for a dashboard page in one response"""
+    try:
+        return await conditional_response(request, 'dashboard', _compute_dashboard, role=role, start=start, end=end, plant=plant)
+    except Exception as e:
+        logger.error(f"Dashboard error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _compute_series(name: str, role: str, start: str, end: str, plant: str, format: str):
+    """Run one trend or chart series query, serialized as JSON or Arrow IPC"""
+    if name == 'trends':
+        label, (sql, params) = 'trends', query(trend_query(role), start=start, end=end, plant=plant)
+    else:
+        label, (sql, params) = f"chart:{name}", chart_query(name, start, end, plant)
+    with db_cursor() as conn:
+        if format == 'arrow':
+            return timed_query(label, arrow_ipc, conn, sql, params)
+        return {'status': 'ok', 'name': name, 'records': timed_query(label, json_records, conn, sql, params)}
+
+@api_router.get("/series/{name}")
+async def get_series(
+    request: Request,
+    name: str,
+    role: str = "CXO",
+    start: str = "2024-01-01",
+    end: str = "2025-12-31",
+    plant: str = "all",
+    format: str = "json"
+):
+    """Get the role's trend series or one grouped chart as JSON records or an Arrow IPC stream"""
+    if name != 'trends' and not (name in CHART_SPECS and CHART_SPECS[name]['key']):
+        raise HTTPException(status_code=404, detail=f"Unknown series '{name}'")
+    if format not in ('json', 'arrow'):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'arrow'")
+    if format == 'arrow' and not ARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Arrow output requires pyarrow")
+    media_type = ARROW_STREAM_MEDIA_TYPE if format == 'arrow' else JSON_MEDIA_TYPE
+    try:
+        return await conditional_response(request, 'series', _compute_series, media_type=media_type,
+                                          name=name, role=role, start=start, end=end, plant=plant, format=format)
+    except Exception as e:
+        logger.error(f"Series error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.post("/insights")
 async def get_insights(request: InsightRequest):
     """Generate AI-powered insights"""
     try:
-        result = await generate_insight(request.question, request.contextFilters)
+        with request_context('insights'):
+            result = await generate_insight(request.question, request.contextFilters)
         return result
     except Exception as e:
         logger.error(f"Insight error: {str(e)}")
@@ -701,6 +544,45 @@ async def get_sample_prompts():
     """Get pre-baked sample prompts"""
     return {'prompts': SAMPLE_PROMPTS}
 
+@api_router.get("/stats/queries")
+async def get_query_stats():
+    """Get query pool queue depth, in-flight and connection pool counters"""
+    return {
+        'status': 'ok',
+        'executor': query_executor.stats(),
+        'connections': db_pool_stats(),
+        'ingestion_jobs': ingestion_jobs.stats()
+    }
+
+@api_router.get("/stats/cache")
+async def get_cache_stats():
+    """Get KPI/chart result cache hit/miss statistics"""
+    return {'status': 'ok', 'cache': result_cache.stats()}
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Get query latency histograms, rows and bytes per query, endpoint and role in the Prometheus text format"""
+    executor, connections, cache = query_executor.stats(), db_pool_stats(), result_cache.stats()
+    pools = [
+        ('starcement_query_pool_queued', 'gauge', 'Query pool work waiting for a worker', executor['queued']),
+        ('starcement_query_pool_in_flight', 'gauge', 'Query pool work running', executor['in_flight']),
+        ('starcement_db_cursors_in_use', 'gauge', 'Pooled DuckDB cursors checked out', connections['in_use']),
+        ('starcement_result_cache_hits_total', 'counter', 'Result cache hits', cache['hits']),
+        ('starcement_result_cache_misses_total', 'counter', 'Result cache misses', cache['misses']),
+        ('starcement_result_cache_bytes', 'gauge', 'Memory held by cached results', cache['bytes']),
+        ('starcement_data_version', 'gauge', 'Warehouse data version', cache['data_version'])
+    ]
+    return Response(metrics.render(pools), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api_router.get("/admin/profiles")
+async def get_profiles(
+    request_id: Optional[str] = Query(None, description="X-Profile-Id of a traced request"),
+    limit: int = Query(50, ge=1),
+    current_user: dict = Depends(require_cxo)
+):
+    """Get the slow-query log: DuckDB plans with operator timings and cardinalities, newest first"""
+    return {'status': 'ok', **slow_query_log.stats(), 'profiles': slow_query_log.entries(request_id, limit)}
+
 @api_router.get("/powerbi-token")
 async def get_powerbi_token():
     """Get Power BI embed token or offline mode flag"""
@@ -720,16 +602,21 @@ async def get_powerbi_token():
             'message': 'Power BI online mode - implement token exchange'
         }
 
+def _read_report(path: str, stamp: str) -> bytes:
+    """A precomputed report file's JSON, as stored (``stamp`` keys the cached copy to the file's version)"""
+    return Path(path).read_bytes()
+
 @api_router.get("/reports/{report_id}")
-async def get_report(report_id: str):
+async def get_report(request: Request, report_id: str):
     """Get report metadata for offline rendering"""
     # Return precomputed data for offline mode
     reports_dir = Path(__file__).parent.parent / 'samples' / 'precomputed'
     report_file = reports_dir / f"{report_id}.json"
     
     if report_file.exists():
-        with open(report_file, 'r') as f:
-            return json.load(f)
+        stat = report_file.stat()
+        return await conditional_response(request, 'reports', _read_report, path=str(report_file),
+                                          stamp=f"{stat.st_mtime_ns}-{stat.st_size}")
     else:
         return {
             'status': 'not_found',
@@ -858,6 +745,27 @@ def generate_email_html(kpis: dict, role: str, plant: str) -> str:
     
     return html
 
+def _fetch_report_kpis(plant: str):
+    """Aggregate the report KPIs across all dates for the given plant"""
+    kpis = {}
+    with db_cursor() as conn:
+        for table in REPORT_KPIS:
+            kpis.update(timed_query(f"report:{table}", fetch_row, conn, *query(f"report:{table}", plant=plant)))
+    
+    # Calculate derived KPIs
+    if kpis.get('avg_realization_ton') and kpis.get('avg_freight_ton'):
+        kpis['net_realization'] = kpis['avg_realization_ton'] - kpis['avg_freight_ton']
+    if kpis.get('total_dispatch_mt') and kpis.get('avg_realization_ton'):
+        kpis['total_revenue'] = kpis['total_dispatch_mt'] * kpis['avg_realization_ton']
+    if kpis.get('avg_realization_ton') and kpis.get('avg_cost_ton'):
+        kpis['revenue_per_ton'] = kpis['avg_realization_ton']
+    if kpis.get('avg_power_kwh_ton'):
+        kpis['savings_potential'] = (kpis['avg_power_kwh_ton'] - 70) * kpis.get('total_cement_mt', 0) * 6
+    if kpis.get('avg_downtime_hrs'):
+        kpis['uptime_pct'] = 100 - (kpis['avg_downtime_hrs'] / 24 * 100)
+    
+    return kpis
+
 @api_router.post("/send-report")
 async def send_report(request: EmailReportRequest, current_user: dict = Depends(get_current_user)):
     """Send KPI report to specified email"""
@@ -871,93 +779,10 @@ async def send_report(request: EmailReportRequest, current_user: dict = Depends(
     
     try:
         # Fetch KPIs for the report
-        conn = get_db_connection()
         role = request.role
         plant = request.plant if request.plant and request.plant.strip() else "all"
-        plant_filter = "" if plant == "all" else f"AND plant_name = '{plant}'"
-        
-        # Build KPIs based on role (simplified version)
-        kpis = {}
-        
-        # Common KPIs
-        result = conn.execute(f"""
-            SELECT 
-                SUM(cement_mt) as total_cement_mt,
-                AVG(capacity_util_pct) as avg_capacity_util
-            FROM fact_production
-            WHERE 1=1 {plant_filter}
-        """).fetchdf().to_dict('records')[0]
-        kpis.update(result)
-        
-        # Financial KPIs
-        fin_result = conn.execute(f"""
-            SELECT 
-                AVG(ebitda_rs_ton) as avg_ebitda_ton,
-                AVG(cost_rs_ton) as avg_cost_ton,
-                AVG(margin_pct) as avg_margin_pct
-            FROM fact_finance
-            WHERE 1=1 {plant_filter}
-        """).fetchdf().to_dict('records')[0]
-        kpis.update(fin_result)
-        
-        # Energy KPIs
-        energy_result = conn.execute(f"""
-            SELECT 
-                AVG(power_kwh_ton) as avg_power_kwh_ton,
-                AVG(heat_kcal_kg) as avg_heat_kcal_kg,
-                AVG(afr_pct) as avg_afr_pct,
-                AVG(fuel_cost_rs_ton) as avg_fuel_cost_ton
-            FROM fact_energy
-            WHERE 1=1 {plant_filter}
-        """).fetchdf().to_dict('records')[0]
-        kpis.update(energy_result)
-        
-        # Sales KPIs
-        sales_result = conn.execute(f"""
-            SELECT 
-                SUM(dispatch_mt) as total_dispatch_mt,
-                AVG(realization_rs_ton) as avg_realization_ton,
-                AVG(otif_pct) as avg_otif_pct,
-                AVG(freight_rs_ton) as avg_freight_ton
-            FROM fact_sales
-            WHERE 1=1 {plant_filter}
-        """).fetchdf().to_dict('records')[0]
-        kpis.update(sales_result)
-        
-        # Maintenance KPIs
-        maint_result = conn.execute(f"""
-            SELECT 
-                AVG(mtbf_hrs) as avg_mtbf_hrs,
-                AVG(mttr_hrs) as avg_mttr_hrs,
-                AVG(breakdown_hrs) as avg_downtime_hrs
-            FROM fact_maintenance
-            WHERE 1=1 {plant_filter}
-        """).fetchdf().to_dict('records')[0]
-        kpis.update(maint_result)
-        
-        # Quality KPIs
-        quality_result = conn.execute(f"""
-            SELECT 
-                AVG(strength_28d) as avg_strength_28d,
-                AVG(blaine) as avg_blaine
-            FROM fact_quality
-            WHERE 1=1 {plant_filter}
-        """).fetchdf().to_dict('records')[0]
-        kpis.update(quality_result)
-        
-        conn.close()
-        
-        # Calculate derived KPIs
-        if kpis.get('avg_realization_ton') and kpis.get('avg_freight_ton'):
-            kpis['net_realization'] = kpis['avg_realization_ton'] - kpis['avg_freight_ton']
-        if kpis.get('total_dispatch_mt') and kpis.get('avg_realization_ton'):
-            kpis['total_revenue'] = kpis['total_dispatch_mt'] * kpis['avg_realization_ton']
-        if kpis.get('avg_realization_ton') and kpis.get('avg_cost_ton'):
-            kpis['revenue_per_ton'] = kpis['avg_realization_ton']
-        if kpis.get('avg_power_kwh_ton'):
-            kpis['savings_potential'] = (kpis['avg_power_kwh_ton'] - 70) * kpis.get('total_cement_mt', 0) * 6
-        if kpis.get('avg_downtime_hrs'):
-            kpis['uptime_pct'] = 100 - (kpis['avg_downtime_hrs'] / 24 * 100)
+        with request_context('send-report', role):
+            kpis = await run_query(_fetch_report_kpis, plant)
         
         # Generate HTML email
         html_content = generate_email_html({'kpis': kpis}, role, plant)
@@ -971,7 +796,8 @@ async def send_report(request: EmailReportRequest, current_user: dict = Depends(
         }
         
         try:
-            email_response = await asyncio.to_thread(resend.Emails.send, params)
+            with timed_call('resend', 'send_email'):
+                email_response = await asyncio.to_thread(resend.Emails.send, params)
             logger.info(f"Email sent to {request.recipient_email}, ID: {email_response.get('id')}")
             
             return {
@@ -996,6 +822,8 @@ async def send_report(request: EmailReportRequest, current_user: dict = Depends(
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(ProfileMiddleware, authorize=_is_cxo)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1007,3 +835,8 @@ app.add_middleware(
 @app.on_event("shutdown")
 async def shutdown():
     logger.info("Shutting down API")
+    ingestion_jobs.shutdown()
+    query_executor.shutdown()
+    shutdown_chart_batch()
+    shutdown_profiler()
+    close_db()
@@ -0,0 +1,67 @@
+"""Immutable warehouse snapshots, for one writer process and any number of read-only serving processes.
+
+DuckDB lets a single process open a database file for writing, and while it
+does no other process can open the file, so the API ran as one uvicorn
+worker. With STAR_CEMENT_SNAPSHOT_DIR set, the process with write access
+(ingestion, migrations, reclustering) publishes the warehouse after every
+change: it checkpoints, copies the database file under a dot name, renames
+the copy to ``snapshot-<timestamp>.duckdb`` and then replaces CURRENT, which
+names the file and its data version. A reader never sees a partial file.
+
+Processes started with DUCKDB_READ_ONLY=true serve the file CURRENT names
+and look for a newer one every SNAPSHOT_POLL_SECONDS (see
+database.follow_snapshots); queries already running finish on the file they
+started on. The newest SNAPSHOT_KEEP snapshots are kept, so a file being
+read is never the one deleted. With the lake enabled, fact tables are views
+over lake versions, which must outlive the snapshots referencing them
+(LAKE_KEEP_VERSIONS >= SNAPSHOT_KEEP).
+"""
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.getenv("STAR_CEMENT_SNAPSHOT_DIR", "")
+SNAPSHOTS_ENABLED = bool(SNAPSHOT_DIR)
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "3"))
+SNAPSHOT_POLL_SECONDS = float(os.getenv("SNAPSHOT_POLL_SECONDS", "1"))
+
+POINTER = 'CURRENT'
+
+def _snapshots() -> list:
+    root = Path(SNAPSHOT_DIR)
+    return sorted(root.glob('snapshot-*.duckdb')) if root.is_dir() else []
+
+def publish(db_path: Path, data_version: int) -> Path:
+    """Copy the database file ``db_path`` (checkpointed, with writes held off) as the current snapshot"""
+    root = Path(SNAPSHOT_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+    name = f"snapshot-{time.time_ns():020d}.duckdb"
+    staging = root / f".{name}"
+    shutil.copyfile(db_path, staging)
+    staging.rename(root / name)
+    pointer = root / f".{POINTER}"
+    pointer.write_text(json.dumps({'file': name, 'data_version': data_version}))
+    os.replace(pointer, root / POINTER)
+    prune_snapshots()
+    return root / name
+
+def current_snapshot() -> Optional[Tuple[Path, int]]:
+    """(file, data version) of the current snapshot, None before the first is published"""
+    try:
+        pointer = json.loads((Path(SNAPSHOT_DIR) / POINTER).read_text())
+    except FileNotFoundError:
+        return None
+    return Path(SNAPSHOT_DIR) / pointer['file'], pointer['data_version']
+
+def prune_snapshots():
+    """Delete all but the newest SNAPSHOT_KEEP snapshots and abandoned copies"""
+    for path in _snapshots()[:-SNAPSHOT_KEEP]:
+        path.unlink(missing_ok=True)
+    for path in Path(SNAPSHOT_DIR).glob('.snapshot-*'):
+        path.unlink(missing_ok=True)
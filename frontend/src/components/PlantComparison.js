@@ -30,23 +30,17 @@ export default function PlantComparison({ plants, onClose }) {
     try {
       const token = localStorage.getItem('token');
       
-      // Fetch data for each selected plant
-      const plantDataPromises = plants.map(plantName =>
-        fetch(`${API}/kpis?role=CXO&plant=${encodeURIComponent(plantName)}&start=2024-07-01&end=2025-12-31`, {
-          headers: { 'Authorization': `Bearer ${token}` }
-        }).then(res => res.json())
-      );
+      // One request for all selected plants: KPIs and chart series come back as columns
+      const params = new URLSearchParams({ role: 'CXO', start: '2024-07-01', end: '2025-12-31' });
+      plants.forEach(plantName => params.append('plant', plantName));
+      const data = await fetch(`${API}/compare?${params}`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      }).then(res => res.json());
 
-      const chartDataPromises = plants.map(plantName =>
-        fetch(`${API}/charts?role=CXO&plant=${encodeURIComponent(plantName)}&start=2024-07-01&end=2025-12-31`, {
-          headers: { 'Authorization': `Bearer ${token}` }
-        }).then(res => res.json())
-      );
-
-      const [kpiResults, chartResults] = await Promise.all([
-        Promise.all(plantDataPromises),
-        Promise.all(chartDataPromises)
-      ]);
+      // Per-plant KPI objects, in the order of the plants requested
+      const kpiResults = plants.map((_, idx) => ({
+        kpis: Object.fromEntries(Object.entries(data.kpis || {}).map(([key, values]) => [key, values[idx]]))
+      }));
 
       // Process comparison data
       const comparison = {
@@ -60,7 +54,7 @@ export default function PlantComparison({ plants, onClose }) {
         production: buildProductionComparison(plants, kpiResults),
         financial: buildFinancialComparison(plants, kpiResults),
         energy: buildEnergyComparison(plants, kpiResults),
-        trends: buildTrendComparison(plants, chartResults)
+        trends: buildTrendComparison(data.charts?.monthly_finance)
       };
 
       setComparisonData(comparison);
@@ -154,18 +148,16 @@ export default function PlantComparison({ plants, onClose }) {
     ];
   };
 
-  const buildTrendComparison = (plants, chartResults) => {
+  const buildTrendComparison = (monthlyFinance) => {
     // Merge monthly data from all plants
     const monthlyData = {};
-    
-    plants.forEach((plant, idx) => {
-      const monthly = chartResults[idx]?.charts?.monthly_finance || [];
-      monthly.forEach(m => {
-        if (!monthlyData[m.month]) {
-          monthlyData[m.month] = { month: m.month };
-        }
-        monthlyData[m.month][`${plant}_ebitda`] = m.ebitda || 0;
-      });
+    const { month = [], plant_name = [], ebitda = [] } = monthlyFinance || {};
+
+    month.forEach((m, idx) => {
+      if (!monthlyData[m]) {
+        monthlyData[m] = { month: m };
+      }
+      monthlyData[m][`${plant_name[idx]}_ebitda`] = ebitda[idx] || 0;
     });
 
     return Object.values(monthlyData).sort((a, b) => a.month.localeCompare(b.month));
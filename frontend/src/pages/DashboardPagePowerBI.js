@@ -133,15 +133,13 @@ export default function DashboardPagePowerBI({ user }) {
         plant: plant || 'all'
       });
 
-      const [kpiRes, chartRes] = await Promise.all([
-        fetch(`${API}/kpis?${params}`, { headers: { 'Authorization': `Bearer ${token}` } }),
-        fetch(`${API}/charts?${params}`, { headers: { 'Authorization': `Bearer ${token}` } })
-      ]);
-
-      if (kpiRes.ok) setKpis(await kpiRes.json());
-      if (chartRes.ok) {
-        const chartData = await chartRes.json();
-        setCharts(chartData.charts);
+      // KPIs, trends, comparisons and charts in one request
+      const res = await fetch(`${API}/dashboard?${params}`, { headers: { 'Authorization': `Bearer ${token}` } });
+
+      if (res.ok) {
+        const data = await res.json();
+        setKpis(data);
+        setCharts(data.charts);
       }
     } catch (error) {
       console.error('Data fetch error:', error);
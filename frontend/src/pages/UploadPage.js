@@ -2,16 +2,20 @@ import React, { useState, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Upload, FileSpreadsheet, CheckCircle, AlertCircle, ArrowRight } from 'lucide-react';
 import { Button } from '@/components/ui/button';
+import { Checkbox } from '@/components/ui/checkbox';
 import { toast } from 'sonner';
 import NavBar from '@/components/NavBar';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+const JOB_POLL_INTERVAL_MS = 1000;
 
 export default function UploadPage({ user }) {
   const navigate = useNavigate();
   const [file, setFile] = useState(null);
   const [uploading, setUploading] = useState(false);
   const [uploadResult, setUploadResult] = useState(null);
+  const [jobProgress, setJobProgress] = useState(null);
+  const [mergeMode, setMergeMode] = useState(false);
   const [isDragging, setIsDragging] = useState(false);
 
   const handleDrop = useCallback((e) => {
@@ -50,12 +54,13 @@ export default function UploadPage({ user }) {
     }
 
     setUploading(true);
+    setUploadResult(null);
     const formData = new FormData();
     formData.append('file', file);
 
     try {
       const token = localStorage.getItem('token');
-      const response = await fetch(`${API}/upload`, {
+      const response = await fetch(`${API}/upload?mode=${mergeMode ? 'merge' : 'replace'}`, {
         method: 'POST',
         headers: {
           'Authorization': `Bearer ${token}`
@@ -65,16 +70,39 @@ export default function UploadPage({ user }) {
 
       const data = await response.json();
 
-      if (response.ok) {
-        setUploadResult(data);
+      if (!response.ok) {
+        toast.error(data.detail || 'Upload failed');
+        return;
+      }
+
+      // Ingestion runs in the background; poll the job until it finishes
+      let job = data.job;
+      setJobProgress(job);
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        const jobResponse = await fetch(`${API}/jobs/${data.job_id}`, {
+          headers: { 'Authorization': `Bearer ${token}` }
+        });
+        const jobData = await jobResponse.json();
+        if (!jobResponse.ok) {
+          toast.error(jobData.detail || 'Lost track of the upload job');
+          return;
+        }
+        job = jobData.job;
+        setJobProgress(job);
+      }
+
+      if (job.status === 'succeeded') {
+        setUploadResult(job.result);
         toast.success('Data uploaded and ingested successfully!');
       } else {
-        toast.error(data.detail || 'Upload failed');
+        toast.error(job.error || 'Upload failed');
       }
     } catch (error) {
       toast.error('Network error. Please try again.');
     } finally {
       setUploading(false);
+      setJobProgress(null);
     }
   };
 
@@ -139,14 +167,28 @@ export default function UploadPage({ user }) {
 
         {/* Action Buttons */}
         {file && (
-          <div className="mt-6 flex gap-4">
+          <div className="mt-6 flex items-center gap-2">
+            <Checkbox
+              id="merge-mode"
+              data-testid="merge-mode"
+              checked={mergeMode}
+              onCheckedChange={(checked) => setMergeMode(checked === true)}
+              disabled={uploading}
+            />
+            <label htmlFor="merge-mode" className="text-sm text-muted-foreground">
+              Merge into existing data (only new and changed rows are written)
+            </label>
+          </div>
+        )}
+        {file && (
+          <div className="mt-4 flex gap-4">
             <Button
               data-testid="upload-button"
               onClick={handleUpload}
               disabled={uploading}
               className="btn-primary flex-1"
             >
-              {uploading ? 'Uploading...' : 'Upload & Process'}
+              {!uploading ? 'Upload & Process' : jobProgress ? 'Processing...' : 'Uploading...'}
             </Button>
             <Button
               variant="outline"
@@ -158,6 +200,23 @@ export default function UploadPage({ user }) {
           </div>
         )}
 
+        {/* Ingestion Progress */}
+        {jobProgress && (
+          <div className="mt-8 kpi-card" data-testid="upload-progress">
+            <h3 className="text-xl font-heading font-semibold mb-4">
+              {jobProgress.status === 'queued' ? 'Waiting for earlier uploads...' : 'Ingesting data...'}
+            </h3>
+            {Object.entries(jobProgress.sheets || {}).map(([sheet, progress]) => (
+              <div key={sheet} className="flex justify-between text-sm text-muted-foreground">
+                <span>{sheet}</span>
+                <span className="font-mono">
+                  {progress.rows_written.toLocaleString()} / {progress.rows_read.toLocaleString()} rows
+                </span>
+              </div>
+            ))}
+          </div>
+        )}
+
         {/* Upload Result */}
         {uploadResult && (
           <div className="mt-8 kpi-card" data-testid="upload-result">
@@ -179,12 +238,20 @@ export default function UploadPage({ user }) {
                 </div>
               )}
               {uploadResult.stats && uploadResult.stats.rowsPerSheet && (
-                Object.entries(uploadResult.stats.rowsPerSheet).map(([sheet, count]) => (
-                  <div key={sheet}>
-                    <p className="kpi-label mb-1">{sheet}</p>
-                    <p className="text-2xl font-mono font-medium">{count}</p>
-                  </div>
-                ))
+                Object.entries(uploadResult.stats.rowsPerSheet).map(([sheet, count]) => {
+                  const changes = uploadResult.changes && uploadResult.changes[sheet];
+                  return (
+                    <div key={sheet}>
+                      <p className="kpi-label mb-1">{sheet}</p>
+                      <p className="text-2xl font-mono font-medium">{count}</p>
+                      {changes && changes.updated !== undefined && (
+                        <p className="text-xs text-muted-foreground font-mono">
+                          +{changes.inserted} new, {changes.updated} updated, {changes.unchanged} unchanged
+                        </p>
+                      )}
+                    </div>
+                  );
+                })
               )}
             </div>
 
@@ -0,0 +1,70 @@
+"""Shared fixtures: a throwaway warehouse and helpers to upload small workbooks.
+
+The backend modules read their configuration from the environment when
+imported, so it is set here, before any test module imports them.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+WORKDIR = Path(tempfile.mkdtemp(prefix='star-cement-tests-'))
+
+os.environ['STAR_CEMENT_DB_PATH'] = str(WORKDIR / 'star_cement.duckdb')
+os.environ['SLOW_QUERY_MS'] = '0'
+for name in ('STAR_CEMENT_LAKE_PATH', 'STAR_CEMENT_SNAPSHOT_DIR', 'DUCKDB_READ_ONLY'):
+    os.environ.pop(name, None)
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / 'benchmarks'))
+
+def write_sheets(path, sheets):
+    """Write a workbook holding ``sheets`` (sheet name -> rows, in EXPECTED_SHEETS column order)"""
+    import openpyxl
+    from excel_processor import EXPECTED_SHEETS
+
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for sheet_name, rows in sheets.items():
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(EXPECTED_SHEETS[sheet_name])
+        for row in rows:
+            sheet.append(list(row))
+    workbook.save(path)
+    return str(path)
+
+def ingest(path, mode='replace'):
+    """Ingest the workbook at ``path``; returns the counts per sheet"""
+    from data_ingestion import ingest_workbook
+    from excel_processor import ExcelProcessor
+
+    processor = ExcelProcessor(str(path))
+    try:
+        return ingest_workbook(processor, mode=mode)
+    finally:
+        processor.close()
+
+@pytest.fixture
+def warehouse():
+    """An empty star schema, with the result cache cleared"""
+    from database import reset_star_schema
+    from result_cache import result_cache
+
+    reset_star_schema()
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+@pytest.fixture
+def client(warehouse):
+    """A TestClient on the API, over an empty warehouse
+
+    Not entered as a context manager: the shutdown hook would stop the
+    executors and close the database the rest of the session shares.
+    """
+    from fastapi.testclient import TestClient
+    from server import app
+
+    return TestClient(app)
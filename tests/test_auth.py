@@ -0,0 +1,22 @@
+import asyncio
+
+import server
+
+def login(client, email, password):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+def test_login_issues_a_token_for_the_users_role(client):
+    response = login(client, 'plant@starcement.com', 'Plant1234!')
+    assert response.status_code == 200
+    token = response.json()['access_token']
+
+    me = client.get('/api/auth/me', headers={'Authorization': f"Bearer {token}"})
+    assert me.json() == {'email': 'plant@starcement.com', 'role': 'Plant Head'}
+
+def test_login_rejects_a_wrong_password(client):
+    assert login(client, 'plant@starcement.com', 'wrong').status_code == 401
+    assert login(client, 'nobody@starcement.com', 'Plant1234!').status_code == 401
+
+def test_login_does_not_block_the_event_loop():
+    # bcrypt takes a good fraction of a second; a sync endpoint runs on the threadpool
+    assert not asyncio.iscoroutinefunction(server.login)
@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+from argparse import Namespace
+
+import bench_suite
+from ai_insights import SQL_TEMPLATES
+from kpi_engine import KPI_SPECS
+
+from .conftest import BACKEND_DIR
+
+TINY = ['--plants', '1', '--days', '3', '--lines', '1', '--equipment', '1', '--repeat', '1', '--ingest-repeat', '1']
+
+def test_run_suite_times_every_benchmark(warehouse, tmp_path):
+    args = Namespace(plants=1, days=3, lines=1, equipment=1, seed=7, repeat=1, ingest_repeat=1)
+
+    results, rows = bench_suite.run_suite(args, tmp_path)
+
+    expected = {'parse', 'ingest', 'charts'} | {f"kpis:{role}" for role in KPI_SPECS if role != 'default'} \
+        | {f"insight:{template}" for template in SQL_TEMPLATES}
+    assert set(results) == expected
+    assert all(timing['runs'] == 1 and timing['median_ms'] >= 0 for timing in results.values())
+    assert rows and all(count > 0 for count in rows.values())
+
+    assert bench_suite.compare(results, {'benchmarks': results}, 1.2) == []
+    faster = {name: {**timing, 'median_ms': timing['median_ms'] / 10} for name, timing in results.items()}
+    assert set(bench_suite.compare(results, {'benchmarks': faster}, 1.2)) == {
+        name for name, timing in results.items() if timing['median_ms'] > 0}
+
+def test_command_line_writes_and_compares_results(tmp_path):
+    output = tmp_path / 'results.json'
+    run = subprocess.run([sys.executable, 'benchmarks/bench_suite.py', *TINY, '--output', str(output)],
+                         cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300)
+    assert run.returncode == 0, run.stdout + run.stderr
+
+    report = json.loads(output.read_text())
+    assert report['params']['plants'] == 1 and report['params']['days'] == 3
+    assert 'ingest' in report['benchmarks']
+
+    # Against a baseline a thousand times faster the run fails with its regressions
+    for timing in report['benchmarks'].values():
+        timing['median_ms'] /= 1000
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(report))
+    run = subprocess.run([sys.executable, 'benchmarks/bench_suite.py', *TINY, '--output', str(tmp_path / 'again.json'),
+                          '--compare', str(baseline)],
+                         cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300)
+    assert run.returncode == 1, run.stdout + run.stderr
+    assert 'REGRESSION' in run.stdout
@@ -0,0 +1,81 @@
+import gzip
+from datetime import date, timedelta
+
+import pytest
+
+import http_cache
+from database import bump_data_version
+
+from .conftest import ingest, write_sheets
+
+FILTERS = {'role': 'CXO', 'start': '2024-03-01', 'end': '2024-03-31', 'plant': 'all'}
+
+@pytest.fixture
+def loaded(client, tmp_path):
+    """The client, over a month of production at several plants (a /api/charts body above PRECOMPRESS_MIN_BYTES)"""
+    ingest(write_sheets(tmp_path / 'production.xlsx', {'Production': [
+        [date(2024, 3, 1) + timedelta(days=day), plant, 'Line-1', 1000.0 + day, 700.0, 85.0, 1.0]
+        for day in range(31) for plant in ('Siliguri', 'Sonapur', 'Jorhat', 'Guwahati')
+    ]}))
+    return client
+
+def get(client, path, **headers):
+    return client.get(path, params=FILTERS, headers=headers)
+
+def test_matching_if_none_match_is_answered_304(client):
+    first = get(client, '/api/kpis')
+    assert first.status_code == 200
+    tag = first.headers['etag']
+
+    for header in (tag, f'W/{tag}', f'"other", {tag}', '*'):
+        again = get(client, '/api/kpis', **{'If-None-Match': header})
+        assert again.status_code == 304, header
+        assert again.content == b''
+        assert again.headers['etag'] == tag
+        assert again.headers['vary'] == 'Accept-Encoding'
+
+    assert get(client, '/api/kpis', **{'If-None-Match': '"other"'}).status_code == 200
+
+def test_small_bodies_are_not_compressed(client):
+    response = get(client, '/api/kpis', **{'Accept-Encoding': 'gzip'})
+    assert len(response.content) < http_cache.PRECOMPRESS_MIN_BYTES
+    assert 'content-encoding' not in response.headers
+    assert response.headers['vary'] == 'Accept-Encoding'
+
+def test_gzip_body_is_served_with_its_own_etag(loaded):
+    identity = get(loaded, '/api/charts', **{'Accept-Encoding': 'identity'})
+    assert len(identity.content) >= http_cache.PRECOMPRESS_MIN_BYTES
+    assert 'content-encoding' not in identity.headers
+
+    with loaded.stream('GET', '/api/charts', params=FILTERS, headers={'Accept-Encoding': 'gzip'}) as encoded:
+        wire = b''.join(encoded.iter_raw())
+    assert encoded.headers['content-encoding'] == 'gzip'
+    assert encoded.headers['vary'] == 'Accept-Encoding'
+    assert encoded.headers['etag'] == identity.headers['etag'][:-1] + '-gzip"'
+    assert len(wire) < len(identity.content)
+    assert gzip.decompress(wire) == identity.content
+
+    # Either representation's ETag revalidates, and the 304 carries the one the client holds
+    revalidated = get(loaded, '/api/charts', **{'Accept-Encoding': 'gzip', 'If-None-Match': encoded.headers['etag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['etag'] == encoded.headers['etag']
+
+def test_brotli_body_when_brotli_is_installed(loaded):
+    pytest.importorskip('brotli')
+    if not http_cache.BROTLI_AVAILABLE:
+        pytest.skip('http_cache was imported without brotli')
+    identity = get(loaded, '/api/charts', **{'Accept-Encoding': 'identity'})
+    encoded = get(loaded, '/api/charts', **{'Accept-Encoding': 'gzip, br'})
+    assert encoded.headers['content-encoding'] == 'br'
+    assert encoded.headers['etag'] == identity.headers['etag'][:-1] + '-br"'
+    assert encoded.json() == identity.json()
+
+def test_etag_changes_with_the_data_version(client):
+    tag = get(client, '/api/kpis').headers['etag']
+
+    bump_data_version()
+
+    response = get(client, '/api/kpis', **{'If-None-Match': tag})
+    assert response.status_code == 200
+    assert response.headers['etag'] != tag
+    assert get(client, '/api/kpis', **{'If-None-Match': response.headers['etag']}).status_code == 304
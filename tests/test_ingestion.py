@@ -0,0 +1,29 @@
+from datetime import date
+
+from database import db_cursor, get_data_version
+
+from .conftest import ingest, write_sheets
+
+def finance(day, plant, cost):
+    return [day, plant, cost, 1000.0, 20.0]
+
+def test_replace_with_an_empty_sheet_empties_the_table_and_moves_the_version(warehouse, tmp_path):
+    ingest(write_sheets(tmp_path / 'base.xlsx', {'Finance': [finance(date(2024, 3, 1), 'Siliguri', 4200.0)]}))
+    version = get_data_version()
+
+    counts = ingest(write_sheets(tmp_path / 'empty.xlsx', {'Finance': []}))
+
+    assert counts['Finance']['inserted'] == 0
+    assert get_data_version() > version
+    with db_cursor() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM fact_finance").fetchall() == [(0,)]
+        assert conn.execute("SELECT COALESCE(SUM(finance_rows), 0) FROM rollup_plant_daily").fetchall() == [(0,)]
+
+def test_merge_without_changes_keeps_the_version(warehouse, tmp_path):
+    rows = [finance(date(2024, 3, 1), 'Siliguri', 4200.0)]
+    ingest(write_sheets(tmp_path / 'base.xlsx', {'Finance': rows}))
+    version = get_data_version()
+
+    ingest(write_sheets(tmp_path / 'same.xlsx', {'Finance': rows}), mode='merge')
+
+    assert get_data_version() == version
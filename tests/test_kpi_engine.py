@@ -0,0 +1,75 @@
+"""kpi_engine against KPIs computed straight from the fact tables, each fact row counted once.
+
+The reference is what the old join-then-aggregate queries meant to compute:
+the role's driving table picks the plant-days in the filter, and every metric
+aggregates its own fact table's rows on those plant-days. Joining the fact
+tables first fanned rows out (several lines and pieces of equipment per
+plant-day), which is why the engine pre-aggregates instead.
+"""
+import math
+
+import duckdb
+import pytest
+
+from database import _create_star_schema
+from kpi_engine import KPI_SPECS, compute_kpi_row, kpi_spec
+from rollups import ROLLUP_DOMAINS, build_rollups
+from _warehouse import populate
+
+START, END = '2022-03-01', '2022-10-15'
+ROLES = list(KPI_SPECS) + ['Auditor']
+PLANTS = ['all', 'Plant-0', 'Plant-1', 'Plant-2', 'Nowhere']
+WINDOWS = [(START, END), ('2030-01-01', '2030-12-31')]
+
+COLUMN_TABLES = {col: table for table, cols, _ in ROLLUP_DOMAINS.values() for col in cols}
+
+def reference_kpis(conn, role, start, end, plant):
+    driving, metrics = kpi_spec(role)
+    driving_table = ROLLUP_DOMAINS[driving][0]
+    row = {}
+    for name, aggregate, column in metrics:
+        row[name] = conn.execute(f"""
+            SELECT {aggregate}(f.{column})
+            FROM {COLUMN_TABLES[column]} f JOIN dim_plant d USING (plant_id)
+            WHERE f.date BETWEEN $start::DATE AND $end::DATE AND ($plant = 'all' OR d.plant_name = $plant)
+              AND (f.date, f.plant_id) IN (SELECT date, plant_id FROM {driving_table})
+        """, {'start': start, 'end': end, 'plant': plant}).fetchall()[0][0]
+    return row
+
+def assert_same(actual, expected):
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        if value is None:
+            assert actual[name] is None, name
+        else:
+            assert actual[name] is not None and math.isclose(actual[name], value, rel_tol=1e-9, abs_tol=1e-9), name
+
+@pytest.fixture(scope='module')
+def conn():
+    conn = duckdb.connect()
+    _create_star_schema(conn)
+    # Several lines and pieces of equipment per plant-day: a join would fan rows out
+    populate(conn, 1, 4, 3, 4)
+    # Plant-1 reports no EBITDA at all, some days have no power reading, Plant-2 has no quality rows
+    conn.execute("UPDATE fact_finance SET ebitda_rs_ton = NULL WHERE plant_id = 2")
+    conn.execute("UPDATE fact_energy SET power_kwh_ton = NULL WHERE day(date) % 3 = 0")
+    conn.execute("DELETE FROM fact_quality WHERE plant_id = 3")
+    # Sales only on weekdays: the Sales role is driven by fewer plant-days
+    conn.execute("DELETE FROM fact_sales WHERE dayofweek(date) IN (0, 6)")
+    build_rollups(conn)
+    yield conn
+    conn.close()
+
+@pytest.mark.parametrize('role', ROLES)
+@pytest.mark.parametrize('plant', PLANTS)
+@pytest.mark.parametrize('start,end', WINDOWS)
+def test_kpis_match_fact_level_reference(conn, role, plant, start, end):
+    assert_same(compute_kpi_row(conn, role, start, end, plant), reference_kpis(conn, role, start, end, plant))
+
+@pytest.mark.parametrize('role', ROLES)
+def test_kpis_of_an_empty_warehouse_are_null(role):
+    conn = duckdb.connect()
+    _create_star_schema(conn)
+    row = compute_kpi_row(conn, role, START, END, 'all')
+    assert_same(row, reference_kpis(conn, role, START, END, 'all'))
+    assert set(row.values()) == {None}
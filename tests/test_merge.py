@@ -0,0 +1,69 @@
+from datetime import date
+
+from database import db_cursor
+
+from .conftest import ingest, write_sheets
+
+DAY = date(2024, 3, 1)
+
+def sales(day, plant, region, dispatch):
+    return [day, plant, region, dispatch, 5200.0, 700.0, 90.0]
+
+def fact_sales():
+    with db_cursor() as conn:
+        return conn.execute("""
+            SELECT r.region, s.dispatch_mt FROM fact_sales s JOIN dim_region r USING (region_id)
+            ORDER BY r.region
+        """).fetchall()
+
+def daily_sales():
+    with db_cursor() as conn:
+        return conn.execute("SELECT dispatch_mt_sum, sales_rows FROM rollup_plant_daily WHERE date = ?", [DAY]).fetchall()
+
+def test_merge_keeps_unchanged_rows_sharing_a_key(warehouse, tmp_path):
+    # Sales are keyed on (date, plant): one plant-day holds a row per region
+    ingest(write_sheets(tmp_path / 'base.xlsx', {'Sales_Logistics': [
+        sales(DAY, 'Siliguri', 'East', 100.0),
+        sales(DAY, 'Siliguri', 'Northeast', 200.0)
+    ]}))
+
+    counts = ingest(write_sheets(tmp_path / 'merge.xlsx', {'Sales_Logistics': [
+        sales(DAY, 'Siliguri', 'East', 150.0),
+        sales(DAY, 'Siliguri', 'Northeast', 200.0)
+    ]}), mode='merge')
+
+    assert fact_sales() == [('East', 150.0), ('Northeast', 200.0)]
+    assert daily_sales() == [(350.0, 2)]
+    counts['Sales_Logistics'].pop('rows_per_sec')
+    assert counts['Sales_Logistics'] == {'inserted': 0, 'updated': 1, 'unchanged': 1, 'deleted': 2}
+
+def test_merge_replaces_the_rows_of_a_changed_key(warehouse, tmp_path):
+    ingest(write_sheets(tmp_path / 'base.xlsx', {'Sales_Logistics': [
+        sales(DAY, 'Siliguri', 'East', 100.0),
+        sales(DAY, 'Siliguri', 'Northeast', 200.0),
+        sales(DAY, 'Sonapur', 'Northeast', 300.0)
+    ]}))
+
+    # The upload's rows for a plant-day stand for all of that plant-day's rows
+    ingest(write_sheets(tmp_path / 'merge.xlsx', {'Sales_Logistics': [
+        sales(DAY, 'Siliguri', 'East', 120.0)
+    ]}), mode='merge')
+
+    with db_cursor() as conn:
+        rows = conn.execute("""
+            SELECT p.plant_name, r.region, s.dispatch_mt
+            FROM fact_sales s JOIN dim_plant p USING (plant_id) JOIN dim_region r USING (region_id)
+            ORDER BY 1, 2
+        """).fetchall()
+    assert rows == [('Siliguri', 'East', 120.0), ('Sonapur', 'Northeast', 300.0)]
+    assert sorted(daily_sales()) == [(120.0, 1), (300.0, 1)]
+
+def test_merge_of_identical_rows_changes_nothing(warehouse, tmp_path):
+    rows = [sales(DAY, 'Siliguri', 'East', 100.0), sales(DAY, 'Siliguri', 'Northeast', 200.0)]
+    ingest(write_sheets(tmp_path / 'base.xlsx', {'Sales_Logistics': rows}))
+
+    counts = ingest(write_sheets(tmp_path / 'merge.xlsx', {'Sales_Logistics': rows}), mode='merge')
+
+    assert fact_sales() == [('East', 100.0), ('Northeast', 200.0)]
+    counts['Sales_Logistics'].pop('rows_per_sec')
+    assert counts['Sales_Logistics'] == {'inserted': 0, 'updated': 0, 'unchanged': 2, 'deleted': 0}
@@ -0,0 +1,78 @@
+import duckdb
+import pytest
+
+import database
+from database import SCHEMA_VERSION, STAR_TABLES, create_table, migrate, schema_version
+from rollups import DAILY_ROLLUP, MONTHLY_ROLLUP
+from _warehouse import populate
+
+def row_counts_of(conn, tables):
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchall()[0][0] for table in tables}
+
+def row_counts(conn):
+    return row_counts_of(conn, STAR_TABLES)
+
+@pytest.fixture
+def baseline(tmp_path):
+    """An unversioned warehouse of the current layout holding rows, with no rollups yet"""
+    conn = duckdb.connect(str(tmp_path / 'baseline.duckdb'))
+    for table in STAR_TABLES:
+        create_table(conn, table)
+    populate(conn, 1, 2, 2, 2)
+    yield conn
+    conn.close()
+
+def test_migrate_keeps_the_rows_of_an_unversioned_warehouse(baseline):
+    before = row_counts(baseline)
+    assert schema_version(baseline) == 0
+
+    assert migrate(baseline) == SCHEMA_VERSION
+
+    assert schema_version(baseline) == SCHEMA_VERSION
+    assert row_counts(baseline) == before
+    # The rollups are built from the rows kept
+    rolled_up = baseline.execute(f"SELECT SUM(cement_mt_sum) FROM {DAILY_ROLLUP}").fetchall()[0][0]
+    assert rolled_up == pytest.approx(baseline.execute("SELECT SUM(cement_mt) FROM fact_production").fetchall()[0][0])
+    assert baseline.execute(f"SELECT COUNT(*) FROM {MONTHLY_ROLLUP}").fetchall()[0][0] > 0
+
+def test_migrate_is_idempotent(baseline):
+    migrate(baseline)
+    counts = row_counts(baseline)
+    rollup = baseline.execute(f"SELECT * FROM {DAILY_ROLLUP} ORDER BY ALL").fetchall()
+    history = baseline.execute("SELECT version, description, applied_at FROM schema_version").fetchall()
+
+    assert migrate(baseline) == SCHEMA_VERSION
+
+    assert row_counts(baseline) == counts
+    assert baseline.execute(f"SELECT * FROM {DAILY_ROLLUP} ORDER BY ALL").fetchall() == rollup
+    assert baseline.execute("SELECT version, description, applied_at FROM schema_version").fetchall() == history
+
+def test_migrate_recreates_tables_of_an_older_layout(baseline):
+    # Before dimension ids, fact tables held the plant name
+    baseline.execute("DROP TABLE fact_energy")
+    baseline.execute("CREATE TABLE fact_energy (date DATE, plant_name VARCHAR, power_kwh_ton DOUBLE)")
+    baseline.execute("INSERT INTO fact_energy VALUES ('2022-01-01', 'Plant-0', 70.0)")
+    baseline.execute("DROP TABLE dim_region")
+    kept = row_counts_of(baseline, [table for table in STAR_TABLES if table not in ('fact_energy', 'dim_region')])
+
+    migrate(baseline)
+
+    assert database._stored_columns(baseline, 'fact_energy') == database.table_columns('fact_energy')
+    counts = row_counts(baseline)
+    assert counts['fact_energy'] == 0 and counts['dim_region'] == 0
+    assert {table: counts[table] for table in kept} == kept
+
+def test_a_failing_migration_rolls_back(baseline, monkeypatch):
+    migrate(baseline)
+    counts = row_counts(baseline)
+
+    def broken(conn):
+        conn.execute("DELETE FROM fact_production")
+        raise RuntimeError("broken migration")
+
+    monkeypatch.setattr(database, 'MIGRATIONS', database.MIGRATIONS + [(SCHEMA_VERSION + 1, 'Broken', broken)])
+    with pytest.raises(RuntimeError):
+        migrate(baseline)
+
+    assert schema_version(baseline) == SCHEMA_VERSION
+    assert row_counts(baseline) == counts
@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from .conftest import ingest, write_sheets
+
+FILTERS = {'role': 'CXO', 'start': '2024-03-01', 'end': '2024-03-31', 'plant': 'all'}
+
+def production(cement):
+    return [[date(2024, 3, 1) + timedelta(days=day), 'Siliguri', 'Line-1', cement, 700.0, 85.0, 1.0] for day in range(3)]
+
+def total_cement(client):
+    response = client.get('/api/kpis', params=FILTERS)
+    assert response.status_code == 200
+    return response.json()['kpis']['total_cement_mt']
+
+def plant_production(client):
+    response = client.get('/api/charts', params=FILTERS)
+    assert response.status_code == 200
+    return response.json()['charts']['plant_production']
+
+def test_ingest_invalidates_cached_kpis_and_charts(client, tmp_path):
+    ingest(write_sheets(tmp_path / 'first.xlsx', {'Production': production(1000.0)}))
+    assert total_cement(client) == 3000.0
+    first = plant_production(client)
+    # Answered again from the cache
+    assert total_cement(client) == 3000.0
+    assert plant_production(client) == first
+
+    ingest(write_sheets(tmp_path / 'second.xlsx', {'Production': production(2500.0)}))
+
+    assert total_cement(client) == 7500.0
+    assert plant_production(client) != first
+
+def test_merge_invalidates_cached_kpis(client, tmp_path):
+    ingest(write_sheets(tmp_path / 'first.xlsx', {'Production': production(1000.0)}))
+    assert total_cement(client) == 3000.0
+
+    rows = production(1000.0)
+    rows[0][3] = 4000.0
+    ingest(write_sheets(tmp_path / 'merge.xlsx', {'Production': rows}), mode='merge')
+
+    assert total_cement(client) == 6000.0
@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+
+import database
+import snapshots
+from database import ConnectionManager, get_data_version
+
+from .conftest import ingest, write_sheets
+
+def finance(cost):
+    return {'Finance': [[date(2024, 3, 1), 'Siliguri', cost, 1000.0, 20.0]]}
+
+def cost(manager):
+    with manager.cursor() as conn:
+        return conn.execute("SELECT cost_rs_ton FROM fact_finance").fetchall()
+
+@pytest.fixture
+def snapshot_dir(warehouse, tmp_path, monkeypatch):
+    """The writer publishes to a fresh snapshot directory"""
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+    monkeypatch.setattr(database, 'SNAPSHOTS_ENABLED', True)
+    return tmp_path / 'snapshots'
+
+@pytest.fixture
+def follower(monkeypatch):
+    """A read-only connection manager standing in for a reader process's"""
+    manager = ConnectionManager(db_path=None, read_only=True)
+    yield manager
+    manager.close()
+
+def follow(follower, monkeypatch):
+    """Switch ``follower`` to the current snapshot as the reader's polling thread does"""
+    with monkeypatch.context() as patch:
+        patch.setattr(database, '_manager', follower)
+        database._switch_snapshot()
+
+def test_follower_sees_each_published_version(snapshot_dir, follower, monkeypatch, tmp_path):
+    ingest(write_sheets(tmp_path / 'first.xlsx', finance(4000.0)))
+    first = get_data_version()
+    assert snapshots.current_snapshot()[1] == first
+    follow(follower, monkeypatch)
+    assert cost(follower) == [(4000.0,)]
+
+    # A query running on the first snapshot finishes there
+    with follower.cursor() as running:
+        ingest(write_sheets(tmp_path / 'second.xlsx', finance(4500.0)))
+        second = get_data_version()
+        path, version = snapshots.current_snapshot()
+        assert version == second > first
+
+        follow(follower, monkeypatch)
+
+        assert follower.db_path == path
+        assert follower.stats()['retired_in_use'] == 1
+        assert running.execute("SELECT cost_rs_ton FROM fact_finance").fetchall() == [(4000.0,)]
+        assert cost(follower) == [(4500.0,)]
+    assert follower.stats()['retired_in_use'] == 0
+    assert follower.stats()['swaps'] == 2
+
+def test_only_the_newest_snapshots_are_kept(snapshot_dir, monkeypatch):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_KEEP', 2)
+    published = [database.publish_snapshot() for _ in range(4)]
+
+    assert sorted(snapshot_dir.glob('snapshot-*.duckdb')) == published[-2:]
+    assert not list(snapshot_dir.glob('.*'))
+    assert snapshots.current_snapshot()[0] == published[-1]
+
+def test_reader_does_not_publish(snapshot_dir, follower, monkeypatch):
+    monkeypatch.setattr(database, '_manager', follower)
+    assert database.publish_snapshot() is None
+    assert snapshots.current_snapshot() is None